@@ -1,37 +1,16 @@
-# This is just an example of a trivial MatMul unit, in order to test PyXHDL
-# and its inter-operability with numpy arrays.
+# This is just an example of a MatMul unit, in order to test PyXHDL and its
+# inter-operability with numpy arrays. The multiplication is carried out by
+# a tilesize x tilesize output stationary systolic array.
 import logging
 
 import numpy as np
 
+import py_misc_utils.module_utils as pymu
+
 import pyxhdl as X
 from pyxhdl import xlib as XL
 
-
-class MatMult(X.Entity):
-
-  PORTS = 'CLK, RESET, A, B, A_ROW, MMITER, B_COL, COMPUTE, =XOUT'
-  ARGS = dict(tilesize=8)
-
-  @X.hdl_process(sens='+CLK')
-  def mat_mult():
-    i_mmiter = X.mkwire(X.INT)
-    iarow = X.mkwire(X.INT)
-    ibcol = X.mkwire(X.INT)
-
-    if RESET == 1:
-      XOUT = 0
-    elif COMPUTE == 1:
-      i_mmiter = MMITER
-      for i in range(tilesize):
-        iarow = A_ROW + i
-        for j in range(tilesize):
-          ibcol = B_COL + j
-          temp = A[iarow, i_mmiter] * B[i_mmiter, ibcol]
-          for k in range(1, tilesize):
-            temp += A[iarow, i_mmiter + k] * B[i_mmiter + k, ibcol]
-
-          XOUT[iarow, ibcol] += temp
+systolic = pymu.rel_import_module('utils/systolic', __file__)
 
 
 class MMUnit(X.Entity):
@@ -47,74 +26,141 @@ class MMUnit(X.Entity):
 
     amat = X.mkreg(AROW.dtype.new_shape(N, N, AROW.dtype.nbits))
     bmat = X.mkreg(BROW.dtype.new_shape(N, N, BROW.dtype.nbits))
+    cmat = X.mkreg(CROW.dtype.new_shape(N, N, CROW.dtype.nbits))
+
+    # The tile being fed into the systolic array, and the one whose results
+    # are being collected.
+    kiter = X.mkvreg(X.UINT8, 0)
     a_row = X.mkvreg(X.UINT8, 0)
-    mmiter = X.mkvreg(X.UINT8, 0)
     b_col = X.mkvreg(X.UINT8, 0)
-    cmat = X.mkreg(CROW.dtype.new_shape(N, N, CROW.dtype.nbits))
-    mmcompute = X.mkvreg(COMPUTE.dtype, 0)
-
-    MatMult(
-      CLK=CLK,
-      RESET=RESET,
-      A=amat,
-      B=bmat,
-      A_ROW=a_row,
-      MMITER=mmiter,
-      B_COL=b_col,
-      COMPUTE=mmcompute,
-      XOUT=cmat,
-      tilesize=tsize)
+    r_row = X.mkvreg(X.UINT8, 0)
+    r_col = X.mkvreg(X.UINT8, 0)
+    pending = X.mkvreg(X.BIT, 0)
+
+    rst_n = X.mkwire(X.BIT)
+    acol = X.mkreg(X.mkarray(AROW.dtype.element_type(), tsize))
+    brow = X.mkreg(X.mkarray(BROW.dtype.element_type(), tsize))
+    vin = X.mkreg(X.BIT)
+    lin = X.mkreg(X.BIT)
+    res = X.mkreg(X.mkarray(CROW.dtype.element_type(), tsize, tsize))
+    done = X.mkreg(X.BIT)
+
+    systolic.SystolicArray(CLK=CLK,
+                           RST_N=rst_n,
+                           AIN=acol,
+                           BIN=brow,
+                           VIN=vin,
+                           LIN=lin,
+                           RES=res,
+                           DONE=done)
+
+    rst_n = ~RESET
 
   # States
   INIT = 0
   COMPUTING = 1
+  DRAINING = 2
 
   @X.hdl_process(sens='+CLK')
   def main(self):
     rowidx = XL.mkreg(X.INT)
     state = XL.mkreg(X.UINT4)
 
+    N = AROW.dtype.array_shape[-1]
+    tsize = min(tilesize, N)
+    LIMIT = N - tsize
+
     if RESET == 1:
       READY = 0
       rowidx = 0
-      mmcompute = 0
-      a_row, mmiter, b_col = 0, 0, 0
+      vin, lin, pending = 0, 0, 0
+      kiter, a_row, b_col = 0, 0, 0
+      r_row, r_col = 0, 0
       state = self.INIT
-    elif state == self.COMPUTING:
-      N = AROW.dtype.array_shape[-1]
-      tsize = min(tilesize, N)
-      LIMIT = N - tsize
-      if mmiter == LIMIT:
-        mmiter = 0
-        if a_row == LIMIT:
-          a_row = 0
-          if b_col == LIMIT:
+    else:
+      vin = 0
+
+      if done == 1:
+        for i in range(tsize):
+          for j in range(tsize):
+            cmat[r_row + i, r_col + j] = res[i, j]
+
+        pending = 0
+        if r_row == LIMIT:
+          r_row = 0
+          if r_col == LIMIT:
             state = self.INIT
-            mmcompute = 0
             READY = 1
           else:
-            b_col += tsize
+            r_col += tsize
         else:
-          a_row += tsize
-      else:
-        mmiter += tsize
-    elif INFEED == 1:
-      for n in range(AROW.dtype.array_shape[-1]):
-        amat[rowidx, n] = AROW[n]
-      for n in range(BROW.dtype.array_shape[-1]):
-        bmat[rowidx, n] = BROW[n]
-
-      rowidx += 1
-    elif COMPUTE == 1:
-      READY = 0
-      state = self.COMPUTING
-      rowidx = 0
-      a_row, mmiter, b_col = 0, 0, 0
-      mmcompute = 1
-    elif OUTFEED == 1:
-      if rowidx < CROW.dtype.array_shape[-1]:
-        for n in range(CROW.dtype.array_shape[-1]):
-          CROW[n] = cmat[rowidx, n]
-
-        rowidx += 1
-
+          r_row += tsize
+
+      if state == self.COMPUTING:
+        # The array is fed from the first column of A and the first row of B,
+        # which are rotated at every beat, so that no wide multiplexers are
+        # needed. The last beat of a tile is held until the results of the
+        # previous one have been collected.
+        if kiter != N - 1 or pending == 0:
+          for i in range(tsize):
+            acol[i] = amat[i, 0]
+          for j in range(tsize):
+            brow[j] = bmat[0, j]
+          vin = 1
+
+          if kiter == N - 1:
+            lin = 1
+            pending = 1
+            kiter = 0
+
+            # Moving to the next tile rows of A, and eventually to the next
+            # tile columns of B.
+            for r in range(N):
+              for n in range(N):
+                amat[r, n] = amat[(r + tsize) % N, (n + 1) % N]
+
+            if a_row == LIMIT:
+              a_row = 0
+              for n in range(N):
+                for c in range(N):
+                  bmat[n, c] = bmat[(n + 1) % N, (c + tsize) % N]
+
+              if b_col == LIMIT:
+                state = self.DRAINING
+              else:
+                b_col += tsize
+            else:
+              a_row += tsize
+              for n in range(N):
+                for c in range(N):
+                  bmat[n, c] = bmat[(n + 1) % N, c]
+          else:
+            lin = 0
+            kiter += 1
+
+            for r in range(N):
+              for n in range(N):
+                amat[r, n] = amat[r, (n + 1) % N]
+            for n in range(N):
+              for c in range(N):
+                bmat[n, c] = bmat[(n + 1) % N, c]
+      elif state == self.INIT:
+        if INFEED == 1:
+          for n in range(AROW.dtype.array_shape[-1]):
+            amat[rowidx, n] = AROW[n]
+          for n in range(BROW.dtype.array_shape[-1]):
+            bmat[rowidx, n] = BROW[n]
+
+          rowidx += 1
+        elif COMPUTE == 1:
+          READY = 0
+          state = self.COMPUTING
+          rowidx = 0
+          kiter, a_row, b_col = 0, 0, 0
+          r_row, r_col = 0, 0
+        elif OUTFEED == 1:
+          if rowidx < CROW.dtype.array_shape[-1]:
+            for n in range(CROW.dtype.array_shape[-1]):
+              CROW[n] = cmat[rowidx, n]
+
+            rowidx += 1
@@ -0,0 +1,149 @@
+import py_misc_utils.module_utils as pymu
+
+import pyxhdl as X
+from pyxhdl import xlib as XL
+
+axis_ifc = pymu.rel_import_module('../../utils/axis_ifc', __file__)
+axis_stream = pymu.rel_import_module('../../utils/axis_stream', __file__)
+
+
+class AxisThroughput(X.Entity):
+
+  # Streams num_beats M beats through the DUT (one of "skid", "upsizer", "downsizer",
+  # "fifo" or "sync_fifo"), with the source always valid and the sink TREADY driven
+  # by an LFSR, high with ready_prob probability. Every lane (of width bits) of the
+  # beats carries its index within the stream, which the sink checks. At the end, the
+  # sustained M beats per cycle are reported, together with the lanes (narrow beats)
+  # per cycle, and the M beats per cycle with TREADY high, which is 1 for a DUT never
+  # wasting a sink ready cycle (while the upsizer is bounded by the source, at one
+  # narrow beat per cycle).
+  ARGS = dict(clock_frequency=100e6,
+              dut='skid',
+              num_beats=256,
+              width=8,
+              ratio=4,
+              fifo_size=16,
+              ready_prob=0.5,
+              seed=0xace1)
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root(self):
+    clock = pymu.rel_import_module('../../utils/clock', __file__)
+
+    if dut == 'upsizer':
+      self.slanes, self.mlanes = 1, ratio
+    elif dut == 'downsizer':
+      self.slanes, self.mlanes = ratio, 1
+    else:
+      self.slanes, self.mlanes = 1, 1
+
+    CLK = X.mkreg(X.BIT)
+
+    clock.Clock(CLK=CLK,
+                frequency=clock_frequency)
+
+    RST_N = X.mkreg(X.BIT)
+
+    self.sifc = axis_ifc.AxisIfc(X.Bits(width * self.slanes), CLK, RST_N)
+    self.mifc = axis_ifc.AxisIfc(X.Bits(width * self.mlanes), CLK, RST_N)
+
+    if dut == 'skid':
+      axis_stream.AxisSkidBuffer(S=self.sifc, M=self.mifc)
+    elif dut == 'upsizer':
+      axis_stream.AxisUpsizer(S=self.sifc, M=self.mifc)
+    elif dut == 'downsizer':
+      axis_stream.AxisDownsizer(S=self.sifc, M=self.mifc)
+    elif dut == 'fifo':
+      axis_stream.AxisFifo(S=self.sifc, M=self.mifc, size=fifo_size)
+    elif dut == 'sync_fifo':
+      axis_stream.AxisFifo(S=self.sifc, M=self.mifc, size=fifo_size, same_clock=True)
+    else:
+      raise ValueError(f'Unknown DUT: {dut}')
+
+    sent = X.mkreg(X.Uint(32))
+    received = X.mkreg(X.Uint(32))
+    errors = X.mkreg(X.Uint(32))
+    cycles = X.mkreg(X.Uint(32))
+    ready_cycles = X.mkreg(X.Uint(32))
+    lfsr = X.mkreg(X.Uint(16))
+    done = X.mkreg(X.BIT)
+
+  @X.hdl_process(sens='+CLK')
+  def source(self):
+    num_sbeats = num_beats * self.mlanes // self.slanes
+
+    if RST_N != 1:
+      self.sifc.TVALID = 0
+      sent = 0
+    elif self.sifc.TVALID == 0 or self.sifc.TREADY == 1:
+      if sent < num_sbeats:
+        for l in range(self.slanes):
+          self.sifc.TDATA[l * width: (l + 1) * width] = \
+            XL.cast(sent * self.slanes + l, X.Uint(width))
+        self.sifc.TVALID = 1
+        sent += 1
+      else:
+        self.sifc.TVALID = 0
+
+  @X.hdl_process(sens='+CLK')
+  def sink(self):
+    if RST_N != 1:
+      self.mifc.TREADY = 0
+      received = 0
+      errors = 0
+      cycles = 0
+      ready_cycles = 0
+      lfsr = seed
+      done = 0
+    elif done == 0:
+      cycles += 1
+
+      # Galois LFSR, with the 8 low bits compared against the ready probability.
+      if lfsr[0] == 1:
+        lfsr = (lfsr >> 1) ^ 0xb400
+      else:
+        lfsr = lfsr >> 1
+
+      if ready_prob >= 1:
+        self.mifc.TREADY = 1
+      else:
+        self.mifc.TREADY = lfsr[: 8] < int(ready_prob * 256)
+
+      if self.mifc.TREADY == 1:
+        ready_cycles += 1
+
+      if self.mifc.TVALID == 1 and self.mifc.TREADY == 1:
+        for l in range(self.mlanes):
+          if self.mifc.TDATA[l * width: (l + 1) * width] != \
+             XL.cast(received * self.mlanes + l, X.Uint(width)):
+            errors += 1
+        received += 1
+        if received == num_beats - 1:
+          done = 1
+
+      if cycles == 100 * num_beats:
+        done = 1
+
+  @X.hdl_process(kind=X.INIT_PROCESS)
+  def test_run(self):
+    from pyxhdl import testbench as TB
+
+    RST_N = 0
+
+    TB.wait_rising(CLK)
+    TB.wait_rising(CLK)
+
+    RST_N = 1
+
+    XL.wait_until(done == 1)
+
+    TB.compare_value(received, num_beats, msg=f' : received beats')
+    TB.compare_value(errors, 0, msg=f' : data errors')
+
+    XL.report(f'AXIS {dut}: beats={num_beats} cycles={{XL.cast(cycles, X.INT)}} ' \
+              f'beats/cycle={{num_beats / XL.cast(cycles, X.REAL)}} ' \
+              f'lanes/cycle={{num_beats * self.mlanes / XL.cast(cycles, X.REAL)}} ' \
+              f'beats/ready={{num_beats / XL.cast(ready_cycles, X.REAL)}}')
+
+    XL.finish()
+
@@ -22,7 +22,7 @@ class UartData:
     self.num_tests = inputs.get('num_tests', 20)
     self.env = dict()
 
-  def emit(self, wait=None, **kwargs):
+  def emit(self, wait=None, preamble=False, **kwargs):
     inputs = {name: kwargs[name] for name in self.input_fields if name in kwargs}
     outputs = {name: kwargs[name] for name in self.output_fields if name in kwargs}
 
@@ -30,7 +30,8 @@ class UartData:
                      outputs=outputs,
                      wait=self.bit_time if wait is None else wait,
                      wait_expr=None,
-                     env=self.env)
+                     env=self.env,
+                     preamble=preamble)
 
   def wait(self, wait_expr):
     return TB.TbData(inputs=dict(),
@@ -61,16 +62,19 @@ class UartData:
     yield self.emit(UOUT=1)
 
   def generate(self):
-    yield self.emit(RST_N=0)
-    yield self.emit(RST_N=1, UIN=1)
+    yield self.emit(RST_N=0, preamble=True)
+    yield self.emit(RST_N=1, UIN=1, preamble=True)
 
     for i in range(self.num_tests):
       value = random.randint(0, 255)
 
-      XL.write(f'{{NOW}} [{i}] value={value:08b} ({value})')
+      # Every byte echo is yielded as a group, so that testbench shards never
+      # split it.
+      group = [self.wait(f'XL.write("{{NOW}} [{i}] value={value:08b} ({value})")')]
+      group.extend(self._gen_byte(value))
+      group.extend(self._match_byte(value))
 
-      yield from self._gen_byte(value)
-      yield from self._match_byte(value)
+      yield group
 
 
 def tb_iterator(eclass, inputs, args,
@@ -0,0 +1,148 @@
+import py_misc_utils.module_utils as pymu
+
+import pyxhdl as X
+from pyxhdl import xlib as XL
+
+uart = pymu.rel_import_module('../../utils/uart', __file__)
+
+
+class UartFifoEcho(X.Entity):
+
+  # Echoes back every word received by the BufferedUart, by moving it from the RX
+  # FIFO to the TX FIFO as soon as it lands.
+  PORTS = 'CLK=bit, RST_N=bit, UIN=bit, =UOUT=bit'
+  ARGS = dict(clk_freq=50000000, baud_rate=115200, oversample=16, fifo_size=16)
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root(self):
+    self.uifc = uart.UartFifoIfc(CLK, RST_N, UIN, UOUT, **self.kwargs)
+
+    uart.BufferedUart(IFC=self.uifc)
+
+    self.uifc.RX_RUP = ~self.uifc.RX_EMPTY & ~self.uifc.TX_FULL
+    self.uifc.TX_WUP = self.uifc.RX_RUP
+    self.uifc.TX_DATA = self.uifc.RX_DATA
+
+
+class UartThroughput(X.Entity):
+
+  # A host BufferedUart streams num_bytes LFSR generated bytes to the UartFifoEcho,
+  # keeping its TX FIFO full, and checks the echoed stream. The echo must sustain
+  # line rate, so the stream has to complete within the time of num_bytes + 2
+  # back to back frames (the two extra frames covering the echo latency). At the
+  # end, the achieved fraction of the line rate is reported.
+  ARGS = dict(clock_frequency=50e6,
+              baud_rate=1562500,
+              oversample=8,
+              fifo_size=16,
+              num_bytes=64,
+              seed=0xace1)
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root(self):
+    clock = pymu.rel_import_module('../../utils/clock', __file__)
+
+    CLK = X.mkreg(X.BIT)
+
+    clock.Clock(CLK=CLK,
+                frequency=clock_frequency)
+
+    RST_N = X.mkreg(X.BIT)
+
+    host_tx = X.mkreg(X.BIT)
+    echo_tx = X.mkreg(X.BIT)
+
+    uart_args = dict(clk_freq=int(clock_frequency),
+                     baud_rate=baud_rate,
+                     oversample=oversample,
+                     fifo_size=fifo_size)
+
+    UartFifoEcho(CLK=CLK,
+                 RST_N=RST_N,
+                 UIN=host_tx,
+                 UOUT=echo_tx,
+                 **uart_args)
+
+    self.hifc = uart.UartFifoIfc(CLK, RST_N, echo_tx, host_tx, **uart_args)
+
+    uart.BufferedUart(IFC=self.hifc)
+
+    self.frame_clks = self.hifc.clks_per_bit * (self.hifc.word_size + 2)
+
+    sent = X.mkreg(X.Uint(32))
+    received = X.mkreg(X.Uint(32))
+    errors = X.mkreg(X.Uint(32))
+    cycles = X.mkreg(X.Uint(32))
+    tx_lfsr = X.mkreg(X.Uint(16))
+    rx_lfsr = X.mkreg(X.Uint(16))
+    done = X.mkreg(X.BIT)
+
+    self.hifc.TX_WUP = RST_N & (sent < num_bytes)
+    self.hifc.TX_DATA = tx_lfsr[: 8]
+    self.hifc.RX_RUP = ~self.hifc.RX_EMPTY
+
+  @X.hdl_process(sens='+CLK')
+  def source(self):
+    if RST_N != 1:
+      sent = 0
+      tx_lfsr = seed
+    elif self.hifc.TX_WUP == 1 and self.hifc.TX_FULL == 0:
+      sent += 1
+      if tx_lfsr[0] == 1:
+        tx_lfsr = (tx_lfsr >> 1) ^ 0xb400
+      else:
+        tx_lfsr = tx_lfsr >> 1
+
+  @X.hdl_process(sens='+CLK')
+  def sink(self):
+    if RST_N != 1:
+      received = 0
+      errors = 0
+      cycles = 0
+      rx_lfsr = seed
+      done = 0
+    elif done == 0:
+      cycles += 1
+
+      if self.hifc.RX_EMPTY == 0:
+        if self.hifc.RX_DATA != rx_lfsr[: 8]:
+          errors += 1
+        if rx_lfsr[0] == 1:
+          rx_lfsr = (rx_lfsr >> 1) ^ 0xb400
+        else:
+          rx_lfsr = rx_lfsr >> 1
+
+        received += 1
+        if received == num_bytes - 1:
+          done = 1
+
+      if cycles == 2 * (num_bytes + 2) * self.frame_clks:
+        done = 1
+
+  @X.hdl_process(kind=X.INIT_PROCESS)
+  def test_run(self):
+    from pyxhdl import testbench as TB
+
+    RST_N = 0
+
+    TB.wait_rising(CLK)
+    TB.wait_rising(CLK)
+
+    RST_N = 1
+
+    XL.wait_until(done == 1)
+
+    max_cycles = (num_bytes + 2) * self.frame_clks
+
+    TB.compare_value(received, num_bytes, msg=f' : received bytes')
+    TB.compare_value(errors, 0, msg=f' : data errors')
+
+    if cycles > max_cycles:
+      XL.report(f'{{XL.cast(cycles, X.INT)}} cycles exceed the line rate bound of ' \
+                f'{max_cycles} cycles', severity=XL.ERROR)
+
+    XL.report(f'UART echo: bytes={num_bytes} cycles={{XL.cast(cycles, X.INT)}} ' \
+              f'line_rate={{num_bytes * self.frame_clks / XL.cast(cycles, X.REAL)}}')
+
+    XL.finish()
+
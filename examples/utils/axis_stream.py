@@ -0,0 +1,156 @@
+import py_misc_utils.module_utils as pymu
+
+import pyxhdl as X
+
+axis_ifc = pymu.rel_import_module('axis_ifc', __file__)
+fifo = pymu.rel_import_module('fifo', __file__)
+
+_AXIS = f'{axis_ifc.__name__}.AxisIfc'
+
+
+class AxisSkidBuffer(X.Entity):
+
+  # Register slice which cuts all the combinational paths between the S and M
+  # sides, TREADY included, while still moving one beat per cycle. When M stalls,
+  # the beat accepted in the meantime is parked within the skid register, and it
+  # is the first one to be forwarded once M is ready again.
+  PORTS = f'*S:{_AXIS}.SLAVE, *M:{_AXIS}.MASTER'
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root():
+    skid = X.mkreg(S.TDATA.dtype)
+    skid_valid = X.mkreg(X.BIT)
+
+    S.TREADY = S.RST_N & ~skid_valid
+
+  @X.hdl_process(sens='+S.CLK')
+  def run():
+    if S.RST_N != 1:
+      M.TVALID = 0
+      skid_valid = 0
+    elif M.TVALID == 0 or M.TREADY == 1:
+      if skid_valid == 1:
+        M.TDATA = skid
+        M.TVALID = 1
+        skid_valid = 0
+      else:
+        M.TDATA = S.TDATA
+        M.TVALID = S.TVALID & S.TREADY
+    elif S.TVALID == 1 and S.TREADY == 1:
+      skid = S.TDATA
+      skid_valid = 1
+
+
+class AxisUpsizer(X.Entity):
+
+  # Packs M.TDATA.nbits / S.TDATA.nbits narrow S beats into one wide M beat, with
+  # the first beat landing within the least significant bits. S.TREADY only drops
+  # when the beat completing a wide word finds M stalled, so that one narrow beat
+  # per cycle is sustained (place an AxisSkidBuffer after it, to also break the
+  # M.TREADY to S.TREADY combinational path).
+  PORTS = f'*S:{_AXIS}.SLAVE, *M:{_AXIS}.MASTER'
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root():
+    ratio = M.TDATA.dtype.nbits // S.TDATA.dtype.nbits
+    assert ratio > 1 and ratio * S.TDATA.dtype.nbits == M.TDATA.dtype.nbits
+
+    lanes = X.mkreg(X.mkarray(S.TDATA.dtype, ratio - 1))
+    count = X.mkreg(X.Uint(max(ratio - 1, 1).bit_length()))
+
+    S.TREADY = S.RST_N & ((count != ratio - 1) | ~M.TVALID | M.TREADY)
+
+  @X.hdl_process(sens='+S.CLK')
+  def run():
+    ratio = M.TDATA.dtype.nbits // S.TDATA.dtype.nbits
+    width = S.TDATA.dtype.nbits
+
+    if S.RST_N != 1:
+      M.TVALID = 0
+      count = 0
+    else:
+      if M.TVALID == 1 and M.TREADY == 1:
+        M.TVALID = 0
+
+      if S.TVALID == 1 and S.TREADY == 1:
+        if count == ratio - 1:
+          for i in range(ratio - 1):
+            M.TDATA[i * width: (i + 1) * width] = lanes[i]
+          M.TDATA[(ratio - 1) * width: ] = S.TDATA
+          M.TVALID = 1
+          count = 0
+        else:
+          lanes[count] = S.TDATA
+          count += 1
+
+
+class AxisDownsizer(X.Entity):
+
+  # Splits every wide S beat into S.TDATA.nbits / M.TDATA.nbits narrow M beats,
+  # starting from the least significant bits. The next wide beat is accepted
+  # while the last narrow beat of the current one is taken, so that one narrow
+  # beat per cycle is sustained.
+  PORTS = f'*S:{_AXIS}.SLAVE, *M:{_AXIS}.MASTER'
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root():
+    ratio = S.TDATA.dtype.nbits // M.TDATA.dtype.nbits
+    assert ratio > 1 and ratio * M.TDATA.dtype.nbits == S.TDATA.dtype.nbits
+
+    lanes = X.mkreg(X.mkarray(M.TDATA.dtype, ratio))
+    count = X.mkreg(X.Uint(max(ratio - 1, 1).bit_length()))
+    full = X.mkreg(X.BIT)
+
+    M.TDATA = lanes[count]
+    M.TVALID = full
+    S.TREADY = S.RST_N & (~full | (M.TREADY & (count == ratio - 1)))
+
+  @X.hdl_process(sens='+S.CLK')
+  def run():
+    ratio = S.TDATA.dtype.nbits // M.TDATA.dtype.nbits
+    width = M.TDATA.dtype.nbits
+
+    if S.RST_N != 1:
+      full = 0
+      count = 0
+    else:
+      if full == 1 and M.TREADY == 1:
+        if count == ratio - 1:
+          count = 0
+          full = 0
+        else:
+          count += 1
+
+      if S.TVALID == 1 and S.TREADY == 1:
+        for i in range(ratio):
+          lanes[i] = S.TDATA[i * width: (i + 1) * width]
+        full = 1
+
+
+class AxisFifo(X.Entity):
+
+  # AXI-Stream wrapper of the (dual clock) Fifo, with S being written with the S
+  # clock, and M being read with the M clock. A beat per cycle is sustained as
+  # long as the FIFO is neither full nor empty. With same_clock (both sides running
+  # off the S clock) the SyncFifo is used instead, with no synchronizers latency.
+  PORTS = f'*S:{_AXIS}.SLAVE, *M:{_AXIS}.MASTER'
+  ARGS = dict(size=16, same_clock=False)
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root(self):
+    self.fifo_ifc = fifo.FifoIfc(S.CLK, M.CLK, S.RST_N, M.RST_N,
+                                 S.TDATA.dtype.nbits, size)
+
+    if same_clock:
+      fifo.SyncFifo(IFC=self.fifo_ifc)
+    else:
+      fifo.Fifo(IFC=self.fifo_ifc)
+
+    S.TREADY = S.RST_N & ~self.fifo_ifc.WFULL
+    self.fifo_ifc.WUP = S.TVALID & S.TREADY
+    self.fifo_ifc.WDATA = S.TDATA
+
+    M.TVALID = M.RST_N & ~self.fifo_ifc.REMPTY
+    M.TDATA = self.fifo_ifc.RDATA
+    self.fifo_ifc.RUP = M.TVALID & M.TREADY
+
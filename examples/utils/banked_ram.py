@@ -0,0 +1,274 @@
+import py_misc_utils.assert_checks as tas
+import py_misc_utils.num_utils as pynu
+
+import pyxhdl as X
+
+from pyxhdl import xutils as XU
+
+
+class BankedRamIfc(X.Interface):
+
+  # Every one of the NUM_BANKS access ports can issue one read or write per cycle
+  # (EN high, with WE selecting writes) to a word address, whose low bits select
+  # the bank. Ports targeting different banks are all served within the same cycle,
+  # while for ports targeting the same bank, only the lowest one gets its GRANT.
+  # The BE bits select which units (of unit_size bits) of WDATA are written.
+  PORT = 'CLK, RST_N, EN, WE, BE, ADDR, WDATA, =GRANT, =RVALID, =RDATA'
+
+  def __init__(self, clk, rst_n, width, size, num_banks,
+               unit_size=8,
+               out_reg=False):
+    tas.check_eq(width % unit_size, 0,
+                 msg=f'Word size ({width}) must be multiple of unit size ({unit_size})')
+    tas.check(num_banks > 1 and (num_banks & (num_banks - 1)) == 0,
+              msg=f'Number of banks ({num_banks}) must be a power of two greater than one')
+    tas.check_eq(size % num_banks, 0,
+                 msg=f'RAM size ({size}) must be multiple of the number of banks ({num_banks})')
+
+    word_units = width // unit_size
+
+    super().__init__('BRAM',
+                     width=width,
+                     size=size,
+                     num_banks=num_banks,
+                     bank_bits=num_banks.bit_length() - 1,
+                     unit_size=unit_size,
+                     word_units=word_units,
+                     out_reg=out_reg,
+                     latency=2 if out_reg else 1)
+    self.mkfield('CLK', clk)
+    self.mkfield('RST_N', rst_n)
+    self.mkfield('EN', X.mkarray(X.BIT, num_banks))
+    self.mkfield('WE', X.mkarray(X.BIT, num_banks))
+    self.mkfield('BE', X.mkarray(X.Bits(word_units), num_banks))
+    self.mkfield('ADDR', X.mkarray(X.Uint(pynu.address_bits(size)), num_banks))
+    self.mkfield('WDATA', X.mkarray(X.Bits(width), num_banks))
+    self.mkfield('GRANT', X.mkarray(X.BIT, num_banks))
+    self.mkfield('RVALID', X.mkarray(X.BIT, num_banks))
+    self.mkfield('RDATA', X.mkarray(X.Bits(width), num_banks))
+
+
+class BankedRam(X.Entity):
+
+  # Word addresses are interleaved among the banks (the low address bits select
+  # the bank), so that accesses to consecutive addresses land on different banks.
+  # Every bank is a separate single port, read first, memory, whose writes store a
+  # full word per cycle (with unit enables). With out_reg, the read data goes through
+  # an extra output register, which allows block RAMs to meet higher frequencies
+  # at the cost of one more cycle of read latency. The ram_style argument maps to
+  # the inference attribute of the same name (for example "block", "distributed"
+  # or "ultra" for Vivado, and "block" or "logic" for Yosys).
+  PORTS = f'*IFC:{__name__}.BankedRamIfc.PORT'
+  ARGS = dict(ram_style='block')
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root(self):
+    from pyxhdl import xlib as XL
+
+    bank_size = IFC.size // IFC.num_banks
+    word_type = IFC.WDATA.dtype.element_type()
+
+    self.banks = []
+    for b in range(IFC.num_banks):
+      XL.assign(f'mem{b}',
+                X.mkreg(X.mkarray(word_type, bank_size),
+                        attributes=XU.common_attributes(ram_style=ram_style)))
+      self.banks.append(XL.load(f'mem{b}'))
+
+    ben = X.mkreg(X.mkarray(X.BIT, IFC.num_banks))
+    bwe = X.mkreg(X.mkarray(X.BIT, IFC.num_banks))
+    bbe = X.mkreg(X.mkarray(IFC.BE.dtype.element_type(), IFC.num_banks))
+    baddr = X.mkreg(X.mkarray(X.Uint(pynu.address_bits(bank_size)), IFC.num_banks))
+    bwdata = X.mkreg(X.mkarray(word_type, IFC.num_banks))
+    brdata = X.mkreg(X.mkarray(word_type, IFC.num_banks))
+    if IFC.out_reg:
+      bout = X.mkreg(X.mkarray(word_type, IFC.num_banks))
+
+    # The bank each port read from, and the read valid flags, delayed by the read
+    # latency.
+    rbank = X.mkreg(X.mkarray(X.Uint(IFC.bank_bits), IFC.latency, IFC.num_banks))
+    rvalid = X.mkreg(X.mkarray(X.BIT, IFC.latency, IFC.num_banks))
+
+    for p in range(IFC.num_banks):
+      if IFC.out_reg:
+        IFC.RDATA[p] = bout[rbank[IFC.latency - 1, p]]
+      else:
+        IFC.RDATA[p] = brdata[rbank[IFC.latency - 1, p]]
+      IFC.RVALID[p] = rvalid[IFC.latency - 1, p]
+
+  @X.hdl_process(sens='IFC.EN, IFC.WE, IFC.BE, IFC.ADDR, IFC.WDATA')
+  def route(self):
+    for b in range(IFC.num_banks):
+      ben[b] = 0
+      bwe[b] = 0
+      bbe[b] = 0
+      baddr[b] = 0
+      bwdata[b] = 0
+
+    # Ports are scanned from the highest to the lowest, so that the lowest port
+    # targeting a bank is the one whose request sticks.
+    for p in reversed(range(IFC.num_banks)):
+      IFC.GRANT[p] = IFC.EN[p]
+      for q in range(p):
+        if IFC.EN[q] == 1 and IFC.ADDR[q][: IFC.bank_bits] == IFC.ADDR[p][: IFC.bank_bits]:
+          IFC.GRANT[p] = 0
+
+      for b in range(IFC.num_banks):
+        if IFC.EN[p] == 1 and IFC.ADDR[p][: IFC.bank_bits] == b:
+          ben[b] = 1
+          bwe[b] = IFC.WE[p]
+          bbe[b] = IFC.BE[p]
+          baddr[b] = IFC.ADDR[p][IFC.bank_bits: ]
+          bwdata[b] = IFC.WDATA[p]
+
+  @X.hdl_process(sens='+IFC.CLK')
+  def banks_run(self):
+    usize = IFC.unit_size
+
+    for b in range(IFC.num_banks):
+      if ben[b] == 1:
+        if bwe[b] == 1:
+          for u in range(IFC.word_units):
+            if bbe[b][u] == 1:
+              self.banks[b][baddr[b]][u * usize: (u + 1) * usize] = \
+                bwdata[b][u * usize: (u + 1) * usize]
+
+        brdata[b] = self.banks[b][baddr[b]]
+
+      if IFC.out_reg:
+        bout[b] = brdata[b]
+
+  @X.hdl_process(sens='+IFC.CLK')
+  def run(self):
+    if IFC.RST_N != 1:
+      rvalid = 0
+    else:
+      for p in range(IFC.num_banks):
+        rvalid[0, p] = IFC.GRANT[p] & ~IFC.WE[p]
+        rbank[0, p] = IFC.ADDR[p][: IFC.bank_bits]
+        for l in range(1, IFC.latency):
+          rvalid[l, p] = rvalid[l - 1, p]
+          rbank[l, p] = rbank[l - 1, p]
+
+
+class Test(X.Entity):
+
+  # Writes (and then reads back) num_beats beats of num_banks consecutive words,
+  # one per port and cycle, with the ports reading back rotated words, so that the
+  # crossbar is exercised. Partial writes and bank conflicts are tested as well.
+  ARGS = dict(clock_frequency=100e6,
+              num_beats=16,
+              width=32,
+              size=256,
+              num_banks=4,
+              unit_size=8,
+              out_reg=False) | BankedRam.ARGS
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root(self):
+    import py_misc_utils.utils as pyu
+
+    from . import clock
+
+    CLK = X.mkreg(X.BIT)
+
+    clock.Clock(CLK=CLK,
+                frequency=clock_frequency)
+
+    RST_N = X.mkreg(X.BIT)
+
+    self.ifc = BankedRamIfc(CLK, RST_N, width, size, num_banks,
+                            unit_size=unit_size,
+                            out_reg=out_reg)
+
+    BankedRam(IFC=self.ifc,
+              **pyu.mget(locals(), *BankedRam.ARGS.keys(), as_dict=True))
+
+  @X.hdl_process(kind=X.INIT_PROCESS)
+  def test_run(self):
+    from pyxhdl import xlib as XL
+    from pyxhdl import testbench as TB
+
+    def word(addr):
+      return (addr * 0x9e3779b1 + 0x7f4a7c15) % 2**width
+
+    full_be = 2**(width // unit_size) - 1
+
+    RST_N = 0
+    self.ifc.EN = 0
+    self.ifc.WE = 0
+    self.ifc.BE = 0
+    self.ifc.ADDR = 0
+    self.ifc.WDATA = 0
+
+    TB.wait_rising(CLK)
+    TB.wait_rising(CLK)
+
+    RST_N = 1
+
+    XL.wait_falling(CLK)
+
+    # Writes, one word per port and cycle.
+    for k in range(num_beats):
+      for p in range(num_banks):
+        addr = k * num_banks + p
+        self.ifc.EN[p] = 1
+        self.ifc.WE[p] = 1
+        self.ifc.BE[p] = full_be
+        self.ifc.ADDR[p] = addr
+        self.ifc.WDATA[p] = word(addr)
+
+      XL.wait_rising(CLK)
+      for p in range(num_banks):
+        TB.compare_value(self.ifc.GRANT[p], 1, msg=f' : write beat={k} port={p}')
+      XL.wait_falling(CLK)
+
+    # Partial write of the lowest unit of the first word.
+    self.ifc.EN = 0
+    self.ifc.EN[0] = 1
+    self.ifc.BE[0] = 1
+    self.ifc.ADDR[0] = 0
+    self.ifc.WDATA[0] = 2**width - 1
+
+    XL.wait_rising(CLK)
+    XL.wait_falling(CLK)
+
+    # Reads, with the results arriving after the read latency.
+    latency = 2 if out_reg else 1
+    self.ifc.WE = 0
+    for k in range(num_beats + latency - 1):
+      for p in range(num_banks):
+        self.ifc.EN[p] = 1 if k < num_beats else 0
+        self.ifc.ADDR[p] = (k % num_beats) * num_banks + (p + k) % num_banks
+
+      XL.wait_rising(CLK)
+      XL.wait_falling(CLK)
+
+      r = k - (latency - 1)
+      if r >= 0:
+        for p in range(num_banks):
+          addr = r * num_banks + (p + r) % num_banks
+          value = word(addr)
+          if addr == 0:
+            value |= 2**unit_size - 1
+
+          TB.compare_value(self.ifc.RVALID[p], 1, msg=f' : read beat={r} port={p}')
+          TB.compare_value(self.ifc.RDATA[p], value, msg=f' : read beat={r} port={p}')
+
+    # Ports 0 and 1 targeting the same bank, only the first one is granted.
+    self.ifc.EN = 0
+    self.ifc.EN[0] = 1
+    self.ifc.EN[1] = 1
+    self.ifc.ADDR[0] = num_banks
+    self.ifc.ADDR[1] = 2 * num_banks
+
+    XL.wait_rising(CLK)
+
+    TB.compare_value(self.ifc.GRANT[0], 1, msg=f' : conflict port=0')
+    TB.compare_value(self.ifc.GRANT[1], 0, msg=f' : conflict port=1')
+
+    XL.wait_falling(CLK)
+    self.ifc.EN = 0
+
+    XL.finish()
+
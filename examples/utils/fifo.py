@@ -1,14 +1,23 @@
+import py_misc_utils.alog as alog
 import py_misc_utils.core_utils as pycu
 import py_misc_utils.num_utils as pynu
+import py_misc_utils.utils as pyu
 
 import pyxhdl as X
 
 
 class FifoIfc(X.Interface):
 
-  PORT = 'WCLK, WRST_N, RCLK, RRST_N, WUP, RUP, WDATA, =RDATA, =WFULL, =REMPTY'
+  # Besides the WFULL and REMPTY flags, WAFULL is high (within the write clock
+  # domain) when the FIFO holds at least almost_full entries, and RAEMPTY is high
+  # (within the read clock domain) when the FIFO holds at most almost_empty entries.
+  # They default to one free slot left, and one entry left, respectively.
+  PORT = 'WCLK, WRST_N, RCLK, RRST_N, WUP, RUP, WDATA, =RDATA, =WFULL, =REMPTY, ' \
+    '=WAFULL, =RAEMPTY'
 
-  def __init__(self, wclk, rclk, wrst_n, rrst_n, width, size):
+  def __init__(self, wclk, rclk, wrst_n, rrst_n, width, size,
+               almost_full=None,
+               almost_empty=None):
     addr_size = pynu.address_bits(size)
     fsize = 2**addr_size
     if fsize != size:
@@ -17,7 +26,9 @@ class FifoIfc(X.Interface):
     super().__init__('FIFO',
                      width=width,
                      size=fsize,
-                     addr_size=addr_size)
+                     addr_size=addr_size,
+                     almost_full=pyu.value_or(almost_full, fsize - 1),
+                     almost_empty=pyu.value_or(almost_empty, 1))
     self.mkfield('WCLK', wclk)
     self.mkfield('WRST_N', wrst_n)
     self.mkfield('RCLK', rclk)
@@ -28,11 +39,30 @@ class FifoIfc(X.Interface):
     self.mkfield('RDATA', X.Bits(width))
     self.mkfield('WFULL', X.BIT)
     self.mkfield('REMPTY', X.BIT)
+    self.mkfield('WAFULL', X.BIT)
+    self.mkfield('RAEMPTY', X.BIT)
+
+
+@X.hdl
+def _gray_to_bin(gray, name):
+  nbits = gray.dtype.nbits
+  result = X.mkwire(gray.dtype, name=name)
+  result[nbits - 1] = gray[nbits - 1]
+  for i in reversed(range(nbits - 1)):
+    result[i] = result[i + 1] ^ gray[i]
+
+  return result
 
 
 class Fifo(X.Entity):
 
+  # Dual clock FIFO, with the gray coded pointers crossing clock domains through
+  # sync_stages deep synchronizers (use more stages for higher clock frequencies).
+  # With fwft (first word fall through) RDATA always shows the head of the FIFO
+  # (when not empty) and RUP pops it, otherwise RDATA is registered and loaded with
+  # the head of the FIFO at the RCLK edge seeing RUP (allowing block RAM inference).
   PORTS = f'*IFC:{__name__}.FifoIfc.PORT'
+  ARGS = dict(sync_stages=2, fwft=True)
 
   @X.hdl_process(kind=X.ROOT_PROCESS)
   def root(self):
@@ -43,29 +73,39 @@ class Fifo(X.Entity):
 
     rptr = X.mkreg(X.Uint(IFC.addr_size + 1))
     rbin = X.mkreg(X.Uint(IFC.addr_size + 1))
-    rptr_sync = X.mkreg(X.Uint(IFC.addr_size + 1))
+    rptr_pipe = X.mkreg(X.mkarray(X.Uint(IFC.addr_size + 1), sync_stages))
+    rptr_sync = X.mkwire(X.Uint(IFC.addr_size + 1))
     rbin_next = X.mkwire(X.Uint(IFC.addr_size + 1))
     rgray_next = X.mkwire(X.Uint(IFC.addr_size + 1))
     rempty_next = X.mkwire(X.BIT)
+    rlevel_next = X.mkwire(X.Uint(IFC.addr_size + 1))
 
     wptr = X.mkreg(X.Uint(IFC.addr_size + 1))
     wbin = X.mkreg(X.Uint(IFC.addr_size + 1))
-    wptr_sync = X.mkreg(X.Uint(IFC.addr_size + 1))
+    wptr_pipe = X.mkreg(X.mkarray(X.Uint(IFC.addr_size + 1), sync_stages))
+    wptr_sync = X.mkwire(X.Uint(IFC.addr_size + 1))
     wbin_next = X.mkwire(X.Uint(IFC.addr_size + 1))
     wgray_next = X.mkwire(X.Uint(IFC.addr_size + 1))
     wfull_next = X.mkwire(X.BIT)
+    wlevel_next = X.mkwire(X.Uint(IFC.addr_size + 1))
+
+    rptr_sync = rptr_pipe[sync_stages - 1]
+    wptr_sync = wptr_pipe[sync_stages - 1]
 
     rbin_next = rbin + (IFC.RUP & ~IFC.REMPTY)
     rgray_next = (rbin_next >> 1) ^ rbin_next
     rempty_next = (rgray_next == wptr_sync)
+    rlevel_next = _gray_to_bin(wptr_sync, 'wbin_sync') - rbin_next
     raddr = rbin[: -1]
 
     wbin_next = wbin + (IFC.WUP & ~IFC.WFULL)
     wgray_next = (wbin_next >> 1) ^ wbin_next
     wfull_next = (wgray_next == (~rptr_sync[-2: ] @ rptr_sync[: -2]))
+    wlevel_next = wbin_next - _gray_to_bin(rptr_sync, 'rbin_sync')
     waddr = wbin[: -1]
 
-    IFC.RDATA = mem[raddr]
+    if fwft:
+      IFC.RDATA = mem[raddr]
 
   @X.hdl_process(sens='+IFC.WCLK')
   def mem_write(self):
@@ -74,55 +114,129 @@ class Fifo(X.Entity):
 
   @X.hdl_process(sens='+IFC.RCLK')
   def rptr_update(self):
-    wptr_s1 = X.mkreg(X.Uint(IFC.addr_size + 1))
-
     if IFC.RRST_N != 1:
-      rbin, rptr, wptr_sync, wptr_s1 = 0, 0, 0, 0
+      rbin, rptr = 0, 0
+      wptr_pipe = 0
       IFC.REMPTY = 1
+      IFC.RAEMPTY = 1
     else:
       rbin, rptr = rbin_next, rgray_next
-      wptr_sync, wptr_s1 = wptr_s1, wptr
+      wptr_pipe[0] = wptr
+      for i in range(1, sync_stages):
+        wptr_pipe[i] = wptr_pipe[i - 1]
       IFC.REMPTY = rempty_next
+      IFC.RAEMPTY = rlevel_next <= IFC.almost_empty
+
+      if not fwft:
+        if IFC.RUP == 1 and IFC.REMPTY == 0:
+          IFC.RDATA = mem[raddr]
 
   @X.hdl_process(sens='+IFC.WCLK')
   def wptr_update(self):
-    rptr_s1 = X.mkreg(X.Uint(IFC.addr_size + 1))
-
     if IFC.WRST_N != 1:
-      wbin, wptr, rptr_sync, rptr_s1 = 0, 0, 0, 0
+      wbin, wptr = 0, 0
+      rptr_pipe = 0
       IFC.WFULL = 0
+      IFC.WAFULL = 0
     else:
       wbin, wptr = wbin_next, wgray_next
-      rptr_sync, rptr_s1 = rptr_s1, rptr
+      rptr_pipe[0] = rptr
+      for i in range(1, sync_stages):
+        rptr_pipe[i] = rptr_pipe[i - 1]
       IFC.WFULL = wfull_next
+      IFC.WAFULL = wlevel_next >= IFC.almost_full
+
+
+class SyncFifo(X.Entity):
+
+  # Single clock FIFO, for when both sides run off the same clock (WCLK, with RCLK
+  # and RRST_N being ignored), which uses plain binary pointers and a registered
+  # fill level, with no gray coding nor synchronizers (the flags are updated at the
+  # same edge of the pushes and pops which change them). It is a drop-in replacement
+  # of the Fifo, with the same FifoIfc interface and fwft semantics.
+  PORTS = f'*IFC:{__name__}.FifoIfc.PORT'
+  ARGS = dict(fwft=True)
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root(self):
+    mem = X.mkreg(X.mkarray(IFC.RDATA.dtype, IFC.size))
+
+    rbin = X.mkreg(X.Uint(IFC.addr_size))
+    wbin = X.mkreg(X.Uint(IFC.addr_size))
+    level = X.mkreg(X.Uint(IFC.addr_size + 1))
+    level_next = X.mkwire(X.Uint(IFC.addr_size + 1))
+    rup = X.mkwire(X.BIT)
+    wup = X.mkwire(X.BIT)
+
+    rup = IFC.RUP & ~IFC.REMPTY
+    wup = IFC.WUP & ~IFC.WFULL
+    level_next = level + wup - rup
+
+    if fwft:
+      IFC.RDATA = mem[rbin]
+
+  @X.hdl_process(sens='+IFC.WCLK')
+  def run(self):
+    if IFC.WRST_N != 1:
+      rbin, wbin, level = 0, 0, 0
+      IFC.WFULL = 0
+      IFC.REMPTY = 1
+      IFC.WAFULL = 0
+      IFC.RAEMPTY = 1
+    else:
+      if wup == 1:
+        mem[wbin] = IFC.WDATA
+      if not fwft:
+        if rup == 1:
+          IFC.RDATA = mem[rbin]
+
+      rbin = rbin + rup
+      wbin = wbin + wup
+      level = level_next
+      IFC.WFULL = level_next == IFC.size
+      IFC.REMPTY = level_next == 0
+      IFC.WAFULL = level_next >= IFC.almost_full
+      IFC.RAEMPTY = level_next <= IFC.almost_empty
 
 
 class Test(X.Entity):
 
+  # With same_clock the SyncFifo is tested (with both sides running off the write
+  # clock), otherwise the dual clock Fifo.
   ARGS = dict(rclock_frequency=100e6,
               wclock_frequency=65e6,
               num_tests=25,
               width=8,
-              size=32)
+              size=32,
+              same_clock=False) | Fifo.ARGS
 
   @X.hdl_process(kind=X.ROOT_PROCESS)
   def root(self):
     from . import clock
 
     WCLK = X.mkreg(X.BIT)
-    RCLK = X.mkreg(X.BIT)
 
-    clock.Clock(CLK=RCLK,
-                frequency=rclock_frequency)
     clock.Clock(CLK=WCLK,
                 frequency=wclock_frequency)
 
-    RRST_N = X.mkreg(X.BIT)
     WRST_N = X.mkreg(X.BIT)
 
-    self.ifc = FifoIfc(WCLK, RCLK, WRST_N, RRST_N, width, size)
+    if same_clock:
+      self.ifc = FifoIfc(WCLK, WCLK, WRST_N, WRST_N, width, size)
+
+      SyncFifo(IFC=self.ifc, fwft=fwft)
+    else:
+      RCLK = X.mkreg(X.BIT)
+
+      clock.Clock(CLK=RCLK,
+                  frequency=rclock_frequency)
+
+      RRST_N = X.mkreg(X.BIT)
 
-    Fifo(IFC=self.ifc)
+      self.ifc = FifoIfc(WCLK, RCLK, WRST_N, RRST_N, width, size)
+
+      Fifo(IFC=self.ifc,
+           **pyu.mget(locals(), *Fifo.ARGS.keys(), as_dict=True))
 
   @X.hdl_process(kind=X.INIT_PROCESS)
   def test_run(self):
@@ -131,20 +245,31 @@ class Test(X.Entity):
     from pyxhdl import xlib as XL
     from pyxhdl import testbench as TB
 
-    WRST_N = 0
-    RRST_N = 0
+    def pop(value, **kwargs):
+      if fwft:
+        TB.compare_value(self.ifc.RDATA, value, **kwargs)
+
+      self.ifc.RUP = 1
+      TB.wait_rising(self.ifc.RCLK)
+
+      self.ifc.RUP = 0
+      if not fwft:
+        TB.compare_value(self.ifc.RDATA, value, **kwargs)
+
+    self.ifc.WRST_N = 0
+    self.ifc.RRST_N = 0
 
     self.ifc.WUP = 0
     self.ifc.RUP = 0
     self.ifc.WDATA = 0
 
-    TB.wait_rising(RCLK)
+    TB.wait_rising(self.ifc.RCLK)
     TB.wait_rising(WCLK)
 
-    WRST_N = 1
-    RRST_N = 1
+    self.ifc.WRST_N = 1
+    self.ifc.RRST_N = 1
 
-    TB.wait_rising(RCLK)
+    TB.wait_rising(self.ifc.RCLK)
     TB.wait_rising(WCLK)
 
     for i in range(num_tests):
@@ -156,16 +281,13 @@ class Test(X.Entity):
 
       self.ifc.WUP = 0
       self.ifc.WDATA = ~value
-      TB.wait_rising(WCLK)
-      TB.wait_rising(RCLK)
+      for s in range(sync_stages):
+        TB.wait_rising(WCLK)
+        TB.wait_rising(self.ifc.RCLK)
 
-      TB.compare_value(self.ifc.RDATA, value, msg=f' : testno={i}')
+      pop(value, msg=f' : testno={i}')
 
-      self.ifc.RUP = 1
-      TB.wait_rising(RCLK)
-
-      self.ifc.RUP = 0
-      TB.wait_rising(RCLK)
+      TB.wait_rising(self.ifc.RCLK)
       TB.wait_rising(WCLK)
 
     TB.wait_rising(WCLK)
@@ -179,6 +301,7 @@ class Test(X.Entity):
     TB.wait_rising(WCLK)
 
     TB.compare_value(self.ifc.WFULL, 0)
+    TB.compare_value(self.ifc.WAFULL, 1)
 
     self.ifc.WUP = 1
     self.ifc.WDATA = size - 1
@@ -189,17 +312,19 @@ class Test(X.Entity):
 
     TB.compare_value(self.ifc.WFULL, 1)
 
-    TB.wait_rising(RCLK)
-    self.ifc.RUP = 1
+    TB.wait_rising(self.ifc.RCLK)
+    TB.compare_value(self.ifc.RAEMPTY, 0)
 
     for i in range(size):
-      TB.compare_value(self.ifc.RDATA, i)
-      TB.wait_rising(RCLK)
+      pop(i)
 
-    self.ifc.RUP = 0
-    TB.wait_rising(RCLK)
+    for s in range(sync_stages):
+      TB.wait_rising(self.ifc.RCLK)
+      TB.wait_rising(WCLK)
 
     TB.compare_value(self.ifc.REMPTY, 1)
+    TB.compare_value(self.ifc.RAEMPTY, 1)
+    TB.compare_value(self.ifc.WAFULL, 0)
 
     XL.finish()
 
@@ -1,5 +1,6 @@
 import pyxhdl as X
 from pyxhdl import xlib as XL
+from pyxhdl import xutils as XU
 
 
 class FirstBitSet(X.Entity):
@@ -8,33 +9,11 @@ class FirstBitSet(X.Entity):
 
   @X.hdl_process(sens='DATA')
   def run():
-    nbits = max(DATA.dtype.nbits // 8, 4)
-    nparts = (DATA.dtype.nbits + nbits - 1) // nbits
+    # The trailing zeros count (a log2(N) deep tree, instead of a priority chain)
+    # is the index of the first bit set, or the DATA width when no bit is set.
+    count = XU.tzc(DATA)
 
-    found = X.mkwire(X.Bits(nparts))
-    indices = X.mkwire(X.mkarray(BITIDX.dtype, nparts))
-
-    found = 0
-    indices = -1
-    BITIDX = -1
-
-    for i in range(nparts):
-      part_size = min(nbits, DATA.dtype.nbits - i * nbits)
-      mask = ((1 << part_size) - 1) << (i * nbits)
-
-      if (DATA & mask) != 0:
-        with XL.loop_mode_hdl():
-          for j in range(part_size):
-            if DATA[i * nbits + j] == 1:
-              indices[i] = i * nbits + j
-              found[i] = 1
-              break
-
-    with XL.loop_mode_hdl():
-      for i in range(nparts):
-        if found[i] == 1:
-          BITIDX = indices[i]
-          break
+    BITIDX = XL.cast(count, BITIDX.dtype) if count != DATA.dtype.nbits else -1
 
 
 class Test(X.Entity):
@@ -73,5 +52,11 @@ class Test(X.Entity):
 
       TB.compare_value(BITIDX, nbit, msg=f' : data={data:b}')
 
+    DATA = 0
+
+    XL.wait_for(1e-9)
+
+    TB.compare_value(BITIDX, -1, msg=f' : data=0')
+
     XL.finish()
 
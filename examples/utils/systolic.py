@@ -0,0 +1,299 @@
+import numpy as np
+
+import pyxhdl as X
+from pyxhdl import xlib as XL
+
+
+class SystolicArray(X.Entity):
+
+  # Output stationary SIZE x SIZE array of multiply-accumulate processing elements
+  # (PE). Each beat feeds one column of A (AIN) and one row of B (BIN), and the
+  # (i, j) PE accumulates the A[i, k] * B[k, j] products. Operands only move
+  # between neighbouring PEs, A (together with the valid and last flags) from
+  # left to right, and B from top to bottom. The beat with the LIN flag set ends
+  # the accumulation, storing the results within RES (and restarting the PEs
+  # accumulators from zero). DONE pulses once all the PEs have stored them.
+  PORTS = 'CLK, RST_N, AIN, BIN, VIN, LIN, =RES, =DONE'
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root():
+    size = AIN.dtype.array_shape[0]
+
+    # The row (and column) "i" input is delayed by "i" clock cycles, so that
+    # the operands of each beat reach the (i, j) PE after i + j + 1 cycles.
+    askew = X.mkreg(X.mkarray(AIN.dtype.element_type(), size, size))
+    vskew = X.mkreg(X.mkarray(X.BIT, size, size))
+    lskew = X.mkreg(X.mkarray(X.BIT, size, size))
+    bskew = X.mkreg(X.mkarray(BIN.dtype.element_type(), size, size))
+
+    # The (i, j) PE operands and flags.
+    apipe = X.mkreg(X.mkarray(AIN.dtype.element_type(), size, size))
+    vpipe = X.mkreg(X.mkarray(X.BIT, size, size))
+    lpipe = X.mkreg(X.mkarray(X.BIT, size, size))
+    bpipe = X.mkreg(X.mkarray(BIN.dtype.element_type(), size, size))
+
+    acc = X.mkreg(RES.dtype)
+
+  @X.hdl_process(sens='+CLK')
+  def run():
+    size = AIN.dtype.array_shape[0]
+    acc_type = RES.dtype.element_type()
+
+    if RST_N != 1:
+      vskew = 0
+      lskew = 0
+      vpipe = 0
+      lpipe = 0
+      acc = 0
+      DONE = 0
+    else:
+      for i in range(size):
+        if i == 0:
+          apipe[0, 0] = AIN[0]
+          vpipe[0, 0] = VIN
+          lpipe[0, 0] = LIN
+          bpipe[0, 0] = BIN[0]
+        else:
+          askew[i, 0] = AIN[i]
+          vskew[i, 0] = VIN
+          lskew[i, 0] = LIN
+          bskew[i, 0] = BIN[i]
+          for d in range(1, i):
+            askew[i, d] = askew[i, d - 1]
+            vskew[i, d] = vskew[i, d - 1]
+            lskew[i, d] = lskew[i, d - 1]
+            bskew[i, d] = bskew[i, d - 1]
+
+          apipe[i, 0] = askew[i, i - 1]
+          vpipe[i, 0] = vskew[i, i - 1]
+          lpipe[i, 0] = lskew[i, i - 1]
+          bpipe[0, i] = bskew[i, i - 1]
+
+      for i in range(size):
+        for j in range(size):
+          if j + 1 < size:
+            apipe[i, j + 1] = apipe[i, j]
+            vpipe[i, j + 1] = vpipe[i, j]
+            lpipe[i, j + 1] = lpipe[i, j]
+          if i + 1 < size:
+            bpipe[i + 1, j] = bpipe[i, j]
+
+          prod = XL.cast(apipe[i, j], acc_type) * XL.cast(bpipe[i, j], acc_type)
+          if vpipe[i, j] == 1:
+            if lpipe[i, j] == 1:
+              RES[i, j] = acc[i, j] + prod
+              acc[i, j] = 0
+            else:
+              acc[i, j] += prod
+
+      DONE = vpipe[size - 1, size - 1] & lpipe[size - 1, size - 1]
+
+
+class SystolicMatMul(X.Entity):
+
+  # AXI-Stream front end of the SystolicArray. Every S_TDATA beat carries one
+  # column of A (elements [0, SIZE)) and one row of B (elements [SIZE, 2 * SIZE)),
+  # and S_TLAST marks the last beat of a matrix multiplication. The SIZE rows of
+  # the result are streamed out of M_TDATA, with M_TLAST marking the last one.
+  # Beats of the next multiplication are accepted while the results of the
+  # previous one are still draining, except for its last one, which has to wait
+  # for the previous results to be moved to the output buffer.
+  PORTS = 'CLK, RST_N, S_TDATA, S_TVALID, S_TLAST, =S_TREADY, ' \
+    '=M_TDATA, =M_TVALID, =M_TLAST, M_TREADY'
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root():
+    size = M_TDATA.dtype.array_shape[0]
+
+    acol = X.mkreg(X.mkarray(S_TDATA.dtype.element_type(), size))
+    brow = X.mkreg(X.mkarray(S_TDATA.dtype.element_type(), size))
+    vin = X.mkreg(X.BIT)
+    lin = X.mkreg(X.BIT)
+    res = X.mkreg(X.mkarray(M_TDATA.dtype.element_type(), size, size))
+    done = X.mkreg(X.BIT)
+
+    # A last beat entered the array, and its results have not been moved yet.
+    pending = X.mkreg(X.BIT)
+    ready = X.mkreg(X.BIT)
+    obuf = X.mkreg(X.mkarray(M_TDATA.dtype.element_type(), size, size))
+    orow = X.mkreg(X.Uint(max(size - 1, 1).bit_length()))
+
+    SystolicArray(CLK=CLK,
+                  RST_N=RST_N,
+                  AIN=acol,
+                  BIN=brow,
+                  VIN=vin,
+                  LIN=lin,
+                  RES=res,
+                  DONE=done)
+
+    S_TREADY = RST_N & ~(pending & S_TLAST)
+
+  @X.hdl_process(sens='+CLK')
+  def run():
+    size = M_TDATA.dtype.array_shape[0]
+
+    if RST_N != 1:
+      vin = 0
+      lin = 0
+      pending = 0
+      ready = 0
+      M_TVALID = 0
+      M_TLAST = 0
+    else:
+      if S_TVALID == 1 and S_TREADY == 1:
+        for n in range(size):
+          acol[n] = S_TDATA[n]
+          brow[n] = S_TDATA[size + n]
+        vin = 1
+        lin = S_TLAST
+        if S_TLAST == 1:
+          pending = 1
+      else:
+        vin = 0
+
+      if done == 1:
+        ready = 1
+
+      if ((done == 1 or ready == 1) and
+          (M_TVALID == 0 or (M_TREADY == 1 and M_TLAST == 1))):
+        obuf = res
+        for n in range(size):
+          M_TDATA[n] = res[0, n]
+        M_TVALID = 1
+        M_TLAST = 1 if size == 1 else 0
+        orow = 0
+        pending = 0
+        ready = 0
+      elif M_TVALID == 1 and M_TREADY == 1:
+        if M_TLAST == 1:
+          M_TVALID = 0
+          M_TLAST = 0
+        else:
+          for r in range(1, size - 1):
+            for n in range(size):
+              obuf[r, n] = obuf[r + 1, n]
+          for n in range(size):
+            M_TDATA[n] = obuf[1, n]
+          orow += 1
+          if orow == size - 2:
+            M_TLAST = 1
+
+
+def _gen_matrices(num_matrices, size, depth, width, seed):
+  rng = np.random.default_rng(seed)
+
+  matrices = []
+  for _ in range(num_matrices):
+    amat = rng.integers(0, 2**width, size=(size, depth))
+    bmat = rng.integers(0, 2**width, size=(depth, size))
+    matrices.append((amat, bmat, amat @ bmat))
+
+  return matrices
+
+
+class Test(X.Entity):
+
+  # Throughput benchmark, reporting the multiply-accumulate operations per clock
+  # cycle achieved by a SIZE x SIZE array, while streaming back to back
+  # multiplications of SIZE x DEPTH by DEPTH x SIZE matrices.
+  ARGS = dict(clock_frequency=100e6,
+              size=4,
+              depth=16,
+              num_matrices=4,
+              width=8,
+              seed=17)
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root(self):
+    from . import clock
+
+    CLK = X.mkreg(X.BIT)
+
+    clock.Clock(CLK=CLK,
+                frequency=clock_frequency)
+
+    RST_N = X.mkreg(X.BIT)
+
+    S_TDATA = X.mkreg(X.mkarray(X.Uint(width), 2 * size))
+    S_TVALID = X.mkreg(X.BIT)
+    S_TLAST = X.mkreg(X.BIT)
+    S_TREADY = X.mkwire(X.BIT)
+    M_TDATA = X.mkreg(X.mkarray(X.Uint(32), size))
+    M_TVALID = X.mkreg(X.BIT)
+    M_TLAST = X.mkreg(X.BIT)
+    M_TREADY = X.mkreg(X.BIT)
+
+    cycles = X.mkreg(X.Uint(32))
+
+    SystolicMatMul(CLK=CLK,
+                   RST_N=RST_N,
+                   S_TDATA=S_TDATA,
+                   S_TVALID=S_TVALID,
+                   S_TLAST=S_TLAST,
+                   S_TREADY=S_TREADY,
+                   M_TDATA=M_TDATA,
+                   M_TVALID=M_TVALID,
+                   M_TLAST=M_TLAST,
+                   M_TREADY=M_TREADY)
+
+    self.matrices = _gen_matrices(num_matrices, size, depth, width, seed)
+
+  @X.hdl_process(sens='+CLK')
+  def counter():
+    if RST_N != 1:
+      cycles = 0
+    else:
+      cycles += 1
+
+  @X.hdl_process(kind=X.INIT_PROCESS)
+  def feed(self):
+    from pyxhdl import testbench as TB
+
+    RST_N = 0
+    S_TVALID = 0
+    S_TLAST = 0
+
+    TB.wait_rising(CLK)
+    TB.wait_rising(CLK)
+
+    RST_N = 1
+
+    for amat, bmat, cmat in self.matrices:
+      for k in range(depth):
+        for n in range(size):
+          S_TDATA[n] = int(amat[n, k])
+          S_TDATA[size + n] = int(bmat[k, n])
+        S_TVALID = 1
+        S_TLAST = 1 if k == depth - 1 else 0
+
+        # Sample the handshake at the clock edge, like the SystolicMatMul does.
+        XL.wait_rising(CLK)
+        if S_TREADY != 1:
+          XL.wait_until(S_TREADY == 1)
+          XL.wait_rising(CLK)
+        XL.wait_falling(CLK)
+
+    S_TVALID = 0
+
+  @X.hdl_process(kind=X.INIT_PROCESS)
+  def drain(self):
+    from pyxhdl import testbench as TB
+
+    M_TREADY = 1
+
+    for m, (amat, bmat, cmat) in enumerate(self.matrices):
+      for r in range(size):
+        XL.wait_rising(CLK)
+        if M_TVALID != 1:
+          XL.wait_until(M_TVALID == 1)
+          XL.wait_rising(CLK)
+
+        TB.compare_value(M_TDATA, cmat[r], msg=f' : matrix={m} row={r}')
+
+    macs = num_matrices * size * size * depth
+
+    XL.report(f'Systolic {size}x{size} array: MACs={macs} cycles={{XL.cast(cycles, X.INT)}} ' \
+              f'MACs/cycle={{macs / XL.cast(cycles, X.REAL)}}')
+
+    XL.finish()
@@ -1,7 +1,12 @@
+import py_misc_utils.assert_checks as tas
+import py_misc_utils.module_utils as pymu
+
 import pyxhdl as X
 from pyxhdl import xlib as XL
 from pyxhdl import xutils as XU
 
+fifo = pymu.rel_import_module('fifo', __file__)
+
 
 class UartIfc(X.Interface):
 
@@ -151,3 +156,206 @@ class UartRX(X.Entity):
         case _:
           pass
 
+
+
+class UartFifoIfc(X.Interface):
+
+  # Buffered UART interface, with words pushed into the TX FIFO (TX_WUP, taken
+  # when TX_FULL is low) and popped from the RX FIFO (RX_RUP, with RX_DATA showing
+  # the FIFO head while RX_EMPTY is low). Both the transmitter and the receiver run
+  # off a tick oversample times per bit.
+  PORT = 'CLK, RST_N, UIN, =UOUT, TX_WUP, TX_DATA, =TX_FULL, RX_RUP, =RX_DATA, =RX_EMPTY'
+
+  def __init__(self, clk, rst_n, uin, uout, *,
+               clk_freq=50000000,
+               baud_rate=115200,
+               word_size=8,
+               oversample=16,
+               fifo_size=16):
+    tas.check_ge(oversample, 4, msg=f'Oversampling ({oversample}) must be at least 4')
+    clks_per_tick = clk_freq // (baud_rate * oversample)
+    tas.check_ge(clks_per_tick, 1,
+                 msg=f'Clock frequency ({clk_freq}) too low for {oversample}x oversampling ' \
+                 f'at {baud_rate} baud')
+
+    super().__init__('UARTF',
+                     clk_freq=clk_freq,
+                     baud_rate=baud_rate,
+                     word_size=word_size,
+                     oversample=oversample,
+                     fifo_size=fifo_size,
+                     clks_per_tick=clks_per_tick,
+                     clks_per_bit=clks_per_tick * oversample,
+                     sample_tick=oversample // 2)
+    self.mkfield('CLK', clk)
+    self.mkfield('RST_N', rst_n)
+    self.mkfield('UIN', uin)
+    self.mkfield('UOUT', uout)
+    self.mkfield('TX_WUP', X.BIT)
+    self.mkfield('TX_DATA', X.Bits(word_size))
+    self.mkfield('TX_FULL', X.BIT)
+    self.mkfield('RX_RUP', X.BIT)
+    self.mkfield('RX_DATA', X.Bits(word_size))
+    self.mkfield('RX_EMPTY', X.BIT)
+
+
+class BufferedUart(X.Entity):
+
+  # UART with TX and RX FIFOs, which keeps the line busy with back to back frames
+  # (start bit, word_size data bits LSB first, one stop bit) as long as the TX FIFO
+  # is not empty, and which receives back to back frames, by looking for the next
+  # start bit right after the middle of the stop bit. Received bits are the
+  # majority of the last three samples at the bit center, and frames with a bad stop
+  # bit (or a start bit shorter than half bit) are dropped, as well as the ones
+  # finding the RX FIFO full.
+  PORTS = f'*IFC:{__name__}.UartFifoIfc.PORT'
+
+  RX_IDLE = 0
+  RX_READY = 1
+  RX_START = 2
+  RX_DATA = 3
+  RX_STOP = 4
+
+  @X.hdl_process(kind=X.ROOT_PROCESS)
+  def root(self):
+    self.tx_fifo = fifo.FifoIfc(IFC.CLK, IFC.CLK, IFC.RST_N, IFC.RST_N,
+                                IFC.word_size, IFC.fifo_size)
+    self.rx_fifo = fifo.FifoIfc(IFC.CLK, IFC.CLK, IFC.RST_N, IFC.RST_N,
+                                IFC.word_size, IFC.fifo_size)
+
+    fifo.SyncFifo(IFC=self.tx_fifo)
+    fifo.SyncFifo(IFC=self.rx_fifo)
+
+    tick = X.mkreg(X.BIT)
+    tick_count = X.mkreg(X.Uint(max(IFC.clks_per_tick - 1, 1).bit_length()))
+
+    tx_ticks = X.mkreg(X.Uint((IFC.oversample - 1).bit_length()))
+    tx_bits = X.mkreg(X.Uint((IFC.word_size + 1).bit_length()))
+    tx_frame = X.mkreg(X.Bits(IFC.word_size + 1))
+
+    rx_state = X.mkreg(X.UINT8)
+    rx_ticks = X.mkreg(X.Uint((IFC.oversample - 1).bit_length()))
+    rx_bits = X.mkreg(X.Uint((IFC.word_size - 1).bit_length()))
+    rx_word = X.mkreg(X.Bits(IFC.word_size))
+    uin_sync = X.mkreg(X.Bits(2))
+    rx_hist = X.mkreg(X.Bits(2))
+    rx_sample = X.mkwire(X.BIT)
+
+    rx_sample = (uin_sync[1] & rx_hist[0]) | (uin_sync[1] & rx_hist[1]) | \
+      (rx_hist[0] & rx_hist[1])
+
+    self.tx_fifo.WUP = IFC.TX_WUP
+    self.tx_fifo.WDATA = IFC.TX_DATA
+    IFC.TX_FULL = self.tx_fifo.WFULL
+
+    self.rx_fifo.RUP = IFC.RX_RUP
+    IFC.RX_DATA = self.rx_fifo.RDATA
+    IFC.RX_EMPTY = self.rx_fifo.REMPTY
+
+  @X.hdl_process(sens='+IFC.CLK')
+  def ticker(self):
+    if IFC.RST_N != 1:
+      tick_count = 0
+      tick = 0
+    elif tick_count == IFC.clks_per_tick - 1:
+      tick_count = 0
+      tick = 1
+    else:
+      tick_count += 1
+      tick = 0
+
+  @X.hdl_process(sens='+IFC.CLK')
+  def tx_run(self):
+    if IFC.RST_N != 1:
+      IFC.UOUT = 1
+      self.tx_fifo.RUP = 0
+      tx_ticks = 0
+      tx_bits = 0
+    else:
+      self.tx_fifo.RUP = 0
+
+      if tick == 1:
+        if tx_ticks != IFC.oversample - 1:
+          tx_ticks += 1
+        else:
+          tx_ticks = 0
+
+          # Bit boundary. Either shift out the next data (or stop) bit, or start
+          # a new frame right away if the TX FIFO has data.
+          if tx_bits != 0:
+            IFC.UOUT = tx_frame[0]
+            tx_frame = tx_frame >> 1
+            tx_bits -= 1
+          elif self.tx_fifo.REMPTY == 0:
+            IFC.UOUT = 0
+            tx_frame[: IFC.word_size] = self.tx_fifo.RDATA
+            tx_frame[IFC.word_size] = 1
+            tx_bits = IFC.word_size + 1
+            self.tx_fifo.RUP = 1
+          else:
+            IFC.UOUT = 1
+
+  @X.hdl_process(sens='+IFC.CLK')
+  def rx_run(self):
+    if IFC.RST_N != 1:
+      rx_state = self.RX_IDLE
+      rx_ticks = 0
+      rx_bits = 0
+      uin_sync = 0b11
+      rx_hist = 0b11
+      self.rx_fifo.WUP = 0
+    else:
+      uin_sync[0] = IFC.UIN
+      uin_sync[1] = uin_sync[0]
+      self.rx_fifo.WUP = 0
+
+      if tick == 1:
+        rx_hist[0] = uin_sync[1]
+        rx_hist[1] = rx_hist[0]
+
+        match rx_state:
+          case self.RX_IDLE:
+            if uin_sync[1] == 1:
+              rx_state = self.RX_READY
+
+          case self.RX_READY:
+            if uin_sync[1] == 0:
+              rx_ticks = 0
+              rx_state = self.RX_START
+
+          case self.RX_START:
+            if rx_ticks == IFC.sample_tick:
+              rx_ticks = 0
+              rx_bits = 0
+              if rx_sample == 0:
+                rx_state = self.RX_DATA
+              else:
+                rx_state = self.RX_IDLE
+            else:
+              rx_ticks += 1
+
+          case self.RX_DATA:
+            if rx_ticks == IFC.oversample - 1:
+              rx_ticks = 0
+              rx_word[rx_bits] = rx_sample
+              if rx_bits == IFC.word_size - 1:
+                rx_state = self.RX_STOP
+              else:
+                rx_bits += 1
+            else:
+              rx_ticks += 1
+
+          case self.RX_STOP:
+            if rx_ticks == IFC.oversample - 1:
+              rx_ticks = 0
+              if rx_sample == 1:
+                self.rx_fifo.WDATA = rx_word
+                self.rx_fifo.WUP = 1
+                rx_state = self.RX_READY
+              else:
+                rx_state = self.RX_IDLE
+            else:
+              rx_ticks += 1
+
+          case _:
+            pass
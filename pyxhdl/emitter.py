@@ -1,8 +1,10 @@
+import ast
 import collections
 import contextlib
 import enum
 import functools
 import inspect
+import itertools
 import os
 import re
 import sys
@@ -19,6 +21,7 @@ import py_misc_utils.template_replace as pytr
 import py_misc_utils.utils as pyu
 
 from .common_defs import *
+from .entity import *
 from .extern_logic import *
 from .instantiator import *
 from .types import *
@@ -85,6 +88,30 @@ _CTYPES_ALLOWED = {
   str: 3,
 }
 
+_FOLD_TYPES = (Uint, Sint, Bits, Integer)
+
+_FOLD_ARITH_OPS = {
+  ast.Add: lambda a, b: a + b,
+  ast.Sub: lambda a, b: a - b,
+  ast.Mult: lambda a, b: a * b,
+  ast.BitAnd: lambda a, b: a & b,
+  ast.BitOr: lambda a, b: a | b,
+  ast.BitXor: lambda a, b: a ^ b,
+}
+
+_FOLD_COMPARE_OPS = {
+  ast.Eq: lambda a, b: a == b,
+  ast.NotEq: lambda a, b: a != b,
+  ast.Lt: lambda a, b: a < b,
+  ast.LtE: lambda a, b: a <= b,
+  ast.Gt: lambda a, b: a > b,
+  ast.GtE: lambda a, b: a >= b,
+}
+
+# Maps (id(type_prec), id(ctype_allowed), argument types) to the promoted type
+# and the per-argument cast plan computed by Emitter._gen_marshal().
+_PROMOTION_CACHE = dict()
+
 _FLOAT_SPECS = {
   16: FSpec(5, 10),
   32: FSpec(8, 23),
@@ -113,6 +140,67 @@ class _Placement:
     return count
 
 
+_IDENT_RX = re.compile(r'[A-Za-z_]\w*')
+_CALL_RX = re.compile(r'([A-Za-z_][\w.:]*)\s*\(')
+
+def _fold_normalize(value, dtype):
+  # Returns the value the HDL type would hold, or None if the value does not fit
+  # it. Folding overflowing operations is avoided, as VHDL and Verilog differ in
+  # how expression widths are determined.
+  if isinstance(dtype, (Uint, Bits)):
+    return value if 0 <= value < 2**dtype.nbits else None
+  if isinstance(dtype, Sint):
+    hbit = 2**(dtype.nbits - 1)
+
+    return value if -hbit <= value < hbit else None
+  if isinstance(dtype, Integer):
+    return value if -2**31 <= value < 2**31 else None
+  if isinstance(dtype, Bool):
+    return bool(value)
+
+
+def _fold_unsigned(value, nbits):
+  return value & (2**nbits - 1)
+
+
+class _CseEntry:
+
+  def __init__(self, names, temp=None):
+    self.names = names
+    self.temp = temp
+
+
+class _CseScope(dict):
+
+  def __init__(self, barrier=False):
+    super().__init__()
+    self.barrier = barrier
+
+
+class _DceLine(str):
+  # A code line declaring, or assigning as a whole, the variable "name", which the
+  # dead code elimination can drop (replacing it with "keep", if not None).
+
+  def __new__(cls, line, name, decl, keep=None):
+    self = super().__new__(cls, line)
+    self.name = name
+    self.decl = decl
+    self.keep = keep
+
+    return self
+
+
+class _DceBlock(str):
+  # A control flow line opening (+1), continuing (0) or closing (-1) a block, which
+  # the dead code elimination drops when all the blocks of the chain end up empty.
+
+  def __new__(cls, line, kind):
+    self = super().__new__(cls, line)
+    self.kind = kind
+
+    return self
+
+
 class Emitter:
 
   _BACKEND_REGISTRY = dict()
@@ -131,6 +219,11 @@ class Emitter:
     self._user_modules = collections.defaultdict(dict)
     self._extern_modules = dict()
     self._contexts = []
+    self._cast_cache = LRUCache(self._cfg.get('cast_cache_size', 4096))
+    self._extern_calls = 0
+    self._call_names = set()
+    self._literals = dict()
+    self._dce = self._cfg.get('dce', False)
     self._module_reset()
 
   @classmethod
@@ -221,6 +314,7 @@ class Emitter:
     return f'{modname}.{name}'
 
   def _call_external_module(self, xmod, fnname, dtype, *args, **kwargs):
+    self._extern_calls += 1
     xlogic = xmod.get_logic(fnname)
 
     if xlogic.nargs != len(args):
@@ -286,6 +380,7 @@ class Emitter:
       iid = self._itor.getid(xlogic.modname, mod_args)
 
       mcall = self._module_arg(iid, xlogic.funcname)
+      self._call_names.add(mcall)
 
       return f'{mcall}(' + ', '.join(self.svalue(arg) for arg in args) + ')'
     else:
@@ -410,12 +505,29 @@ class Emitter:
     else:
       placement.append(obj)
 
-  def _emit_line(self, line):
+  def _has_calls(self, line):
+    # Function and external module calls might have side effects, so the lines
+    # containing them are never dropped.
+    return any(name in self._call_names for name in _CALL_RX.findall(line))
+
+  def _emit_line(self, line, dce_name=None, dce_decl=False, dce_keep=None,
+                 dce_block=None):
     spaces = ' ' * (self._indent_spaces * self._indent)
+    if self._dce and not self._has_calls(line):
+      if dce_name is not None:
+        keep = spaces + dce_keep if dce_keep is not None else None
+        line = _DceLine(spaces + line, dce_name, dce_decl, keep=keep)
+      elif dce_block is not None:
+        line = _DceBlock(spaces + line, dce_block)
+      else:
+        line = spaces + line
+    else:
+      line = spaces + line
+
     if not self._placements:
-      self._emit(spaces + line)
+      self._emit(line)
     else:
-      self._emit(spaces + line, placement=self._placements[-1])
+      self._emit(line, placement=self._placements[-1])
 
   def _emit_lines(self, lines, sep=''):
     if not hasattr(lines, '__len__'):
@@ -453,15 +565,414 @@ class Emitter:
       self._proc = _ProcessInfo(args=dict())
       self._process_reset()
 
+  def is_clocked_process(self):
+    sens = self._proc.sens or dict()
+
+    return any(s.trigger in (POSEDGE, NEGEDGE) for s in sens.values())
+
   def _process_reset(self):
-    pass
+    # Cast results are only valid within a process, as variable names can be
+    # remapped across processes.
+    self._cast_cache.clear()
+    self._cse_scopes = [_CseScope()]
+    self._cse_hoist = True
+
+  def _cast_key(self, value, dtype):
+    if isinstance(value, Value):
+      return (Value, self.svalue(value), value.dtype, dtype)
+    if type(value) is float:
+      # The repr() keeps -0.0 and 0.0 (which compare equal) apart.
+      return (float, repr(value), dtype)
+    if type(value) in (bool, int, str):
+      return (type(value), value, dtype)
+
+  def _cached_cast(self, value, dtype):
+    key = self._cast_key(value, dtype)
+    if key is None:
+      return self._do_cast(value, dtype)
+
+    xvalue = self._cast_cache.get(key)
+    if xvalue is None:
+      # Casts going through external modules instantiate entities, so their
+      # results cannot be reused.
+      extern_calls = self._extern_calls
+      xvalue = self._do_cast(value, dtype)
+      if extern_calls == self._extern_calls:
+        self._cast_cache.put(key, xvalue)
+
+    return xvalue
+
+  def cast_cache_info(self):
+    return self._cast_cache.info()
+
+  def _cse_threshold(self):
+    # Simulation processes re-evaluate expressions within wait statements, which
+    # would be broken by replacing them with temporaries.
+    if self._proc.kind == INIT_PROCESS:
+      return None
+
+    return self.get_context('cse_threshold', self._cfg.get('cse_threshold'))
+
+  def _cse_lookup(self, xvalue):
+    for scope in reversed(self._cse_scopes):
+      entry = scope.get(xvalue)
+      if entry is not None or scope.barrier:
+        return entry
+
+  def cse_value(self, value):
+    threshold = self._cse_threshold()
+    if (not threshold or not isinstance(value, Value) or
+        not isinstance(value.value, str) or len(value.value) < threshold or
+        value.dtype == VOID):
+      return value
+
+    xvalue = value.value
+    entry = self._cse_lookup(xvalue)
+    if entry is None:
+      names = frozenset(_IDENT_RX.findall(xvalue))
+      self._cse_scopes[-1][xvalue] = _CseEntry(names)
+    elif entry.temp is not None:
+      return entry.temp
+    elif self._cse_hoist:
+      # Lazy import to avoid cycles.
+      from . import xlib
+
+      # The second time an expression is seen, it is hoisted into a temporary.
+      # The temporary is only valid within the current scope, which might be
+      # nested within the one where the expression was first seen.
+      tname = xlib.generate_name('cse')
+      xlib.assign(tname, mkwire(value.dtype, name=tname))
+      xlib.assign(tname, value)
+      temp = xlib.load(tname)
+
+      self._cse_scopes[-1][xvalue] = _CseEntry(entry.names, temp=temp)
+
+      return temp
+
+    return value
+
+  def cse_invalidate(self, var):
+    if any(self._cse_scopes):
+      names = set(_IDENT_RX.findall(self.svalue(var)))
+      for scope in self._cse_scopes:
+        for xvalue in [x for x, e in scope.items() if not names.isdisjoint(e.names)]:
+          scope.pop(xvalue)
+
+  def cse_clear(self):
+    for scope in self._cse_scopes:
+      scope.clear()
+
+  @contextlib.contextmanager
+  def cse_scope(self, barrier=False):
+    depth = len(self._cse_scopes)
+    self._cse_scopes.append(_CseScope(barrier=barrier))
+    try:
+      yield self
+    finally:
+      del self._cse_scopes[depth:]
+
+  def const_fold_enabled(self):
+    return self.get_context('const_fold', self._cfg.get('const_fold', False))
+
+  def share_ops_enabled(self):
+    # Simulation processes might wait within branches, and root processes have no
+    # branches at all.
+    if self._proc.kind in (INIT_PROCESS, ROOT_PROCESS):
+      return False
+
+    return self.get_context('share_ops', self._cfg.get('share_ops', False))
+
+  def fp_latency(self):
+    # Backends which support pipelined floating point operations override this.
+    return 0
+
+  def literal_value(self, value):
+    if isinstance(value, Value) and isinstance(value.value, str):
+      return self._literals.get((value.dtype, value.value), NONE)
+
+    return NONE
+
+  def make_literal(self, dtype, pyvalue):
+    value = self.cast(pyvalue, dtype)
+    self._literals[(dtype, value.value)] = pyvalue
+
+    return value
+
+  def _fold_operands(self, args, dtype, const_fn):
+    # Folding is only performed when all the arguments are constants, and HDL
+    # ones have the same type class of the result, with no more bits. This
+    # ensures the result does not depend on HDL specific conversion rules.
+    cargs = []
+    for arg in args:
+      cvalue = const_fn(arg)
+      if cvalue is NONE or type(cvalue) is not int:
+        return
+      if isinstance(arg, Value):
+        if (type(arg.dtype) is not type(dtype) or arg.dtype.array_shape or
+            (dtype.nbits is not None and arg.dtype.nbits > dtype.nbits)):
+          return
+      elif _fold_normalize(cvalue, dtype) is None:
+        return
+
+      cargs.append(cvalue)
+
+    return cargs
+
+  def fold_BinOp(self, op, left, right, result, const_fn):
+    # The result is the already evaluated operation, which carries the type the
+    # folded value needs to have.
+    if const_fn(left) is NONE or const_fn(right) is NONE:
+      return
+
+    dtype = result.dtype
+    if not isinstance(dtype, _FOLD_TYPES) or dtype.array_shape:
+      return
+
+    if isinstance(op, ast.MatMult):
+      if not (isinstance(left, Value) and isinstance(right, Value)):
+        return
+      lvalue, rvalue = const_fn(left), const_fn(right)
+      if type(lvalue) is not int or type(rvalue) is not int:
+        return
+
+      rbits = right.dtype.nbits
+      value = ((_fold_unsigned(lvalue, left.dtype.nbits) << rbits) |
+               _fold_unsigned(rvalue, rbits))
+      if isinstance(dtype, Sint) and value >= 2**(dtype.nbits - 1):
+        value -= 2**dtype.nbits
+    elif isinstance(op, (ast.LShift, ast.RShift)):
+      lvalue, rvalue = const_fn(left), const_fn(right)
+      if (not isinstance(dtype, (Uint, Bits)) or type(lvalue) is not int or
+          type(rvalue) is not int or rvalue < 0):
+        return
+
+      value = lvalue << rvalue if isinstance(op, ast.LShift) else lvalue >> rvalue
+    else:
+      cargs = self._fold_operands((left, right), dtype, const_fn)
+      if cargs is None:
+        return
+
+      lvalue, rvalue = cargs
+      if isinstance(op, ast.Div):
+        if rvalue == 0:
+          return
+        value = abs(lvalue) // abs(rvalue)
+        if (lvalue < 0) != (rvalue < 0):
+          value = -value
+      elif isinstance(op, ast.Mod):
+        # VHDL and Verilog disagree on the sign of modulo results.
+        if lvalue < 0 or rvalue <= 0:
+          return
+        value = lvalue % rvalue
+      else:
+        opfn = _FOLD_ARITH_OPS.get(type(op))
+        if opfn is None:
+          return
+        value = opfn(lvalue, rvalue)
+
+    value = _fold_normalize(value, dtype)
+
+    return self.make_literal(dtype, value) if value is not None else None
+
+  def fold_UnaryOp(self, op, arg, const_fn):
+    value = const_fn(arg)
+    if value is NONE or not isinstance(arg, Value) or arg.dtype.array_shape:
+      return
+
+    dtype = arg.dtype
+    if isinstance(dtype, Bool):
+      if not isinstance(op, (ast.Not, ast.Invert)):
+        return
+      value = not value
+    elif isinstance(dtype, _FOLD_TYPES) and type(value) is int:
+      if isinstance(op, ast.UAdd):
+        pass
+      elif isinstance(op, ast.USub) and isinstance(dtype, (Sint, Integer)):
+        value = -value
+      elif isinstance(op, (ast.Not, ast.Invert)) and isinstance(dtype, (Uint, Bits)):
+        value = _fold_unsigned(~value, dtype.nbits)
+      else:
+        return
+    else:
+      return
+
+    value = _fold_normalize(value, dtype)
+
+    return self.make_literal(dtype, value) if value is not None else None
+
+  def fold_BoolOp(self, op, args, const_fn):
+    values = []
+    for arg in args:
+      value = const_fn(arg)
+      if value is NONE:
+        return
+      values.append(bool(value))
+
+    value = all(values) if isinstance(op, ast.And) else any(values)
+
+    return self.make_literal(BOOL, value)
+
+  def fold_Compare(self, left, ops, comps, const_fn):
+    args = [left] + list(comps)
+    vargs = [arg for arg in args if isinstance(arg, Value)]
+    if not vargs:
+      return
+
+    dtype = vargs[0].dtype
+    if isinstance(dtype, Bool):
+      if any(not isinstance(op, (ast.Eq, ast.NotEq)) for op in ops):
+        return
+      cargs = []
+      for arg in args:
+        value = const_fn(arg)
+        if value is NONE or not isinstance(value, (bool, int)):
+          return
+        if isinstance(arg, Value) and not isinstance(arg.dtype, Bool):
+          return
+        cargs.append(bool(value))
+    elif isinstance(dtype, _FOLD_TYPES):
+      if (isinstance(dtype, Bits) and
+          any(not isinstance(op, (ast.Eq, ast.NotEq)) for op in ops)):
+        return
+      # Compares promote to the widest type, so the folding checks are run
+      # against that.
+      if not isinstance(dtype, Integer):
+        dtype = type(dtype)(max(arg.dtype.nbits for arg in vargs))
+      cargs = self._fold_operands(args, dtype, const_fn)
+      if cargs is None:
+        return
+    else:
+      return
+
+    result = True
+    for i, op in enumerate(ops):
+      opfn = _FOLD_COMPARE_OPS.get(type(op))
+      if opfn is None:
+        return
+      result = result and opfn(cargs[i], cargs[i + 1])
+
+    return self.make_literal(BOOL, result)
+
+  @contextlib.contextmanager
+  def cse_no_hoist(self):
+    hoist, self._cse_hoist = self._cse_hoist, False
+    try:
+      yield self
+    finally:
+      self._cse_hoist = hoist
 
   def _module_reset(self):
+    self._module_code_start = len(self._code)
     self._mod_comment = None
     self._itor = Instanciator(param_key=PARAM_KEY)
     self._revgen = pycu.RevGen(fmt='{name}{ver}')
     self._process_reset()
 
+  def _dce_target(self, var):
+    # Only whole variable assignments can be dropped, slices and array elements
+    # count as reads of the variable.
+    ref = var.ref
+
+    return ref.vname if ref is not None and ref.name == ref.vname else None
+
+  def _dce_collect(self, code, tagged, reads, start=0):
+    for ent in itertools.islice(code, start, None):
+      if isinstance(ent, _Placement):
+        self._dce_collect(ent.code, tagged, reads)
+      elif isinstance(ent, (list, tuple)):
+        self._dce_collect(ent, tagged, reads)
+      elif isinstance(ent, _DceLine):
+        tagged.append((code, ent))
+      elif isinstance(ent, str):
+        reads.update(_IDENT_RX.findall(ent))
+
+  def _dce_remove(self, code, dead):
+    result = []
+    for ent in code:
+      if id(ent) not in dead:
+        result.append(ent)
+      elif ent.keep is not None:
+        result.append(ent.keep)
+
+    code[:] = result
+
+  def _dce_drop_blocks(self, code, start=0):
+    # Drops the control flow chains (like if/elif/else ones) whose blocks are all
+    # empty, after the dead code removal. Nested chains are handled first, so that
+    # their parents can end up empty as well.
+    result, chains = list(code[: start]), []
+    for ent in itertools.islice(code, start, None):
+      if isinstance(ent, _Placement):
+        self._dce_drop_blocks(ent.code)
+        if len(ent) == 0:
+          result.append(ent)
+          continue
+      elif isinstance(ent, list):
+        self._dce_drop_blocks(ent)
+      elif isinstance(ent, _DceBlock) and (ent.kind > 0 or chains):
+        if ent.kind > 0:
+          chains.append([len(result), False])
+        elif ent.kind < 0:
+          pos, used = chains.pop()
+          if not used:
+            del result[pos:]
+            continue
+          elif chains:
+            chains[-1][1] = True
+
+        result.append(ent)
+        continue
+
+      result.append(ent)
+      if chains:
+        chains[-1][1] = True
+
+    code[:] = result
+
+  def _eliminate_dead_code(self, start):
+    tagged, reads = [], set()
+    self._dce_collect(self._code, tagged, reads, start=start)
+
+    declared = {ln.name for _, ln in tagged if ln.decl}
+    var_lines = collections.defaultdict(list)
+    for dcode, ln in tagged:
+      if ln.name in declared:
+        var_lines[ln.name].append((dcode, ln))
+      else:
+        reads.update(_IDENT_RX.findall(ln))
+
+    # Mark all the variables which are (even indirectly) read by untagged lines,
+    # and sweep the lines of the ones which are not.
+    live = reads & declared
+    pending = list(live)
+    while pending:
+      for _, ln in var_lines[pending.pop()]:
+        for name in _IDENT_RX.findall(ln):
+          if name in declared and name not in live:
+            live.add(name)
+            pending.append(name)
+
+    dead_codes, removed = dict(), 0
+    for name in declared - live:
+      for dcode, ln in var_lines[name]:
+        dead_codes.setdefault(id(dcode), (dcode, set()))[1].add(id(ln))
+        removed += 1
+
+    for dcode, dead in dead_codes.values():
+      self._dce_remove(dcode, dead)
+
+    if removed:
+      self._dce_drop_blocks(self._code, start=start)
+
+    if removed:
+      alog.info(f'Dead code elimination removed {removed} lines, declaring or ' \
+                f'assigning {len(declared - live)} unread variables')
+
+  def _module_code_end(self):
+    if self._dce:
+      self._eliminate_dead_code(self._module_code_start)
+    self._module_code_start = len(self._code)
+
   def _int2bits(self, intval, n):
     value = intval & ((1 << n) - 1)
 
@@ -488,7 +999,7 @@ class Emitter:
       return evalue[-nbits: ]
 
   def _paren_join(self, joiner, args):
-    return joiner.join(paren(x) for x in args) if len(args) > 1 else args[0]
+    return Expr(joiner.join(paren(x) for x in args)) if len(args) > 1 else args[0]
 
   def _default_float_type(self):
     return dtype_from_string(os.getenv('FLOAT_TYPE', 'f32'))
@@ -620,22 +1131,18 @@ class Emitter:
     return self._gen_marshal(args, _IFEXP_TYPE_PREC, ctype_allowed or _CTYPES_ALLOWED,
                              ctype_cast=ctype_cast)
 
-  def _gen_marshal(self, args, type_prec, ctype_allowed, ctype_cast=None):
-    cargs, dtype, ctype = [], None, None
-    for arg in args:
-      if not isinstance(arg, Value):
-        arg = self._try_convert_literal(arg)
-      cargs.append(arg)
-      if isinstance(arg, Value):
-        dtype = self._best_type(dtype, arg.dtype, type_prec)
+  def _promotion(self, kinds, type_prec, ctype_allowed):
+    dtype, ctype = None, None
+    for kind in kinds:
+      if isinstance(kind, Type):
+        dtype = self._best_type(dtype, kind, type_prec)
       else:
-        ytype = type(arg)
-        yind = ctype_allowed.get(ytype, -1)
+        yind = ctype_allowed.get(kind, -1)
         if yind < 0:
-          fatal(f'Type {ytype} not allowed, should be one of ' \
+          fatal(f'Type {kind} not allowed, should be one of ' \
                 f'{tuple(pyiu.cname(t) for t in ctype_allowed.keys())}')
         if ctype is None or ctype_allowed[ctype] > yind:
-          ctype = ytype
+          ctype = kind
 
     dtype = self._result_type(dtype, type_prec)
     if dtype is None:
@@ -646,13 +1153,38 @@ class Emitter:
       else:
         fatal(f'Unknown type: {ctype}')
 
+    # The cast plan flags the arguments which need to be converted to the result
+    # type. Python literals always go through the cast (or the ctype_cast) path.
+    plan = tuple(not isinstance(kind, Type) or kind != dtype for kind in kinds)
+
+    return dtype, plan
+
+  def _gen_marshal(self, args, type_prec, ctype_allowed, ctype_cast=None):
+    cargs, kinds = [], []
+    for arg in args:
+      if not isinstance(arg, Value):
+        arg = self._try_convert_literal(arg)
+      cargs.append(arg)
+      kinds.append(arg.dtype if isinstance(arg, Value) else type(arg))
+
+    # Types are interned, so the promotion decision only depends on the argument
+    # types and on the precedence tables, and can be cached. The tables are stored
+    # within the entry, to guard against recycled object IDs.
+    kinds = tuple(kinds)
+    key = (id(type_prec), id(ctype_allowed), kinds)
+    entry = _PROMOTION_CACHE.get(key)
+    if entry is None or entry[0] is not type_prec or entry[1] is not ctype_allowed:
+      dtype, plan = self._promotion(kinds, type_prec, ctype_allowed)
+      entry = (type_prec, ctype_allowed, dtype, plan)
+      _PROMOTION_CACHE[key] = entry
+
+    dtype, plan = entry[2], entry[3]
     for i, arg in enumerate(cargs):
-      if isinstance(arg, Value):
-        if dtype != arg.dtype:
+      if plan[i]:
+        if isinstance(arg, Value) or ctype_cast is None:
           cargs[i] = Value(dtype, self._cast(arg, dtype))
-      else:
-        cargs[i] = (Value(dtype, self._cast(arg, dtype)) if ctype_cast is None else
-                    ctype_cast(arg, dtype))
+        else:
+          cargs[i] = ctype_cast(arg, dtype)
 
     return cargs
 
@@ -689,25 +1221,18 @@ class Emitter:
 
     return lib_paths
 
-  def _load_libs(self):
-    lib_paths = self._collect_libpaths()
-
-    libcode, xlibs = [], []
-
-    # Loading internal libraries by manifest (always load ones).
+  def _manifest_libs(self, lib_paths):
+    xlibs = []
     if lpath := pyfsu.find_path('LIBS', lib_paths, checkfn=gfs.exists):
       with gfs.open(lpath, mode='r') as mfd:
         for libname in [l.strip() for l in mfd.read().split('\n')]:
           if libname and not libname.startswith('#'):
             xlibs.append(libname)
 
-    xlibs.extend(self._extra_libs)
-
-    if env_libs := os.getenv(f'PYXHDL_{self.KIND.upper()}_LIBS'):
-      xlibs.extend(pyu.resplit(env_libs, ';'))
-
-    xlibs.extend(self._cfg.get('libs', dict()).get(self.KIND, ()))
+    return xlibs
 
+  def _load_lib_files(self, xlibs, lib_paths):
+    libcode = []
     for libname in pycu.enum_unique(xlibs):
       _, ext = os.path.splitext(libname)
 
@@ -719,6 +1244,33 @@ class Emitter:
       else:
         fatal(f'Library "{libname}" ("{libfname}") not found in {lib_paths}')
 
+    return libcode
+
+  def core_libs(self):
+    # The manifest libraries are stable across generations, so tools can compile
+    # them once (emitting with the "core_libs" configuration set to False) and
+    # reuse the result.
+    lib_paths = self._collect_libpaths()
+
+    return self._load_lib_files(self._manifest_libs(lib_paths), lib_paths)
+
+  def _load_libs(self):
+    lib_paths = self._collect_libpaths()
+
+    # Loading internal libraries by manifest (always load ones), unless the
+    # configuration says they are provided separately.
+    xlibs = (self._manifest_libs(lib_paths)
+             if self._cfg.get('core_libs', True) else [])
+
+    xlibs.extend(self._extra_libs)
+
+    if env_libs := os.getenv(f'PYXHDL_{self.KIND.upper()}_LIBS'):
+      xlibs.extend(pyu.resplit(env_libs, ';'))
+
+    xlibs.extend(self._cfg.get('libs', dict()).get(self.KIND, ()))
+
+    libcode = self._load_lib_files(xlibs, lib_paths)
+
     # Add user defined modules within the PyXHDL code.
     for cid, umod in self._MODULE_REGISTRY[self.KIND].items():
       libcode.extend(umod)
@@ -748,7 +1300,8 @@ class Emitter:
     self._placements.append(place)
     indent, self._indent = self._indent, place.indent
     try:
-      yield self
+      with self.cse_scope():
+        yield self
     finally:
       self._indent = indent
       self._placements.pop()
@@ -757,11 +1310,15 @@ class Emitter:
   def indent(self):
     self._indent += 1
     try:
-      yield self
+      with self.cse_scope():
+        yield self
     finally:
       self._indent -= 1
 
   def emit_code(self, code):
+    # Inline code (which includes wait statements) can change any signal or
+    # variable, so no expression can be reused across it.
+    self.cse_clear()
     for ln in code.split('\n'):
       self._emit_line(ln)
 
@@ -774,6 +1331,7 @@ class Emitter:
     cargs = self.build_args_string(lambda a: a, ', ', args)
 
     call = f'{fname}({cargs})'
+    self._call_names.add(fname)
 
     alog.debug(lambda: f'{call} -> {dtype}')
 
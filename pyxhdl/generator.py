@@ -18,18 +18,13 @@ from .vhdl_emitter import *
 from . import testbench as TB
 
 
-def _main(args):
-  if args.cfgfile is not None:
-    parse_args(args.cfgfile, args)
-
-  mod = pymu.load_module(args.input_file)
-  ent_class = getattr(mod, args.entity, None)
-  if ent_class is None:
-    fatal(f'Entity {args.entity} not found in {args.input_file}')
-
+def _generate(args, mod, ent_class, output_file, shard=None):
   gglobals = create_globals(mod, source_globals=globals())
 
   ekwargs = parse_kwargs(args.ekwargs, gglobals)
+  if args.core_libs_file:
+    ekwargs['core_libs'] = False
+
   emitter = Emitter.create(args.backend.lower(),
                            cfg_file=args.emitter_cfgfile,
                            **ekwargs)
@@ -47,16 +42,46 @@ def _main(args):
 
   with codegen.context():
     if args.testbench:
-      TB.generate(codegen, args, ent_class, inputs)
+      TB.generate(codegen, args, ent_class, inputs, shard=shard)
     else:
       codegen.generate_entity(ent_class, inputs)
 
     code = codegen.flush()
 
-    with gfs.std_open(args.output_file, mode='w') as ofd:
+    alog.debug(f'Cast cache: {emitter.cast_cache_info()}')
+
+    with gfs.std_open(output_file, mode='w') as ofd:
       for ln in code:
         print(ln, file=ofd)
 
+    if args.core_libs_file:
+      with gfs.std_open(args.core_libs_file, mode='w') as ofd:
+        for ln in emitter.core_libs():
+          print(ln, file=ofd)
+
+
+def _main(args):
+  if args.cfgfile is not None:
+    parse_args(args.cfgfile, args)
+
+  mod = pymu.load_module(args.input_file)
+  ent_class = getattr(mod, args.entity, None)
+  if ent_class is None:
+    fatal(f'Entity {args.entity} not found in {args.input_file}')
+
+  if args.testbench and args.tb_shards and args.tb_shard is None:
+    if not args.output_file:
+      fatal(f'An output file is required when generating testbench shards')
+
+    # Every shard gets its own, freshly created, emitter and code generator.
+    for shard in range(args.tb_shards):
+      output_file = TB.shard_path(args.output_file, shard)
+      alog.info(f'Generating testbench shard {shard} into {output_file}')
+
+      _generate(args, mod, ent_class, output_file, shard=shard)
+  else:
+    _generate(args, mod, ent_class, args.output_file)
+
 
 if __name__ == '__main__':
   parser = argparse.ArgumentParser(description='PyXHDL Code Generator',
@@ -80,10 +105,12 @@ if __name__ == '__main__':
                       help='The path to the YAML file containing the generator configuration')
   parser.add_argument('--output_file',
                       help='The path to the output file for the generated code (default STDOUT)')
+  parser.add_argument('--core_libs_file',
+                      help='The path to the output file for the core library code, which ' \
+                      'will not be included within the generated code')
   parser.add_argument('--testbench', action='store_true',
                       help='Run the entity with a testbench')
 
   TB.add_arguments(parser)
 
   app_main.main(parser, _main)
-
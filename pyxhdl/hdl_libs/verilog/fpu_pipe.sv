@@ -0,0 +1,122 @@
+/* verilator lint_off WIDTH */
+
+// Pipelined variants of the FPU operations, with a latency of STAGES clock cycles.
+// The combinational FPU logic result is registered STAGES times, and synthesis
+// register retiming (balancing) moves the registers within the logic, splitting
+// it into STAGES shorter paths. A zero STAGES value makes the operation purely
+// combinational.
+
+// FPU_PIPE
+module fpu_pipe(CLK, DIN, DOUT);
+  parameter integer N = 32;
+  parameter integer STAGES = 1;
+
+  input logic CLK;
+  input logic [N - 1: 0] DIN;
+  output logic [N - 1: 0] DOUT;
+
+  generate
+    if (STAGES == 0) begin : comb
+      assign DOUT = DIN;
+    end else begin : regs
+      logic [N - 1: 0] stage [STAGES];
+
+      always_ff @(posedge CLK) begin
+        stage[0] <= DIN;
+        for (integer i = 1; i < STAGES; i++) begin
+          stage[i] <= stage[i - 1];
+        end
+      end
+
+      assign DOUT = stage[STAGES - 1];
+    end
+  endgenerate
+endmodule
+
+
+// FPU_ADD_PIPE
+module fpu_add_pipe(CLK, A, B, XOUT);
+  parameter integer NX = 11;
+  parameter integer NM = 23;
+  parameter integer STAGES = 1;
+  localparam integer N = NX + NM + 1;
+
+  input logic CLK;
+  input logic [N - 1: 0] A;
+  input logic [N - 1: 0] B;
+  output logic [N - 1: 0] XOUT;
+
+  logic [N - 1: 0] result;
+
+  fpu #(.NX(NX), .NM(NM)) core();
+
+  assign result = core.add(A, B);
+
+  fpu_pipe #(.N(N), .STAGES(STAGES)) pipe(.CLK(CLK), .DIN(result), .DOUT(XOUT));
+endmodule
+
+
+// FPU_SUB_PIPE
+module fpu_sub_pipe(CLK, A, B, XOUT);
+  parameter integer NX = 11;
+  parameter integer NM = 23;
+  parameter integer STAGES = 1;
+  localparam integer N = NX + NM + 1;
+
+  input logic CLK;
+  input logic [N - 1: 0] A;
+  input logic [N - 1: 0] B;
+  output logic [N - 1: 0] XOUT;
+
+  logic [N - 1: 0] result;
+
+  fpu #(.NX(NX), .NM(NM)) core();
+
+  assign result = core.sub(A, B);
+
+  fpu_pipe #(.N(N), .STAGES(STAGES)) pipe(.CLK(CLK), .DIN(result), .DOUT(XOUT));
+endmodule
+
+
+// FPU_MUL_PIPE
+module fpu_mul_pipe(CLK, A, B, XOUT);
+  parameter integer NX = 11;
+  parameter integer NM = 23;
+  parameter integer STAGES = 1;
+  localparam integer N = NX + NM + 1;
+
+  input logic CLK;
+  input logic [N - 1: 0] A;
+  input logic [N - 1: 0] B;
+  output logic [N - 1: 0] XOUT;
+
+  logic [N - 1: 0] result;
+
+  fpu #(.NX(NX), .NM(NM)) core();
+
+  assign result = core.mul(A, B);
+
+  fpu_pipe #(.N(N), .STAGES(STAGES)) pipe(.CLK(CLK), .DIN(result), .DOUT(XOUT));
+endmodule
+
+
+// FPU_DIV_PIPE
+module fpu_div_pipe(CLK, A, B, XOUT);
+  parameter integer NX = 11;
+  parameter integer NM = 23;
+  parameter integer STAGES = 1;
+  localparam integer N = NX + NM + 1;
+
+  input logic CLK;
+  input logic [N - 1: 0] A;
+  input logic [N - 1: 0] B;
+  output logic [N - 1: 0] XOUT;
+
+  logic [N - 1: 0] result;
+
+  fpu #(.NX(NX), .NM(NM)) core();
+
+  assign result = core.div(A, B);
+
+  fpu_pipe #(.N(N), .STAGES(STAGES)) pipe(.CLK(CLK), .DIN(result), .DOUT(XOUT));
+endmodule
@@ -190,7 +190,7 @@ class Interface(_InterfaceBase):
       if isinstance(value, Interface):
         expanded.extend(pin.ifc_expand(value))
       else:
-        expanded.append((pycu.new_with(pin, name=subname(name, pin.name)), value))
+        expanded.append((pin._new_with(name=subname(name, pin.name)), value))
 
     return tuple(expanded)
 
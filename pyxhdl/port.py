@@ -12,7 +12,7 @@ from .utils import *
 
 class Port(Hashed):
 
-  __slots__ = ('name', 'idir', 'type', 'default')
+  __slots__ = ('name', 'idir', 'type', 'default', '_hash')
 
   IN = 'IN'
   OUT = 'OUT'
@@ -0,0 +1,726 @@
+import functools
+import heapq
+import itertools
+import math
+import types
+
+import numpy as np
+
+import py_misc_utils.alog as alog
+
+from .pysim_emitter import *
+from .pyxhdl import *
+from .utils import *
+
+
+class _Signal:
+
+  __slots__ = ('kernel', 'name', 'v', 'n', 'last', 'event', 'pending', 'waiters')
+
+  def __init__(self, kernel, name, value):
+    self.kernel = kernel
+    self.name = name
+    self.v = value
+    # The value the signal will take at the next delta cycle (last assignment
+    # wins), which partial assignments (bits, slices) are applied to.
+    self.n = value
+    self.last = value
+    self.event = False
+    self.pending = False
+    self.waiters = []
+
+  def set(self, value):
+    self.n = value
+    if not self.pending:
+      self.pending = True
+      self.kernel._updates.append(self)
+
+  def rising(self):
+    return self.event and self.v == 1 and self.last == 0
+
+  def falling(self):
+    return self.event and self.v == 0 and self.last == 1
+
+  def __repr__(self):
+    return f'Signal({self.name}={self.v})'
+
+
+class _LanesSignal(_Signal):
+
+  __slots__ = ()
+
+  # Edge sensitive processes require the edge to happen on all the lanes.
+  def rising(self):
+    return self.event and np.all(self.v == 1) and np.all(self.last == 0)
+
+  def falling(self):
+    return self.event and np.all(self.v == 0) and np.all(self.last == 1)
+
+
+class _Var:
+
+  __slots__ = ('v',)
+
+  def __init__(self, value):
+    self.v = value
+
+  @property
+  def n(self):
+    return self.v
+
+  def set(self, value):
+    self.v = value
+
+
+class _Process:
+
+  __slots__ = ('name', 'gen', 'epoch', 'cond')
+
+  def __init__(self, name, gen):
+    self.name = name
+    self.gen = gen
+    self.epoch = 0
+    self.cond = None
+
+
+class _WaitOn:
+
+  __slots__ = ('signals', 'cond')
+
+  def __init__(self, signals, cond=None):
+    self.signals = tuple(s for s in signals if isinstance(s, _Signal))
+    self.cond = cond
+
+  def arm(self, kernel, proc):
+    proc.cond = self.cond
+    for sig in self.signals:
+      sig.waiters.append((proc, proc.epoch))
+
+
+class _WaitFor:
+
+  __slots__ = ('time',)
+
+  def __init__(self, time):
+    self.time = time
+
+  def arm(self, kernel, proc):
+    proc.cond = None
+    kernel._push(kernel.now + self.time, proc, proc.epoch)
+
+
+def _same(a, b):
+  if isinstance(a, np.ndarray):
+    return (isinstance(b, np.ndarray) and a.shape == b.shape and
+            all(_same(x, y) for x, y in zip(a.flat, b.flat)))
+
+  # NaN floating point values compare different from anything, including themselves.
+  return a == b or (a != a and b != b)
+
+
+def _lanes_same(a, b):
+  a, b = np.asarray(a), np.asarray(b)
+
+  return np.array_equal(a, b, equal_nan=a.dtype.kind == 'f' and b.dtype.kind == 'f')
+
+
+class Kernel:
+
+  SIGNAL = _Signal
+
+  _same = staticmethod(_same)
+
+  def __init__(self, time_unit='ns', max_deltas=10000, echo=False):
+    self.time_unit = time_unit
+    self.max_deltas = max_deltas
+    self.echo = echo
+    self.now = 0
+    self.finished = False
+    self.errors = 0
+    self.output = []
+    self.signals = dict()
+    self.instances = []
+    self._updates = []
+    self._timed = []
+    self._seq = itertools.count()
+    self._procs = []
+    self._started = False
+
+  def signal(self, name, value):
+    sig = self.SIGNAL(self, name, value)
+    self.signals[name] = sig
+
+    return sig
+
+  def instance(self, path, name):
+    self.instances.append((path, name))
+
+  def process(self, name, fn):
+    self._procs.append(_Process(name, fn()))
+
+  def wait_on(self, *signals):
+    return _WaitOn(signals)
+
+  def wait_until(self, signals, cond):
+    return _WaitOn(signals, cond=cond)
+
+  def wait_for(self, time):
+    return _WaitFor(time)
+
+  def schedule(self, sig, value, delay):
+    self._push(self.now + delay, None, (sig, value))
+
+  def write(self, *parts):
+    line = ''.join(parts)
+    self.output.append(line)
+    if line.startswith('ERR:'):
+      self.errors += 1
+    if self.echo:
+      print(line)
+
+  def check(self, cond, *parts):
+    if not cond:
+      self.write(f'ERR: {self.now_str()} Assertion failed: ', *parts)
+
+  def finish(self):
+    self.finished = True
+
+  def now_str(self):
+    return f'{self.now} {self.time_unit}'
+
+  def _push(self, time, proc, arg):
+    heapq.heappush(self._timed, (time, next(self._seq), proc, arg))
+
+  def _resume(self, proc):
+    proc.epoch += 1
+    try:
+      wait = next(proc.gen)
+    except StopIteration:
+      return
+
+    # A None wait suspends the process forever (VHDL "wait;").
+    if wait is not None:
+      wait.arm(self, proc)
+
+  def _delta(self, woken):
+    updates, self._updates = self._updates, []
+
+    events = []
+    for sig in updates:
+      sig.pending = False
+      if not self._same(sig.v, sig.n):
+        sig.last, sig.v = sig.v, sig.n
+        sig.event = True
+        events.append(sig)
+
+    # Wait conditions are evaluated once all the signal updates of the delta cycle
+    # have been applied.
+    for sig in events:
+      waiters, sig.waiters = sig.waiters, []
+      for proc, epoch in waiters:
+        if proc.epoch != epoch or id(proc) in woken:
+          continue
+        if proc.cond is None or proc.cond():
+          woken[id(proc)] = proc
+        else:
+          sig.waiters.append((proc, epoch))
+
+    for proc in woken.values():
+      self._resume(proc)
+
+    for sig in events:
+      sig.event = False
+
+  def _start(self):
+    self._started = True
+    for proc in self._procs:
+      self._resume(proc)
+
+  def run(self, until=None):
+    if not self._started:
+      self._start()
+
+    deltas = 0
+    while not self.finished:
+      if self._updates:
+        deltas += 1
+        if deltas > self.max_deltas:
+          fatal(f'Delta cycles limit ({self.max_deltas}) reached at {self.now_str()}, ' \
+                f'combinatorial loop?')
+
+        self._delta(dict())
+        continue
+
+      if not self._timed or (until is not None and self._timed[0][0] > until):
+        break
+
+      deltas = 0
+      self.now = self._timed[0][0]
+
+      woken = dict()
+      while self._timed and self._timed[0][0] == self.now:
+        _, _, proc, arg = heapq.heappop(self._timed)
+        if proc is None:
+          sig, value = arg
+          sig.set(value)
+        elif proc.epoch == arg:
+          woken[id(proc)] = proc
+
+      self._delta(woken)
+
+    if until is not None and not self.finished:
+      self.now = max(self.now, until)
+
+    return self
+
+
+class LanesKernel(Kernel):
+
+  SIGNAL = _LanesSignal
+
+  _same = staticmethod(_lanes_same)
+
+  def __init__(self, lanes, **kwargs):
+    super().__init__(**kwargs)
+    self.lanes = lanes
+
+  def check(self, cond, *parts):
+    failed = np.flatnonzero(np.logical_not(np.broadcast_to(cond, (self.lanes,))))
+    if failed.size:
+      lanes = ', '.join(str(x) for x in failed[: 8]) + (', ...' if failed.size > 8 else '')
+      self.write(f'ERR: {self.now_str()} Assertion failed (lanes {lanes}): ', *parts)
+
+
+def _mask(nbits):
+  return (1 << nbits) - 1
+
+
+def _sx(value, nbits):
+  value &= (1 << nbits) - 1
+
+  return value - (1 << nbits) if value >> (nbits - 1) else value
+
+
+def _sresize(value, nbits):
+  # Shrinking a signed value keeps the sign bit (numeric_std resize() semantics).
+  sign = -(1 << (nbits - 1)) if value < 0 else 0
+
+  return sign | (value & ((1 << (nbits - 1)) - 1))
+
+
+def _idiv(a, b):
+  q = abs(a) // abs(b)
+
+  return q if (a >= 0) == (b >= 0) else -q
+
+
+def _fdiv(a, b):
+  if b == 0:
+    return math.nan if a == 0 or a != a else math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+  return a / b
+
+
+def _rint(value):
+  # VHDL integer(real) rounds half away from zero.
+  return int(math.copysign(math.floor(abs(value) + 0.5), value))
+
+
+def _frint(value):
+  # Float to integer conversions round to nearest, ties to even.
+  return round(value)
+
+
+def _fround(value, exp, mant):
+  if value != value or value == 0 or math.isinf(value):
+    return value
+
+  bias = (1 << (exp - 1)) - 1
+  _, fexp = math.frexp(value)
+  # Values below the smallest normal number are rounded to the subnormal grid.
+  ulp_exp = max(fexp - 1, 1 - bias) - mant
+  result = math.ldexp(round(math.ldexp(value, -ulp_exp)), ulp_exp)
+  if abs(result) >= math.ldexp(1.0, bias + 1):
+    return math.copysign(math.inf, value)
+
+  return result
+
+
+def _isnan(value):
+  return value != value
+
+
+def _isinf(value):
+  return math.isinf(value)
+
+
+def _bit(value, pos):
+  return (value >> pos) & 1
+
+
+def _sbit(value, pos, vbits):
+  return -((value >> pos) & 1)
+
+
+def _bits(value, pos, nbits):
+  return (value >> pos) & ((1 << nbits) - 1)
+
+
+def _sbits(value, pos, nbits, vbits):
+  return _sx(value >> pos, nbits)
+
+
+def _setbit(value, pos, bit):
+  return (value & ~(1 << pos)) | ((bit & 1) << pos)
+
+
+def _setsbit(value, pos, nbits, bit):
+  return _sx(_setbit(value, pos, bit), nbits)
+
+
+def _setbits(value, pos, nbits, bits):
+  mask = ((1 << nbits) - 1) << pos
+
+  return (value & ~mask) | ((bits << pos) & mask)
+
+
+def _setsbits(value, pos, nbits, vbits, bits):
+  return _sx(_setbits(value, pos, nbits, bits), vbits)
+
+
+def _slice(coord):
+  kind = coord[0]
+  if kind == 's':
+    _, start, stop, step = coord
+    if step < 0 and stop < 0:
+      stop = None
+
+    return slice(start, stop, step)
+  if kind == 'b':
+    _, base, size = coord
+
+    return slice(base, base + size)
+
+  return coord
+
+
+def _index(coords):
+  return tuple(_slice(c) if isinstance(c, tuple) else c for c in coords)
+
+
+def _ix(value, coords):
+  return value[_index(coords)]
+
+
+def _setix(value, coords, elem):
+  result = value.copy()
+  result[_index(coords)] = elem
+
+  return result
+
+
+def _afull(shape, value):
+  result = np.empty(shape, dtype=object)
+  result.fill(value)
+
+  return result
+
+
+def _array(shape, values):
+  result = np.empty(len(values), dtype=object)
+  result[:] = values
+
+  return result.reshape(shape)
+
+
+def _amap(fn, value):
+  result = np.empty(value.shape, dtype=object)
+  for idx in np.ndindex(value.shape):
+    result[idx] = fn(value[idx])
+
+  return result
+
+
+def _hstr(value, nbits):
+  ndigits = (nbits + 3) // 4
+
+  return f'{value & ((1 << (4 * ndigits)) - 1):0{ndigits}X}'
+
+
+def _bstr(value, nbits):
+  return f'{value & ((1 << nbits) - 1):0{nbits}b}'
+
+
+def _bool_str(value):
+  return 'true' if value else 'false'
+
+
+def _real_str(value):
+  return f'{value:e}'
+
+
+def _float_equal(value, ref_value, eps):
+  return abs(value - ref_value) <= max(abs(value), abs(ref_value)) * eps
+
+
+_RUNTIME = dict(
+  _Var=_Var,
+  _np=np,
+  _range=range,
+  _istr=str,
+  _float=float,
+  _mask=_mask,
+  _sx=_sx,
+  _sresize=_sresize,
+  _idiv=_idiv,
+  _fdiv=_fdiv,
+  _rint=_rint,
+  _frint=_frint,
+  _fround=_fround,
+  _isnan=_isnan,
+  _isinf=_isinf,
+  _bit=_bit,
+  _sbit=_sbit,
+  _bits=_bits,
+  _sbits=_sbits,
+  _setbit=_setbit,
+  _setsbit=_setsbit,
+  _setbits=_setbits,
+  _setsbits=_setsbits,
+  _ix=_ix,
+  _setix=_setix,
+  _afull=_afull,
+  _array=_array,
+  _amap=_amap,
+  _hstr=_hstr,
+  _bstr=_bstr,
+  _bool_str=_bool_str,
+  _real_str=_real_str,
+  pyxhdl=types.SimpleNamespace(float_equal=_float_equal),
+)
+
+
+def _lanes_sresize(value, nbits):
+  mask = (1 << (nbits - 1)) - 1
+
+  return np.where(value < 0, value | ~mask, value & mask)
+
+
+def _lanes_sx(value, nbits):
+  value = value & ((1 << nbits) - 1)
+
+  return value - ((value >> (nbits - 1)) << nbits)
+
+
+def _lanes_idiv(a, b):
+  with np.errstate(divide='ignore'):
+    q = np.abs(a) // np.abs(b)
+
+  return np.where((a >= 0) == (b >= 0), q, -q)
+
+
+def _lanes_fdiv(a, b):
+  with np.errstate(divide='ignore', invalid='ignore'):
+    return np.true_divide(a, b)
+
+
+def _lanes_rint(value):
+  return np.copysign(np.floor(np.abs(value) + 0.5), value).astype(np.int64)
+
+
+def _lanes_frint(value):
+  return np.rint(value).astype(np.int64)
+
+
+def _lanes_float(value):
+  return np.asarray(value, dtype=np.float64)
+
+
+def _lanes_where(cond, a, b):
+  try:
+    return np.where(cond, a, b)
+  except OverflowError:
+    # Python integers which do not fit 64 bits.
+    return np.where(cond, np.asarray(a, dtype=object), np.asarray(b, dtype=object))
+
+
+def _lanes_float_equal(value, ref_value, eps):
+  return np.abs(value - ref_value) <= np.maximum(np.abs(value), np.abs(ref_value)) * eps
+
+
+_LANES_RUNTIME = _RUNTIME | dict(
+  _float=_lanes_float,
+  _sx=_lanes_sx,
+  _sresize=_lanes_sresize,
+  _idiv=_lanes_idiv,
+  _fdiv=_lanes_fdiv,
+  _rint=_lanes_rint,
+  _frint=_lanes_frint,
+  _isnan=np.isnan,
+  _isinf=np.isinf,
+  _where=_lanes_where,
+  _land=lambda *args: functools.reduce(np.logical_and, args),
+  _lor=lambda *args: functools.reduce(np.logical_or, args),
+  _lnot=np.logical_not,
+  _any=np.any,
+  _obj=lambda value: np.asarray(value, dtype=object),
+  pyxhdl=types.SimpleNamespace(float_equal=_lanes_float_equal),
+)
+
+
+def namespace(lanes=False):
+  ns = (_LANES_RUNTIME if lanes else _RUNTIME).copy()
+  ns['_ENTITIES'] = dict()
+
+  return ns
+
+
+def _compute_dtype(dtype):
+  # Integer lanes are carried as 64 bit values while evaluating expressions, so that
+  # intermediate results (like concatenations) of narrower types do not overflow.
+  # Signed products needing more than 63 bits are computed with Python integers.
+  return np.dtype(np.int64) if dtype.kind in 'iu' else dtype
+
+
+def _lanes_array(value, dtype, lanes):
+  result = np.empty(lanes, dtype=dtype)
+  result[...] = value
+
+  return result
+
+
+class Simulator:
+
+  def __init__(self, code, top=None, time_unit='ns', echo=False, lanes=None):
+    self.lanes = lanes
+    self.namespace = namespace(lanes=lanes is not None)
+    exec(compile('\n'.join(code), '<pysim>', 'exec'), self.namespace)
+
+    entities = self.namespace['_ENTITIES']
+    self.top = top or next(iter(entities))
+    if lanes is None:
+      self.kernel = Kernel(time_unit=time_unit, echo=echo)
+      self.ports = {name: self.kernel.signal(name, init)
+                    for name, _, init in entities[self.top]}
+    else:
+      self.kernel = LanesKernel(lanes, time_unit=time_unit, echo=echo)
+      self.dtypes = {name: np.dtype(ldtype) for name, _, _, ldtype in entities[self.top]}
+      self.ports = {name: self.kernel.signal(name, self._port_value(name, init))
+                    for name, _, init, _ in entities[self.top]}
+
+    self.namespace[self.top](self.kernel, '', **self.ports)
+
+  def _port_value(self, name, value):
+    if self.lanes is None:
+      return value
+
+    return _lanes_array(value, _compute_dtype(self.dtypes[name]), self.lanes)
+
+  @property
+  def now(self):
+    return self.kernel.now
+
+  @property
+  def output(self):
+    return self.kernel.output
+
+  @property
+  def errors(self):
+    return self.kernel.errors
+
+  def __getitem__(self, name):
+    value = self.ports[name].v
+    if self.lanes is None:
+      return value
+
+    return _lanes_array(value, self.dtypes[name], self.lanes)
+
+  def __setitem__(self, name, value):
+    self.ports[name].set(self._port_value(name, value))
+
+  def set(self, **values):
+    for name, value in values.items():
+      self[name] = value
+
+    return self
+
+  def signal(self, path):
+    return self.kernel.signals[path].v
+
+  def settle(self):
+    return self.kernel.run(until=self.kernel.now)
+
+  def run(self, duration=None):
+    return self.kernel.run(until=None if duration is None else self.kernel.now + duration)
+
+  def clock(self, name, cycles=1):
+    for _ in range(cycles):
+      self.ports[name].set(1)
+      self.settle()
+      self.ports[name].set(0)
+      self.settle()
+
+    return self
+
+
+def _generate(emitter, obj, inputs):
+  codegen = CodeGen(emitter, create_globals(obj))
+
+  with codegen.context():
+    codegen.generate_entity(obj, inputs)
+
+    return codegen.flush()
+
+
+def _emitter(lanes, **kwargs):
+  return PySimLanes_Emitter(**kwargs) if lanes else PySim_Emitter(**kwargs)
+
+
+def generate(obj, inputs, lanes=False, **kwargs):
+  return _generate(_emitter(lanes, **kwargs), obj, inputs)
+
+
+def simulate(obj, inputs, top=None, lanes=None, echo=False, **kwargs):
+  emitter = _emitter(lanes, **kwargs)
+  code = _generate(emitter, obj, inputs)
+
+  return Simulator(code, top=top, time_unit=emitter.time_unit(), echo=echo,
+                   lanes=lanes)
+
+
+def lanes_grid(**values):
+  # All the combinations of the given values (or ranges, for integer arguments),
+  # one per lane.
+  axes = [np.arange(v) if isinstance(v, int) else np.asarray(v) for v in values.values()]
+  grids = np.meshgrid(*axes, indexing='ij')
+
+  return {name: grid.ravel() for name, grid in zip(values.keys(), grids)}
+
+
+def run_testbench(eclass, inputs, input_file, clock=None, wait=None, clock_sync=None,
+                  toll=None, shards=None, shard=None, echo=False, **kwargs):
+  from . import testbench as TB
+
+  args = types.SimpleNamespace(tb_input_file=input_file,
+                               tb_wait=wait,
+                               tb_clock=[clock] if isinstance(clock, str) else clock,
+                               tb_clock_sync=clock_sync,
+                               tb_write_output=None,
+                               tb_toll=toll,
+                               tb_shards=shards,
+                               tb_shard=shard)
+
+  emitter = PySim_Emitter(**kwargs)
+  codegen = CodeGen(emitter, create_globals(eclass))
+
+  with codegen.context():
+    TB.generate(codegen, args, eclass, inputs)
+
+    code = codegen.flush()
+
+  sim = Simulator(code, time_unit=emitter.time_unit(), echo=echo)
+  sim.run()
+
+  alog.debug(lambda: f'Testbench ran until {sim.kernel.now_str()} with {sim.errors} errors')
+
+  return sim
@@ -0,0 +1,1070 @@
+import ast
+import collections
+import contextlib
+import copy
+import enum
+import functools
+import re
+
+import numpy as np
+
+import py_misc_utils.alog as alog
+import py_misc_utils.core_utils as pycu
+import py_misc_utils.inspect_utils as pyiu
+import py_misc_utils.utils as pyu
+
+from .common_defs import *
+from .entity import *
+from .emitter import *
+from .emitter import _DceLine, _Placement
+from .types import *
+from .utils import *
+from .vars import *
+from .wrap import *
+
+
+_HEADER = """# PyXHDL generated Python simulation model.
+# Run it with the pyxhdl.pysim.Simulator class.
+"""
+
+_OPSYMS = {
+  ast.Add: '+',
+  ast.Sub: '-',
+  ast.Mult: '*',
+  ast.Mod: '%',
+  ast.BitOr: '|',
+  ast.BitXor: '^',
+  ast.BitAnd: '&',
+  ast.LShift: '<<',
+  ast.RShift: '>>',
+  ast.Eq: '==',
+  ast.NotEq: '!=',
+  ast.Lt: '<',
+  ast.LtE: '<=',
+  ast.Gt: '>',
+  ast.GtE: '>=',
+}
+
+_INT_TYPES = (Uint, Sint, Bits, Integer)
+
+_LANE_FLOATS = {
+  (5, 10): 'float16',
+  (8, 23): 'float32',
+  (11, 52): 'float64',
+}
+
+_READ_RX = re.compile(r'\b([A-Za-z_]\w*)\.v\b')
+
+# Slice of the bits dimension, as (LSB position, number of bits).
+_BitSlice = collections.namedtuple('BitSlice', 'pos, nbits')
+
+
+# Lane mask of an If/Elif/Else branch, with the parent one and the mask of the lanes
+# which took any of the previous branches (None for the first one).
+_LaneBlock = collections.namedtuple('LaneBlock', 'parent, mask, taken')
+
+
+class _ArraySlice(str):
+  pass
+
+
+class _ToNext(ast.NodeTransformer):
+
+  def visit_Attribute(self, node):
+    if node.attr == 'v' and isinstance(node.value, ast.Name):
+      return ast.Attribute(value=node.value, attr='n', ctx=node.ctx)
+
+    return self.generic_visit(node)
+
+
+def _mask(nbits):
+  return (1 << nbits) - 1
+
+
+class PySim_Emitter(Emitter):
+
+  KIND = 'pysim'
+  FILE_EXT = '.py'
+  EOL = ''
+
+  def __init__(self, **kwargs):
+    super().__init__(**kwargs)
+    self._blocks = []
+    self._proc_body = None
+    self._proc_waits = 0
+    self.module_vars_place = self.emit_placement()
+    self._modules_place = self.emit_placement()
+    self._entity_place = self.emit_placement()
+
+  def _scalar_remap(self, value):
+    if isinstance(value, bool):
+      return 'True' if value else 'False'
+
+  def svalue(self, value):
+    # Signals and variables are objects within the generated code, whose current
+    # value is read via their "v" attribute. Constants are plain Python values.
+    if isinstance(value, Value):
+      ref = value.ref
+      if (ref is not None and ref.name == ref.vname and
+          (ref.vspec is None or not ref.vspec.const)):
+        return f'{ref.name}.v'
+
+    return super().svalue(value)
+
+  def _signal_name(self, value):
+    ref = value.ref if isinstance(value, Value) else None
+    if ref is None or ref.name != ref.vname:
+      fatal(f'Signal required: {value}')
+
+    return ref.name
+
+  def _container(self):
+    return self._placements[-1].code if self._placements else self._code
+
+  def _emit_indented(self, indent, line):
+    cindent, self._indent = self._indent, indent
+    try:
+      self._emit_line(line)
+    finally:
+      self._indent = cindent
+
+  def _float_literal(self, value):
+    if value != value:
+      return '_np.nan'
+    if value in (np.inf, -np.inf):
+      return Expr('_np.inf' if value > 0 else '-_np.inf')
+
+    return repr(value) if value >= 0 else Expr(repr(value))
+
+  def _int_literal(self, value):
+    return str(value) if value >= 0 else Expr(str(value))
+
+  def _float_round(self, xvalue, dtype):
+    if dtype.nbits > 64:
+      fatal(f'Unsupported floating point type: {dtype}')
+
+    fspec = self.float_spec(dtype)
+
+    return Expr(f'_fround({xvalue}, {fspec.exp}, {fspec.mant})', atomic=True)
+
+  def _wrap(self, xvalue, dtype):
+    if isinstance(dtype, (Uint, Bits)):
+      return Expr(f'{paren(xvalue)} & {_mask(dtype.nbits)}')
+    if isinstance(dtype, Sint):
+      return Expr(f'_sx({xvalue}, {dtype.nbits})', atomic=True)
+    if isinstance(dtype, Float):
+      return self._float_round(xvalue, dtype)
+
+    return xvalue
+
+  def _literal(self, value, dtype):
+    from . import pysim
+
+    if isinstance(value, enum.Enum):
+      value = value.value
+    if isinstance(value, str):
+      value = pycu.infer_value(value)
+      if isinstance(value, str):
+        fatal(f'Unable to convert to {dtype}: {value}')
+    if isinstance(value, np.generic):
+      value = value.item()
+
+    if isinstance(dtype, Bool):
+      return 'True' if value else 'False'
+    if isinstance(dtype, (Uint, Bits)):
+      ivalue = int(value) if not isinstance(value, float) else pysim._rint(value)
+
+      return self._int_literal(ivalue & _mask(dtype.nbits))
+    if isinstance(dtype, Sint):
+      ivalue = int(value) if not isinstance(value, float) else pysim._rint(value)
+
+      return self._int_literal(pysim._sx(ivalue, dtype.nbits))
+    if isinstance(dtype, Integer):
+      return self._int_literal(int(value) if not isinstance(value, float)
+                               else pysim._rint(value))
+    if isinstance(dtype, Real):
+      return self._float_literal(float(value))
+    if isinstance(dtype, Float):
+      if dtype.nbits > 64:
+        fatal(f'Unsupported floating point type: {dtype}')
+
+      fspec = self.float_spec(dtype)
+
+      return self._float_literal(pysim._fround(float(value), fspec.exp, fspec.mant))
+
+    fatal(f'Unknown type: {dtype}')
+
+  def _convert(self, value, dtype):
+    src, xvalue = value.dtype, self.svalue(value)
+    pvalue = paren(xvalue)
+
+    if isinstance(dtype, Bool):
+      if isinstance(src, Bool):
+        return xvalue
+      # Integer types to boolean conversions are AND reductions, like the other
+      # backends do.
+      if isinstance(src, (Uint, Bits)) and src.nbits > 1:
+        return Expr(f'{pvalue} == {_mask(src.nbits)}')
+      if isinstance(src, Sint) and src.nbits > 1:
+        return Expr(f'{pvalue} == -1')
+
+      return Expr(f'{pvalue} != 0')
+    elif isinstance(dtype, (Uint, Bits)):
+      nbits = dtype.nbits
+      if isinstance(src, (Uint, Bits)):
+        return xvalue if src.nbits <= nbits else self._wrap(xvalue, dtype)
+      if isinstance(src, Sint):
+        if src.nbits > nbits:
+          xvalue = Expr(f'_sresize({xvalue}, {nbits})', atomic=True)
+
+        return self._wrap(xvalue, dtype)
+      if isinstance(src, Integer):
+        return self._wrap(xvalue, dtype)
+      if isinstance(src, Real):
+        return self._wrap(Expr(f'_rint({xvalue})', atomic=True), dtype)
+      if isinstance(src, Bool):
+        return self._select(xvalue, '1', '0')
+    elif isinstance(dtype, Sint):
+      nbits = dtype.nbits
+      if isinstance(src, Sint):
+        return xvalue if src.nbits <= nbits else Expr(f'_sresize({xvalue}, {nbits})',
+                                                      atomic=True)
+      if isinstance(src, (Uint, Bits)):
+        return xvalue if src.nbits < nbits else self._wrap(xvalue, dtype)
+      if isinstance(src, Integer):
+        return self._wrap(xvalue, dtype)
+      if isinstance(src, Real):
+        return self._wrap(Expr(f'_rint({xvalue})', atomic=True), dtype)
+      if isinstance(src, Bool):
+        return self._select(xvalue, '-1' if nbits == 1 else '1', '0')
+    elif isinstance(dtype, Integer):
+      if isinstance(src, _INT_TYPES):
+        return xvalue
+      if isinstance(src, Bool):
+        return self._select(xvalue, '1', '0')
+      if isinstance(src, Real):
+        return Expr(f'_rint({xvalue})', atomic=True)
+      if isinstance(src, Float):
+        return Expr(f'_frint({xvalue})', atomic=True)
+    elif isinstance(dtype, Real):
+      if isinstance(src, Bool):
+        return self._select(xvalue, '1.0', '0.0')
+      if isinstance(src, (Real, Float)):
+        return xvalue
+      if isinstance(src, _INT_TYPES):
+        return Expr(f'_float({xvalue})', atomic=True)
+    elif isinstance(dtype, Float):
+      if isinstance(src, Bool):
+        return self._select(xvalue, '1.0', '0.0')
+      if isinstance(src, (Real, Float)):
+        return self._float_round(xvalue, dtype)
+      if isinstance(src, _INT_TYPES):
+        return self._float_round(f'_float({xvalue})', dtype)
+    else:
+      fatal(f'Unknown type: {dtype}', exc=TypeError)
+
+    fatal(f'Unable to convert to {dtype}: {src}')
+
+  def _try_convert_literal(self, value):
+    if isinstance(value, bool):
+      return Value(BOOL, 'True' if value else 'False')
+    if value is None:
+      return Value(VOID)
+    if isinstance(value, str):
+      bvalue = self._bitstring(value)
+      if bvalue is not None:
+        # Unknown/high impedance bits are simulated as zeros.
+        xbits = re.sub(r'[^01]', '0', bvalue)
+
+        return Value(Bits(len(bvalue)), f'0b{xbits}')
+
+      dtype, ivalue = self._match_intstring(value)
+      if dtype is not None:
+        return Value(dtype, self._literal(ivalue, dtype))
+
+    return value
+
+  def _scalar_cast(self, value, dtype):
+    if isinstance(value, Value):
+      return self._convert(value, dtype)
+
+    return self._literal(value, dtype)
+
+  def _do_cast(self, value, dtype):
+    if not isinstance(value, Value):
+      value = self._try_convert_literal(value)
+
+    if isinstance(value, np.ndarray):
+      shape = dtype.array_shape
+      if shape != tuple(value.shape):
+        fatal(f'Shape mismatch: {tuple(value.shape)} vs. {shape}')
+
+      element_type = dtype.element_type()
+      parts = [self._scalar_cast(value[idx].item(), element_type)
+               for idx in np.ndindex(shape)]
+
+      xvalue = Expr(f'_array({shape}, [{", ".join(parts)}])', atomic=True)
+    elif isinstance(value, Value) and value.dtype.array_shape:
+      shape, vshape = dtype.array_shape, value.dtype.array_shape
+      if shape != vshape:
+        fatal(f'Shape mismatch: {vshape} vs. {shape}')
+
+      evalue = Value(value.dtype.element_type(), '_e')
+      xelement = self._scalar_cast(evalue, dtype.element_type())
+
+      xvalue = Expr(f'_amap(lambda _e: {xelement}, {self.svalue(value)})', atomic=True)
+    else:
+      xvalue = self._scalar_cast(unwrap(value), dtype)
+      if dtype.array_shape:
+        xvalue = Expr(f'_afull({dtype.array_shape}, {xvalue})', atomic=True)
+
+    return xvalue
+
+  def _cast(self, value, dtype):
+    if isinstance(value, Value) and value.dtype == dtype:
+      return self.svalue(value)
+
+    return self._cached_cast(value, dtype)
+
+  def cast(self, value, dtype, isreg=None):
+    if isinstance(value, Value) and value.dtype == dtype:
+      return value
+
+    xvalue = self._cached_cast(value, dtype)
+    if isreg is None and isinstance(value, Value):
+      isreg = value.isreg
+
+    return Value(dtype, xvalue, isreg=isreg)
+
+  def _to_integer(self, value, dtype):
+    return self._cast(value, dtype)
+
+  def eval_tostring(self, value):
+    xvalue = self.svalue(value)
+    if isinstance(value, Value):
+      if isinstance(value.dtype, (Uint, Sint)):
+        return f'_hstr({xvalue}, {value.dtype.nbits})'
+      if isinstance(value.dtype, Bits):
+        return f'_bstr({xvalue}, {value.dtype.nbits})'
+      if isinstance(value.dtype, Bool):
+        return f'_bool_str({xvalue})'
+      if isinstance(value.dtype, Integer):
+        return f'_istr({xvalue})'
+      if isinstance(value.dtype, (Real, Float)):
+        return f'_real_str({xvalue})'
+
+    return self.quote_string(xvalue)
+
+  def quote_string(self, s):
+    return repr(s)
+
+  def eval_token(self, token):
+    if token == 'NOW':
+      return '_K.now_str()'
+
+  def _add_wait(self):
+    self._proc_waits += 1
+
+  def emit_finish(self):
+    self._add_wait()
+    self.emit_code('_K.finish()\nyield None')
+
+  def emit_wait_for(self, ts=None):
+    self._add_wait()
+    if ts is not None:
+      wts, tu = self._normalize_time(ts)
+      self.emit_code(f'yield _K.wait_for({round(wts)})')
+    else:
+      self.emit_code('yield None')
+
+  def emit_wait_rising(self, arg):
+    self._add_wait()
+    name = self._signal_name(arg)
+    self.emit_code(f'yield _K.wait_until(({name},), {name}.rising)')
+
+  def emit_wait_falling(self, arg):
+    self._add_wait()
+    name = self._signal_name(arg)
+    self.emit_code(f'yield _K.wait_until(({name},), {name}.falling)')
+
+  def emit_wait_until(self, arg):
+    self._add_wait()
+    xcond = self._cast(arg, BOOL)
+    names = ''.join(f'{name}, ' for name in pycu.enum_unique(_READ_RX.findall(xcond)))
+    self.emit_code(f'yield _K.wait_until(({names}), lambda: {xcond})')
+
+  def emit_write(self, parts):
+    self._emit_line('_K.write(' + ', '.join(parts) + ')')
+
+  def _gen_based_slice(self, idx, shape, base, step):
+    if idx == len(shape) - 1:
+      if step < 0:
+        fatal(f'Reversed bits slices are not supported: {step}')
+
+      return _BitSlice(pos=base, nbits=step)
+
+    return _ArraySlice(f'(\'b\', {base}, {abs(step)})')
+
+  def _gen_std_slice(self, idx, shape, start, stop, step):
+    if idx == len(shape) - 1:
+      if step < 0:
+        fatal(f'Reversed bits slices are not supported: {start}:{stop}:{step}')
+
+      return _BitSlice(pos=start, nbits=stop - start)
+
+    return _ArraySlice(f'(\'s\', {start}, {stop}, {step})')
+
+  def _gen_slice_access(self, value, coords):
+    xvalue = self.svalue(value)
+
+    ndims = len(value.dtype.array_shape)
+    acoords, bcoords = coords[: ndims], coords[ndims: ]
+    if acoords:
+      xcoords = ''.join(f'{c}, ' for c in acoords)
+      xvalue = Expr(f'_ix({xvalue}, ({xcoords}))', atomic=True)
+
+    if bcoords:
+      if not isinstance(value.dtype, (Uint, Sint, Bits)):
+        fatal(f'Bits selection not supported for type: {value.dtype}')
+      if any(isinstance(c, _ArraySlice) for c in acoords):
+        fatal(f'Bits selection of array slices not supported: {value}')
+
+      # Signed selections carry the source width, as stores need to sign-extend
+      # the updated value.
+      coord, nbits = bcoords[0], value.dtype.nbits
+      if isinstance(coord, _BitSlice):
+        if isinstance(value.dtype, Sint):
+          xvalue = f'_sbits({xvalue}, {coord.pos}, {coord.nbits}, {nbits})'
+        else:
+          xvalue = f'_bits({xvalue}, {coord.pos}, {coord.nbits})'
+      else:
+        if isinstance(value.dtype, Sint):
+          xvalue = f'_sbit({xvalue}, {coord}, {nbits})'
+        else:
+          xvalue = f'_bit({xvalue}, {coord})'
+
+      xvalue = Expr(xvalue, atomic=True)
+
+    return xvalue
+
+  def flush(self):
+    return _HEADER.split('\n') + self._load_libs() + self._expand()
+
+  def is_root_variable(self, var):
+    return var.isreg or var.is_const() or self._proc.kind == ROOT_PROCESS
+
+  def var_remap(self, var, is_store):
+    return var
+
+  def emit_declare_variable(self, name, var):
+    xinit = self._cast(var.init if var.init is not None else 0, var.dtype)
+
+    if var.is_const():
+      decl = f'{name} = {xinit}'
+    elif self.is_root_variable(var):
+      decl = f'{name} = _K.signal(_path + {name!r}, {xinit})'
+    else:
+      decl = f'{name} = _Var({xinit})'
+
+    self._emit_line(decl, dce_name=name, dce_decl=True)
+
+  def _store_value(self, root, xvalue):
+    return xvalue
+
+  def _store_code(self, target, xvalue, delay):
+    # Partial stores (array elements, bits) are turned into functional updates of
+    # the next value of the root signal/variable.
+    node = ast.parse(target, mode='eval').body
+    while isinstance(node, ast.Call):
+      fname = node.func.id
+      base = ast.unparse(_ToNext().visit(copy.deepcopy(node.args[0])))
+      args = ''.join(f'{ast.unparse(arg)}, ' for arg in node.args[1: ])
+      xvalue = f'_set{fname[1: ]}({base}, {args}{xvalue})'
+      node = node.args[0]
+
+    root = node.value.id if isinstance(node, ast.Attribute) else node.id
+    xvalue = self._store_value(root, xvalue)
+
+    if delay is not None:
+      return f'_K.schedule({root}, {xvalue}, {delay})'
+
+    return f'{root}.set({xvalue})'
+
+  def emit_assign(self, var, name, value):
+    xvalue = self._cast(value, var.dtype)
+
+    delay = self.get_context('delay')
+    if delay is not None:
+      if var.isreg is False:
+        fatal(f'Cannot use delay on wires: {var}')
+      if self._proc.kind == ROOT_PROCESS:
+        fatal(f'Cannot use delay within a root process: {var}')
+
+      dtime, _ = self._normalize_time(delay)
+      delay = round(dtime)
+
+    self._emit_line(self._store_code(var.value, xvalue, delay),
+                    dce_name=self._dce_target(var))
+
+  def make_port_arg(self, port_arg):
+    return port_arg.new_isreg(False)
+
+  def emit_entity(self, ent, kwargs, ent_name=None):
+    if ent_name is None:
+      ent_name = pyiu.cname(ent)
+
+    iname = self._get_entity_inst(ent_name)
+
+    eparams = kwargs.pop(PARAM_KEY, None)
+    if eparams is not None:
+      fatal(f'Entity parameters not supported by the {self.KIND} backend: {ent_name}')
+
+    binds = []
+    for pin in ent.PORTS:
+      arg = kwargs[pin.name]
+
+      if pin.is_ifc():
+        xargs = pin.ifc_expand(arg)
+      else:
+        xargs = ((pin, arg),)
+
+      for xpin, xarg in xargs:
+        if not isinstance(xarg, Value):
+          fatal(f'Argument must be a Value subclass: {xarg}')
+
+        path = f'{iname}.{xpin.name}'
+        ref = xarg.ref
+        if xarg.is_none():
+          zero = self._cast(0, xarg.dtype) if xarg.dtype != VOID else '0'
+          binds.append(f'{xpin.name}=_K.signal(_path + {path!r}, {zero})')
+        elif (ref is not None and ref.name == ref.vname and
+              (ref.vspec is None or not ref.vspec.const)):
+          binds.append(f'{xpin.name}={ref.name}')
+        else:
+          earg = self.svalue(xarg)
+          if _READ_RX.search(earg):
+            fatal(f'Port "{xpin.name}" of {ent_name} must be bound to a signal: {earg}')
+
+          binds.append(f'{xpin.name}=_K.signal(_path + {path!r}, {earg})')
+
+    with self.placement(self._entity_place):
+      self._emit_line(f'{ent_name}(_K, _path + {iname + "."!r}, ' + ', '.join(binds) + ')')
+
+  def _port_entry(self, pin, dtype):
+    return f'({pin.name!r}, {pin.idir!r}, {self._cast(0, dtype)})'
+
+  def emit_module_def(self, name, ent, comment=None):
+    self._mod_comment = comment
+
+    ports = [self._port_entry(ap.port, ap.arg.dtype) for ap in ent.expanded_ports()]
+
+    xports = ', '.join(ports) + (',' if len(ports) == 1 else '')
+    self._emit_line(f'_ENTITIES[{name!r}] = ({xports})')
+
+  def emit_module_decl(self, name, ent):
+    self._emit_line('')
+    if self._mod_comment:
+      self.emit_comment(self._mod_comment)
+
+    args = ''.join(f', {ap.port.name}' for ap in ent.expanded_ports())
+    self._emit_line(f'def {name}(_K, _path{args}):')
+    with self.indent():
+      self._emit_line(f'_K.instance(_path, {name!r})')
+
+    self.module_vars_place = self.emit_placement(extra_indent=1)
+    self._modules_place = self.emit_placement(extra_indent=1)
+    self._entity_place = self.emit_placement(extra_indent=1)
+
+  def emit_module_end(self):
+    for iid, inst in self._itor:
+      fatal(f'External modules not supported by the {self.KIND} backend: {inst.name}')
+
+    self._module_code_end()
+    self._module_reset()
+
+  def _read_signals(self, code):
+    lines = self._expand_helper(code, [])
+
+    return pycu.enum_unique(name for ln in lines for name in _READ_RX.findall(ln))
+
+  def _wait_on(self, names):
+    return 'yield _K.wait_on(' + ', '.join(names) + ')'
+
+  def _proc_fn(self):
+    return f'_p_{self._proc.name}'
+
+  @contextlib.contextmanager
+  def process(self, name, kind, args, sens):
+    with super().process(name, kind, args, sens):
+      if kind != ROOT_PROCESS:
+        yield self
+      else:
+        # Root processes code (the HDL concurrent statements) is wrapped into a
+        # process sensitive to all the signals it reads.
+        fname, indent = self._proc_fn(), self._indent
+        self._emit_line(f'def {fname}():')
+        self._emit_indented(indent + 1, 'while True:')
+
+        code = self._container()
+        start = len(code)
+
+        self._indent += 2
+        try:
+          yield self
+        finally:
+          self._indent = indent
+
+        if self._has_body(code[start: ]):
+          self._emit_indented(indent + 2, self._wait_on(self._read_signals(code[start: ])))
+          self._emit_line(f'_K.process(_path + {name!r}, {fname})')
+        else:
+          del code[start - 2: start]
+
+  def _edge_tests(self):
+    tests = []
+    for name, sens in (self._proc.sens or dict()).items():
+      if sens.trigger == POSEDGE:
+        tests.append(f'{name}.rising()')
+      elif sens.trigger == NEGEDGE:
+        tests.append(f'{name}.falling()')
+
+    return tests
+
+  def emit_process_decl(self):
+    self._proc_waits = 0
+
+    self._emit_line(f'def {self._proc_fn()}():')
+    self.process_vars_place = self.emit_placement(extra_indent=1)
+
+    with self.indent():
+      self._emit_line('while True:')
+
+    self._indent += 1
+    code = self._container()
+    self._proc_body = (code, len(code))
+
+    if tests := self._edge_tests():
+      with self.indent():
+        self._emit_line(self._wait_on(self._proc.sens.keys()))
+        self._emit_line('if not ' + paren(' or '.join(tests)) + ':')
+        with self.indent():
+          self._emit_line('continue')
+
+  def emit_process_end(self):
+    code, start = self._proc_body
+
+    with self.indent():
+      if self._proc.kind == INIT_PROCESS:
+        self._emit_line('yield None')
+      elif self._proc.sens:
+        if not self._edge_tests():
+          self._emit_line(self._wait_on(self._proc.sens.keys()))
+      elif self._proc.args.get('proc_mode') == 'comb':
+        self._emit_line(self._wait_on(self._read_signals(code[start: ])))
+      elif self._proc_waits == 0:
+        # A process with no wait statements would spin forever.
+        self._emit_line('yield None')
+
+    self._indent -= 1
+    self._emit_line(f'_K.process(_path + {self._proc.name!r}, {self._proc_fn()})')
+
+    self._proc_body = None
+    self._process_reset()
+
+  def emit_comment(self, msg):
+    for ln in msg.split('\n'):
+      self._emit_line(f'# {ln}')
+
+  def _has_body(self, code):
+    for ent in code:
+      if isinstance(ent, _Placement):
+        if self._has_body(ent.code):
+          return True
+      elif callable(ent) or (isinstance(ent, str) and not isinstance(ent, _DceLine)):
+        return True
+
+    return False
+
+  def _open_block(self):
+    code = self._container()
+    self._blocks.append((code, len(code)))
+
+  def _close_block(self):
+    # Lines subject to dead code elimination might be removed, so blocks made
+    # only of those need a "pass" as well.
+    code, start = self._blocks.pop()
+    if not self._has_body(code[start: ]):
+      self._emit_indented(self._indent + 1, 'pass')
+
+  def _pass_pad(self, indent=None, size=None, **kwargs):
+    spaces = ' ' * (self._indent_spaces * indent)
+
+    return (f'{spaces}pass',)
+
+  def emit_If(self, test):
+    xtest = self._cast(test, BOOL)
+    self._emit_line(f'if {xtest}:')
+    self._open_block()
+
+  def emit_Elif(self, test):
+    self._close_block()
+    xtest = self._cast(test, BOOL)
+    self._emit_line(f'elif {xtest}:')
+    self._open_block()
+
+  def emit_Else(self):
+    self._close_block()
+    self._emit_line(f'else:')
+    self._open_block()
+
+  def emit_EndIf(self):
+    self._close_block()
+
+  def emit_For(self, vname, start, end, step):
+    stop = end + (1 if step > 0 else -1)
+    self._emit_line(f'for {vname} in _range({start}, {stop}, {step}):')
+    self._open_block()
+
+  def emit_EndFor(self):
+    self._close_block()
+
+  def emit_Break(self):
+    self._emit_line(f'break')
+
+  def emit_Continue(self):
+    self._emit_line(f'continue')
+
+  def emit_Assert(self, test, parts):
+    xtest = self._cast(test, BOOL)
+    xparts = ''.join(f', {p}' for p in parts or ())
+    self._emit_line(f'_K.check({xtest}{xparts})')
+
+  def emit_match_cases(self, subject, cases):
+    mname = self._revgen.newname('_match')
+    self._emit_line(f'{mname} = {self.svalue(subject)}')
+
+    # Cases with multiple patterns share the same scope, and get merged into a
+    # single test.
+    groups = []
+    for mc in cases:
+      if groups and groups[-1][0] is mc.scope:
+        groups[-1][1].append(mc.pattern)
+      else:
+        groups.append((mc.scope, [mc.pattern]))
+
+    for i, (scope, patterns) in enumerate(groups):
+      if any(p is None for p in patterns):
+        self._emit_line('else:' if i > 0 else 'if True:')
+      else:
+        tests = [f'{mname} == {paren(self._cast(p, subject.dtype))}' for p in patterns]
+        self._emit_line(('elif ' if i > 0 else 'if ') + ' or '.join(tests) + ':')
+
+      if not self._has_body(scope.code):
+        scope.append(functools.partial(self._pass_pad, indent=scope.indent))
+
+      self._emit(scope, placement=self.curr_placement())
+
+  def _select(self, xtest, xtrue, xfalse):
+    return Expr(f'{paren(xtrue)} if {paren(xtest)} else {paren(xfalse)}')
+
+  def _bool_join(self, op, xargs):
+    return self._paren_join(f' {op} ', xargs)
+
+  def _bool_not(self, xvalue):
+    return Expr(f'not {paren(xvalue)}')
+
+  def _wide_operands(self, xleft, xright, nbits):
+    # Python integers have no width limits.
+    return xleft, xright
+
+  def _binop(self, op, xleft, xright):
+    return Expr(f'{paren(xleft)} {_OPSYMS[type(op)]} {paren(xright)}')
+
+  def eval_BinOp(self, op, left, right):
+    if isinstance(op, (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod)):
+      left, right = self._marshal_arith_op([left, right])
+      xleft, xright = self.svalue(left), self.svalue(right)
+      dtype = left.dtype
+
+      alog.debug(lambda: f'\tBinOp: {xleft}\t{pyiu.cname(op)}\t{xright}')
+      if isinstance(op, ast.Div):
+        if isinstance(dtype, (Real, Float)):
+          result = Expr(f'_fdiv({xleft}, {xright})', atomic=True)
+        else:
+          result = Expr(f'_idiv({xleft}, {xright})', atomic=True)
+      elif isinstance(op, ast.Mult) and isinstance(dtype, Sint):
+        # The full product is needed, as the truncation keeps its sign.
+        result = self._binop(op, *self._wide_operands(xleft, xright, 2 * dtype.nbits))
+      else:
+        result = self._binop(op, xleft, xright)
+
+      # Like numeric_std resize(), truncating signed multiplications keeps the sign.
+      if isinstance(op, ast.Mult) and isinstance(dtype, Sint):
+        result = Expr(f'_sresize({result}, {dtype.nbits})', atomic=True)
+      elif not isinstance(op, ast.Mod) or isinstance(dtype, Float):
+        result = self._wrap(result, dtype)
+
+      return Value(dtype, result)
+    elif isinstance(op, (ast.LShift, ast.RShift)):
+      left, right = self._marshal_shift_op(left, right)
+      xleft, xright = self.svalue(left), self.svalue(right)
+
+      alog.debug(lambda: f'\tBinOp: {xleft}\t{pyiu.cname(op)}\t{xright}')
+      result = self._binop(op, xleft, xright)
+      if isinstance(op, ast.LShift):
+        result = self._wrap(result, left.dtype)
+
+      return Value(left.dtype, result)
+    elif isinstance(op, (ast.BitOr, ast.BitXor, ast.BitAnd)):
+      left, right = self._marshal_bit_op([left, right])
+      xleft, xright = self.svalue(left), self.svalue(right)
+
+      alog.debug(lambda: f'\tBinOp: {xleft}\t{pyiu.cname(op)}\t{xright}')
+
+      return Value(left.dtype, self._binop(op, xleft, xright))
+    elif isinstance(op, ast.MatMult):
+      # Steal MatMult ('@') for concatenation!
+      dtype, (left, right) = self._marshal_concat_op([left, right])
+      xleft, xright = self.svalue(left), self.svalue(right)
+
+      alog.debug(lambda: f'\tBinOp: {xleft}\t{pyiu.cname(op)}\t{xright}')
+
+      rbits = right.dtype.nbits
+      if isinstance(dtype, Sint):
+        xleft = f'{paren(xleft)} & {_mask(left.dtype.nbits)}'
+        xright = f'{paren(xright)} & {_mask(rbits)}'
+
+      result = Expr(f'{paren(xleft)} << {rbits} | {paren(xright)}')
+      if isinstance(dtype, Sint):
+        result = self._wrap(result, dtype)
+
+      return Value(dtype, result)
+    else:
+      fatal(f'Unsupported operation: {op}')
+
+  def eval_UnaryOp(self, op, arg):
+    xvalue = self.svalue(arg)
+    dtype = arg.dtype
+
+    alog.debug(lambda: f'\tUnaryOp: {pyiu.cname(op)}\t{xvalue}')
+
+    if isinstance(op, ast.UAdd):
+      result = xvalue
+    elif isinstance(op, ast.USub):
+      result = self._wrap(Expr(f'-{paren(xvalue)}'), dtype)
+    elif isinstance(op, (ast.Not, ast.Invert)):
+      if isinstance(dtype, Bool):
+        result = self._bool_not(xvalue)
+      elif isinstance(dtype, (Uint, Bits)):
+        result = Expr(f'{paren(xvalue)} ^ {_mask(dtype.nbits)}')
+      elif isinstance(dtype, (Sint, Integer)):
+        result = Expr(f'~{paren(xvalue)}')
+      else:
+        fatal(f'Unsupported type for {pyiu.cname(op)}: {dtype}')
+    else:
+      fatal(f'Unsupported operation: {op}')
+
+    return Value(dtype, result)
+
+  def eval_BoolOp(self, op, args):
+    xargs = [self._cast(a, BOOL) for a in args]
+
+    alog.debug(lambda: f'\tBoolOp: {pyiu.cname(op)}\t{pyu.stri(xargs)}')
+
+    if isinstance(op, ast.And):
+      result = self._bool_join('and', xargs)
+    elif isinstance(op, ast.Or):
+      result = self._bool_join('or', xargs)
+    else:
+      fatal(f'Unsupported operation: {op}')
+
+    return Value(BOOL, result)
+
+  def eval_Compare(self, left, ops, comps):
+    comps = self._marshal_compare_op([left] + list(comps))
+    xcomps = [self.svalue(comp) for comp in comps]
+
+    alog.debug(lambda: f'\tCompare: {[pyiu.cname(x) for x in ops]}\t{pyu.stri(xcomps)}')
+
+    results = []
+    for i, op in enumerate(ops):
+      results.append(self._binop(op, xcomps[i], xcomps[i + 1]))
+
+    return Value(BOOL, self._bool_join('and', results))
+
+  def eval_Subscript(self, value, idx):
+    return self._gen_array_access(value, idx)
+
+  def eval_IfExp(self, test, body, orelse):
+    xtest = self._cast(test, BOOL)
+    body, orelse = self._marshal_ifexp_op([body, orelse])
+    xbody, xorelse = self.svalue(body), self.svalue(orelse)
+
+    alog.debug(lambda: f'\tIfExp: {xtest} ? {xbody} : {xorelse}')
+
+    return Value(body.dtype, self._select(xtest, xbody, xorelse))
+
+  # Extension functions.
+  def eval_is_nan(self, value):
+    if not isinstance(value.dtype, Float):
+      fatal(f'Unsupported type: {value.dtype}')
+
+    return Value(BOOL, Expr(f'_isnan({self.svalue(value)})', atomic=True))
+
+  def eval_is_inf(self, value):
+    if not isinstance(value.dtype, Float):
+      fatal(f'Unsupported type: {value.dtype}')
+
+    return Value(BOOL, Expr(f'_isinf({self.svalue(value)})', atomic=True))
+
+
+class PySimLanes_Emitter(PySim_Emitter):
+
+  def __init__(self, **kwargs):
+    super().__init__(**kwargs)
+    self._lane_blocks = []
+
+  def _lane_mask(self):
+    return self._lane_blocks[-1].mask if self._lane_blocks else None
+
+  def _uniform(self, what):
+    if self._lane_blocks:
+      fatal(f'{what} not supported within lane dependent conditionals')
+
+  def _lane_dtype(self, dtype):
+    if dtype.array_shape:
+      fatal(f'Array types not supported in lanes mode: {dtype}')
+
+    if isinstance(dtype, Bool):
+      return 'bool'
+    if isinstance(dtype, (Uint, Sint, Bits)):
+      # Wider types are carried as Python integers.
+      if dtype.nbits > 63:
+        return 'object'
+
+      prefix = 'int' if isinstance(dtype, Sint) else 'uint'
+
+      return f'{prefix}{max(8, 1 << (dtype.nbits - 1).bit_length())}'
+    if isinstance(dtype, Integer):
+      return 'int64'
+    if isinstance(dtype, Real):
+      return 'float64'
+    if isinstance(dtype, Float):
+      fspec = self.float_spec(dtype)
+      ldtype = _LANE_FLOATS.get((fspec.exp, fspec.mant))
+      if ldtype is None:
+        fatal(f'Unsupported floating point type in lanes mode: {dtype}')
+
+      return ldtype
+
+    fatal(f'Unknown type: {dtype}')
+
+  def _float_round(self, xvalue, dtype):
+    return Expr(f'_np.{self._lane_dtype(dtype)}({xvalue})', atomic=True)
+
+  def _wide_operands(self, xleft, xright, nbits):
+    # Integer lanes are evaluated as int64, so operations whose results need more
+    # bits are carried out using Python integers (object arrays).
+    if nbits > 63:
+      return (Expr(f'_obj({xleft})', atomic=True),
+              Expr(f'_obj({xright})', atomic=True))
+
+    return xleft, xright
+
+  def _select(self, xtest, xtrue, xfalse):
+    return Expr(f'_where({xtest}, {xtrue}, {xfalse})', atomic=True)
+
+  def _bool_join(self, op, xargs):
+    if len(xargs) == 1:
+      return xargs[0]
+
+    return Expr(f'_l{op}(' + ', '.join(xargs) + ')', atomic=True)
+
+  def _bool_not(self, xvalue):
+    return Expr(f'_lnot({xvalue})', atomic=True)
+
+  def _add_wait(self):
+    self._uniform('Wait statements')
+    super()._add_wait()
+
+  def _store_value(self, root, xvalue):
+    # Stores within conditionals only update the lanes whose mask is set.
+    mask = self._lane_mask()
+
+    return xvalue if mask is None else f'_where({mask}, {xvalue}, {root}.n)'
+
+  def _store_code(self, target, xvalue, delay):
+    if delay is not None:
+      self._uniform('Delayed assignments')
+
+    return super()._store_code(target, xvalue, delay)
+
+  def _port_entry(self, pin, dtype):
+    return f'({pin.name!r}, {pin.idir!r}, {self._cast(0, dtype)}, ' \
+      f'{self._lane_dtype(dtype)!r})'
+
+  def emit_declare_variable(self, name, var):
+    self._lane_dtype(var.dtype)
+    super().emit_declare_variable(name, var)
+
+  def _open_lane_block(self, xmask, parent, taken):
+    mname = self._revgen.newname('_lm')
+    self._emit_line(f'{mname} = {xmask}')
+    self._lane_blocks.append(_LaneBlock(parent=parent, mask=mname, taken=taken))
+    self._emit_line(f'if _any({mname}):')
+    self._open_block()
+
+  def _lane_and(self, parent, *xargs):
+    return self._bool_join('and', ([parent] if parent is not None else []) + list(xargs))
+
+  def _next_branch(self):
+    self._close_block()
+    blk = self._lane_blocks.pop()
+    if blk.taken is None:
+      return blk, blk.mask
+
+    tname = self._revgen.newname('_lt')
+    self._emit_line(f'{tname} = _lor({blk.taken}, {blk.mask})')
+
+    return blk, tname
+
+  def emit_If(self, test):
+    # Conditionals are turned into lane masks, and their branches are executed
+    # (with masked stores) whenever any lane takes them.
+    xtest = self._cast(test, BOOL)
+    parent = self._lane_mask()
+    self._open_lane_block(self._lane_and(parent, xtest), parent, None)
+
+  def emit_Elif(self, test):
+    xtest = self._cast(test, BOOL)
+    blk, taken = self._next_branch()
+    self._open_lane_block(self._lane_and(blk.parent, f'_lnot({taken})', xtest),
+                          blk.parent, taken)
+
+  def emit_Else(self):
+    blk, taken = self._next_branch()
+    self._open_lane_block(self._lane_and(blk.parent, f'_lnot({taken})'),
+                          blk.parent, taken)
+
+  def emit_EndIf(self):
+    self._close_block()
+    self._lane_blocks.pop()
+
+  def emit_Break(self):
+    self._uniform('Break statements')
+    super().emit_Break()
+
+  def emit_Continue(self):
+    self._uniform('Continue statements')
+    super().emit_Continue()
+
+  def emit_Assert(self, test, parts):
+    mask = self._lane_mask()
+    if mask is not None:
+      xtest = self._cast(test, BOOL)
+      test = Value(BOOL, Expr(f'_lor(_lnot({mask}), {xtest})', atomic=True))
+
+    super().emit_Assert(test, parts)
+
+  def emit_match_cases(self, subject, cases):
+    fatal(f'Match statements not supported in lanes mode')
@@ -33,6 +33,10 @@ _ForLoop = collections.namedtuple('ForLoop', 'data, ivar, start, end, step',
                                   defaults=(None, None, None, None))
 _Return = collections.namedtuple('Return', 'value, placement')
 _MatchCase = collections.namedtuple('MatchCase', 'pattern, scope')
+_PipeStage = collections.namedtuple('PipeStage', 'place, values')
+
+_SHARED_OPS = (ast.Mult, ast.Div, ast.Mod)
+_SHARED_FLOAT_OPS = (ast.Add, ast.Sub)
 
 _CGENCTX = 'pyxhdl.CodeGen'
 _CODEFMT_RX = r'(?<!\{)\{([^{][^}]*(\}\}[^}]+)*)\}'
@@ -92,6 +96,38 @@ class _SourceLocation:
     self.lineno = self.base_lineno + lineno - 1
 
 
+class _Pipeline:
+
+  def __init__(self):
+    self.stages = []
+    self.regs = set()
+
+
+class _ShareSlot:
+
+  def __init__(self, op, var):
+    self.op = op
+    self.var = var
+    self.operands = dict()
+    self.places = dict()
+
+
+class _ShareChain:
+
+  def __init__(self, place, kinds):
+    self.place = place
+    self.kinds = kinds
+    self.tests = []
+    self.slots = dict()
+    self.outputs = set()
+    self.stores = set()
+    self.counts = None
+
+  def branch(self, test):
+    self.tests.append(test)
+    self.counts = collections.defaultdict(int)
+
+
 class _Storer:
 
   def __init__(self, fn):
@@ -647,6 +683,9 @@ class CodeGen(_ExecVisitor):
     self._ent_versions = EntityVersions()
     self._vars_places = []
     self._root_vars = dict()
+    self._pipeline = None
+    self._share = None
+    self._share_chains = []
     self._setup_handlers()
 
   def _setup_handlers(self):
@@ -724,9 +763,189 @@ class CodeGen(_ExecVisitor):
                     isreg=shvar.isreg)
       elif isinstance(ctx, ast.Load):
         fatal(f'Undefined variable: {name}', exc=NameError)
+    elif self._pipeline is not None and self._pipeline.stages and isinstance(ctx, ast.Load):
+      var = self._pipeline_load(name, var)
 
     return self.emitter.var_remap(var, isinstance(ctx, ast.Store))
 
+  def _is_pipeline_value(self, value):
+    vref = value.ref
+    if vref is None:
+      return value.init is None
+    if vref.name in self._pipeline.regs:
+      return True
+
+    vspec = vref.vspec
+    if vspec is not None:
+      if vspec.const:
+        return False
+      if vspec.port is not None:
+        # Only input ports are delayed, outputs are the pipeline destinations.
+        return vref.mode == Ref.RO
+
+    return not value.isreg
+
+  def pipeline_stage(self):
+    if self._pipeline is None or not self.emitter.is_clocked_process():
+      fatal(f'Pipeline stages can only be inserted within clocked processes')
+
+    values = dict()
+    for name, value in self.locals.items():
+      if isinstance(value, Value) and self._is_pipeline_value(value):
+        values[name] = value
+
+    self._pipeline.stages.append(_PipeStage(place=self.emitter.emit_placement(),
+                                            values=values))
+
+    return len(self._pipeline.stages)
+
+  def _pipeline_register(self, stage, name, value):
+    vname = self._revgen.newname(f'{name}_s{stage}', shortzero=True)
+
+    reg = Value(value.dtype, Ref(vname, vname=vname), isreg=True)
+    self._add_variable(vname, reg.dtype, reg.isreg)
+    self._pipeline.regs.add(vname)
+
+    with self.emitter.placement(self._pipeline.stages[stage - 1].place):
+      self._assign_variable(reg, value, vname)
+
+    return reg
+
+  def _pipeline_load(self, name, var):
+    # The stage registers are created lazily, when a value captured by the
+    # pipeline_stage() markers is used after them, so values which are not
+    # used in later stages do not generate registers.
+    stages = self._pipeline.stages
+    first = len(stages)
+    while first > 0 and stages[first - 1].values.get(name) is var:
+      first -= 1
+
+    if first < len(stages):
+      for i in range(first, len(stages)):
+        var = self._pipeline_register(i + 1, name, var)
+
+      self._store_value(name, var)
+
+    return var
+
+  @contextlib.contextmanager
+  def _sharing(self, share):
+    prev, self._share = self._share, share
+    try:
+      yield share
+    finally:
+      self._share = prev
+
+  @contextlib.contextmanager
+  def _share_chain(self, share):
+    # Keeps track of all the active chains, as the variables stored within nested
+    # ones (or within HDL loops) are stored within the enclosing ones as well.
+    if share is not None:
+      self._share_chains.append(share)
+    try:
+      yield share
+    finally:
+      if share is not None:
+        self._share_chains.pop()
+
+  def _share_kinds(self, node):
+    # Only the kinds of operations appearing within at least two branches of the
+    # chain can end up sharing an operator.
+    bodies, enode = [node.body], node
+    while len(enode.orelse) == 1 and isinstance(enode.orelse[0], ast.If):
+      enode = enode.orelse[0]
+      bodies.append(enode.body)
+    bodies.append(enode.orelse)
+
+    counts = collections.Counter()
+    for body in bodies:
+      counts.update({pyiu.classof(snode.op) for insn in body for snode in ast.walk(insn)
+                     if isinstance(snode, (ast.BinOp, ast.AugAssign))})
+
+    return {kind for kind, count in counts.items() if count > 1}
+
+  def _share_begin(self, node):
+    if self.emitter.share_ops_enabled():
+      return _ShareChain(self.emitter.emit_placement(), self._share_kinds(node))
+
+  def _share_branch(self, test):
+    if self._share is not None:
+      self._share.branch(test)
+
+  def _is_shareable(self, op, left, right):
+    if (self._share is None or not isinstance(left, Value) or
+        not isinstance(right, Value) or pyiu.classof(op) not in self._share.kinds):
+      return False
+    if isinstance(left.dtype, Float) or isinstance(right.dtype, Float):
+      # Pipelined floating point operations are module instances with their own
+      # latency, which cannot be moved ahead of the chain.
+      if not isinstance(op, _SHARED_OPS + _SHARED_FLOAT_OPS) or self.emitter.fp_latency() > 0:
+        return False
+    elif not isinstance(op, _SHARED_OPS):
+      return False
+
+    # Operations fed by the results of other shared ones are left alone, as the
+    # two might end up sharing each other within different branches. The same
+    # goes for the ones reading variables stored within the chain, as the shared
+    # operator inputs are computed ahead of it, and would see the old values.
+    for arg in (left, right):
+      names = re.findall(r'[A-Za-z_]\w*', self.emitter.svalue(arg))
+      if not (self._share.outputs.isdisjoint(names) and
+              self._share.stores.isdisjoint(names)):
+        return False
+
+    return True
+
+  def _share_op(self, op, left, right):
+    share = self._share
+    key = (pyiu.classof(op), left.dtype, right.dtype)
+    index = share.counts[key]
+    share.counts[key] = index + 1
+
+    slot = share.slots.get((key, index))
+    if slot is None:
+      value = self.emitter.eval_BinOp(op, left, right)
+      vname = self._revgen.newname('share', shortzero=True)
+      self._add_variable(vname, value.dtype, False)
+
+      slot = _ShareSlot(op, Value(value.dtype, Ref(vname, vname=vname), isreg=False))
+      share.slots[(key, index)] = slot
+      share.outputs.add(vname)
+
+    branch = len(share.tests) - 1
+    slot.operands[branch] = (left, right)
+    slot.places[branch] = self.emitter.emit_placement()
+
+    return Value(slot.var.dtype, self.emitter.svalue(slot.var))
+
+  def _share_mux(self, share, slot, pos):
+    branches = sorted(slot.operands.keys(), reverse=True)
+    # The last branch using the slot is the default, as when no branch using it
+    # is taken, its inputs do not matter.
+    result = slot.operands[branches[0]][pos]
+    for branch in branches[1:]:
+      value = slot.operands[branch][pos]
+      if self.emitter.svalue(value) != self.emitter.svalue(result):
+        result = self.emitter.eval_IfExp(share.tests[branch], value, result)
+
+    return result
+
+  def _share_end(self, share):
+    for slot in share.slots.values():
+      if len(slot.operands) > 1:
+        with self.emitter.placement(share.place):
+          value = self.emitter.eval_BinOp(slot.op,
+                                          self._share_mux(share, slot, 0),
+                                          self._share_mux(share, slot, 1))
+          self._assign_variable(slot.var, value, slot.var.name)
+      else:
+        # Slots used by a single branch (operations of the same kind, but with
+        # different operand types) are computed in place, right before their use.
+        (branch, (left, right)), = slot.operands.items()
+        with self.emitter.placement(slot.places[branch]):
+          value = self.emitter.eval_BinOp(slot.op, left, right)
+          self._assign_variable(slot.var, value, slot.var.name)
+
   def _new_variable(self, name, value):
     isreg = value.isreg if value.isreg is not None else False
 
@@ -766,6 +985,16 @@ class CodeGen(_ExecVisitor):
       if is_ro_ref(var):
         fatal(f'Trying to assign {var.name} which is read-only')
 
+      # Registers keep their value until the end of clocked processes, so only the
+      # stores to wires (process variables) affect the shared operators inputs. In
+      # non clocked processes register stores are visible right away as well (in
+      # Verilog those are blocking assignments).
+      if self._share_chains and not (var.isreg and self.emitter.is_clocked_process()):
+        names = re.findall(r'[A-Za-z_]\w*', self.emitter.svalue(var))
+        for share in self._share_chains:
+          share.stores.update(names)
+
+      self.emitter.cse_invalidate(var)
       self.emitter.emit_assign(var, name, value)
 
   def _assign_value(self, var, value, name):
@@ -1036,6 +1265,15 @@ class CodeGen(_ExecVisitor):
 
   def generate_process(self, func, args, kwargs=None, sensitivity=None,
                        process_kind=None, process_args=None):
+    pipeline, self._pipeline = self._pipeline, _Pipeline()
+    try:
+      return self._generate_process(func, args, kwargs, sensitivity,
+                                    process_kind, process_args)
+    finally:
+      self._pipeline = pipeline
+
+  def _generate_process(self, func, args, kwargs, sensitivity, process_kind,
+                        process_args):
     with self.emitter.process(pyiu.func_name(func),
                               process_kind,
                               process_args,
@@ -1115,10 +1353,53 @@ class CodeGen(_ExecVisitor):
     value = self.eval_node(node.value)
     self.push_result(value)
 
+  def _lookup_variable(self, name):
+    for svars in reversed(self._variables):
+      var = svars.get(name)
+      if var is not None:
+        return var
+
+    return self._root_vars.get(name)
+
+  def _const_value(self, value):
+    if isinstance(value, Value):
+      cvalue = self.emitter.literal_value(value)
+      if cvalue is NONE and (vspec := value.vspec) is not None and vspec.const:
+        # Make sure the name resolves to the same variable the value refers to,
+        # by checking the VSpec identity.
+        var = self._lookup_variable(value.name)
+        if (var is not None and var.vspec is vspec and
+            type(var.init) in (bool, int) and not value.dtype.array_shape):
+          cvalue = var.init
+          if isinstance(value.dtype, Bool):
+            cvalue = bool(cvalue)
+
+      return cvalue
+
+    return value if type(value) in (bool, int) else NONE
+
+  def _fold(self, fname, *args):
+    if self.emitter.const_fold_enabled():
+      return getattr(self.emitter, fname)(*args, self._const_value)
+
+  def _const_operands(self, args):
+    return (self.emitter.const_fold_enabled() and
+            all(self._const_value(arg) is not NONE for arg in args))
+
+  def _static_test(self, test):
+    if isinstance(test, Value) and self.emitter.const_fold_enabled():
+      cvalue = self._const_value(test)
+      if cvalue is not NONE:
+        return bool(cvalue)
+
+    return test
+
   def visit_UnaryOp(self, node):
     operand = self.eval_node(node.operand)
     if has_hdl_vars(operand):
-      result = self.emitter.eval_UnaryOp(node.op, operand)
+      result = self._fold('fold_UnaryOp', node.op, operand)
+      if result is None:
+        result = self.emitter.cse_value(self.emitter.eval_UnaryOp(node.op, operand))
     else:
       result = self._static_eval(node)
 
@@ -1134,7 +1415,17 @@ class CodeGen(_ExecVisitor):
     left = self.eval_node(node.left)
     right = self.eval_node(node.right)
     if has_hdl_vars((left, right)):
-      result = self.emitter.eval_BinOp(node.op, left, right)
+      if self._const_operands((left, right)):
+        # Folding needs the result type, so the operation is evaluated only once,
+        # and its value used when folding is not possible.
+        value = self.emitter.eval_BinOp(node.op, left, right)
+        result = self._fold('fold_BinOp', node.op, left, right, value)
+        if result is None:
+          result = self.emitter.cse_value(value)
+      elif self._is_shareable(node.op, left, right):
+        result = self._share_op(node.op, left, right)
+      else:
+        result = self.emitter.cse_value(self.emitter.eval_BinOp(node.op, left, right))
     else:
       result = self._static_eval(node)
 
@@ -1160,7 +1451,9 @@ class CodeGen(_ExecVisitor):
 
     if result is None:
       if has_hdl_vars(values):
-        result = self.emitter.eval_BoolOp(node.op, values)
+        result = self._fold('fold_BoolOp', node.op, values)
+        if result is None:
+          result = self.emitter.cse_value(self.emitter.eval_BoolOp(node.op, values))
       else:
         result = self._static_eval(node)
 
@@ -1174,7 +1467,10 @@ class CodeGen(_ExecVisitor):
       comparators.append(xcomp)
 
     if has_hdl_vars((left, comparators)):
-      result = self.emitter.eval_Compare(left, node.ops, comparators)
+      result = self._fold('fold_Compare', left, node.ops, comparators)
+      if result is None:
+        result = self.emitter.cse_value(self.emitter.eval_Compare(left, node.ops,
+                                                                  comparators))
     else:
       result = self._static_eval(node)
 
@@ -1356,7 +1652,10 @@ class CodeGen(_ExecVisitor):
     value = self.eval_node(node.value)
 
     if has_hdl_vars((ref_value, value)):
-      result = self.emitter.eval_BinOp(node.op, ref_value, value)
+      if self._is_shareable(node.op, ref_value, value):
+        result = self._share_op(node.op, ref_value, value)
+      else:
+        result = self.emitter.eval_BinOp(node.op, ref_value, value)
     else:
       result = self._neval(node, ast.BinOp, op=node.op, left=ltarget, right=node.value)
 
@@ -1391,11 +1690,11 @@ class CodeGen(_ExecVisitor):
       alog.warning(f'Unable to find function object: {node.name}')
 
   def _handle_IfExp(self, node):
-    test = self.eval_node(node.test)
+    test = self._static_test(self.eval_node(node.test))
     if has_hdl_vars(test):
       body = self.eval_node(node.body)
       orelse = self.eval_node(node.orelse)
-      result = self.emitter.eval_IfExp(test, body, orelse)
+      result = self.emitter.cse_value(self.emitter.eval_IfExp(test, body, orelse))
     else:
       if test:
         result = self.eval_node(node.body)
@@ -1405,36 +1704,19 @@ class CodeGen(_ExecVisitor):
     self.push_result(result)
 
   def _handle_If(self, node):
-    test = self.eval_node(node.test)
+    test = self._static_test(self.eval_node(node.test))
 
     if has_hdl_vars(test):
-      with self._return_capture():
-        self.emitter.emit_If(test)
-        with self.emitter.indent():
-          for insn in node.body:
-            self.eval_node(insn)
-
-        enode, enodes = node, []
-        while len(enode.orelse) == 1 and isinstance(enode.orelse[0], ast.If):
-          enode = enode.orelse[0]
-          etest = self.eval_node(enode.test)
-          if has_hdl_vars(etest):
-            self.emitter.emit_Elif(etest)
-            with self.emitter.indent():
-              for insn in enode.body:
-                self.eval_node(insn)
-          elif etest:
-            # Instructions which are part of a statically (no HDL) True "elif" branch
-            # are emitted after the "if" instruction.
-            enodes.extend(enode.body)
-
-        if enode.orelse or enodes:
-          self.emitter.emit_Else()
-          with self.emitter.indent():
-            for insn in enodes + (enode.orelse or []):
-              self.eval_node(insn)
-
-        self.emitter.emit_EndIf()
+      share = self._share_begin(node)
+      with self._return_capture(), self._sharing(share), self._share_chain(share):
+        # The shared operators inputs are computed ahead of the chain, so they
+        # cannot be fed by temporaries hoisted within its branches.
+        no_hoist = self.emitter.cse_no_hoist() if share else contextlib.nullcontext()
+        with no_hoist:
+          self._if_chain(node, test)
+
+      if share is not None:
+        self._share_end(share)
     else:
       alog.debug(lambda: f'Resolving static If test: {asu.dump(node.test)}')
       if test:
@@ -1444,6 +1726,43 @@ class CodeGen(_ExecVisitor):
         for insn in node.orelse:
           self.eval_node(insn)
 
+  def _if_chain(self, node, test):
+    self._share_branch(test)
+    self.emitter.emit_If(test)
+    with self.emitter.indent():
+      for insn in node.body:
+        self.eval_node(insn)
+
+    enode, enodes = node, None
+    while (enodes is None and len(enode.orelse) == 1 and
+           isinstance(enode.orelse[0], ast.If)):
+      enode = enode.orelse[0]
+      # At this point the code of the previous branch has been emitted, so any
+      # temporary created by the "elif" test would land within it.
+      with self.emitter.cse_no_hoist(), self._sharing(None):
+        etest = self._static_test(self.eval_node(enode.test))
+      if has_hdl_vars(etest):
+        self._share_branch(etest)
+        self.emitter.emit_Elif(etest)
+        with self.emitter.indent():
+          for insn in enode.body:
+            self.eval_node(insn)
+      elif etest:
+        # Instructions which are part of a statically (no HDL) True "elif" branch
+        # become the "else" branch, and make the following ones unreachable.
+        enodes = enode.body
+
+    if enodes is None:
+      enodes = enode.orelse
+    if enodes:
+      self._share_branch(None)
+      self.emitter.emit_Else()
+      with self.emitter.indent():
+        for insn in enodes:
+          self.eval_node(insn)
+
+    self.emitter.emit_EndIf()
+
   def _decode_for_loop(self, node):
     idata = self.eval_node(node.iter)
 
@@ -1481,10 +1800,15 @@ class CodeGen(_ExecVisitor):
   def _hdl_For(self, node, floop):
     loop_var = mkwire(INT, name=floop.ivar, const=True)
 
+    # Operations within HDL loops depend on the loop variable, and cannot have their
+    # inputs computed ahead of an enclosing "if" chain.
     with (self._loop(_LoopContext(mode=_LoopModes.HDL)),
-          self._exec_locals({floop.ivar: loop_var})):
+          self._exec_locals({floop.ivar: loop_var}),
+          self._sharing(None)):
       self.emitter.emit_For(floop.ivar, floop.start, floop.end, floop.step)
-      with self.emitter.indent():
+      # Expressions computed before the loop might be invalidated by assignments
+      # happening later within the loop body, so they cannot be reused.
+      with self.emitter.cse_scope(barrier=True), self.emitter.indent():
         for insn in node.body:
           self.eval_node(insn)
 
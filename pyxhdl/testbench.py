@@ -22,7 +22,10 @@ from .wrap import *
 from . import xlib as XL
 
 
-TbData = collections.namedtuple('TbData', 'inputs, outputs, wait, wait_expr, env')
+# Entries with preamble=True (like resets) are replayed at the beginning of every
+# testbench shard.
+TbData = collections.namedtuple('TbData', 'inputs, outputs, wait, wait_expr, env, preamble',
+                                defaults=(False,))
 
 
 class _TestData:
@@ -75,7 +78,28 @@ class _TestData:
                    outputs=outputs,
                    wait=wait,
                    wait_expr=wait_expr,
-                   env=self._env)
+                   env=self._env,
+                   preamble=data.get('_preamble', False))
+
+
+def _shard_data(data, shards, shard):
+  # Iterators can yield sequences of TbData, which are treated as an unbreakable
+  # group when splitting the vectors among shards.
+  index = 0
+  for entry in data:
+    group = (entry,) if isinstance(entry, TbData) else tuple(entry)
+    if all(x.preamble for x in group):
+      yield from group
+    else:
+      if shards is None or index % shards == shard:
+        yield from group
+      index += 1
+
+
+def shard_path(path, shard):
+  base, ext = os.path.splitext(path)
+
+  return f'{base}_shard{shard}{ext}'
 
 
 class _Required:
@@ -93,6 +117,8 @@ _TB_ARGS = dict(
   clock_sync=None,
   write_output=False,
   toll=_STD_TOLL,
+  shards=None,
+  shard=None,
 )
 
 
@@ -109,6 +135,12 @@ def add_arguments(parser):
                       help='Whether a write to STDOUT should be generated for every input')
   parser.add_argument('--tb_toll', type=float,
                       help='The tollerance in comparing floating point values')
+  parser.add_argument('--tb_shards', type=int,
+                      help='The number of independent testbenches the input vectors ' \
+                      'should be split into')
+  parser.add_argument('--tb_shard', type=int,
+                      help='The testbench shard to be generated (all of them, within ' \
+                      'separated files, if missing)')
 
 
 def _make_args(args):
@@ -291,6 +323,13 @@ class TestBench(Entity):
     self._clocks = _parse_clocks(args)
 
   def _input_data(self):
+    shards, shard = self._tbargs['shards'], self._tbargs['shard']
+    if shards is not None and not (0 <= (shard or 0) < shards):
+      fatal(f'Invalid testbench shard {shard} (should be within [0, {shards}))')
+
+    return _shard_data(self._source_data(), shards, shard or 0)
+
+  def _source_data(self):
     _, ext = os.path.splitext(self._tbargs['input_file'])
     if ext == '.py':
       # Inputs comes from a Python file.
@@ -384,8 +423,12 @@ class TestBench(Entity):
       yield pfn
 
 
-def generate(codegen, args, eclass, inputs):
-  tb_args = dict(args=_make_args(args), eclass=eclass, inputs=inputs)
+def generate(codegen, args, eclass, inputs, shard=None):
+  targs = _make_args(args)
+  if shard is not None:
+    targs['shard'] = shard
+
+  tb_args = dict(args=targs, eclass=eclass, inputs=inputs)
 
   codegen.generate_entity(TestBench, tb_args)
 
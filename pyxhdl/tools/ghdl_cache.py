@@ -0,0 +1,106 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+
+import py_misc_utils.alog as alog
+import py_misc_utils.utils as pyu
+
+
+def default_cache_path():
+  if path := os.getenv('PYXHDL_GHDL_CACHE'):
+    return path
+
+  cache_root = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+
+  return os.path.join(cache_root, 'pyxhdl', 'ghdl')
+
+
+class GhdlLibCache:
+
+  def __init__(self, xpath, cache_path, analyze_args):
+    self._xpath = xpath
+    self._cache_path = cache_path
+    self._analyze_args = tuple(analyze_args)
+    self._version = None
+
+  def _ghdl_version(self):
+    if self._version is None:
+      try:
+        self._version = subprocess.check_output([self._xpath, '--version'],
+                                                stderr=subprocess.STDOUT)
+      except (OSError, subprocess.CalledProcessError) as ex:
+        pyu.fatal(f'Unable to query GHDL version ({self._xpath}): {ex}')
+
+    return self._version
+
+  def _lib_hash(self, lib_files):
+    hasher = hashlib.sha256()
+    hasher.update(self._xpath.encode())
+    hasher.update(self._ghdl_version())
+    for arg in self._analyze_args:
+      hasher.update(arg.encode())
+
+    for path in lib_files:
+      with open(path, mode='rb') as fd:
+        hasher.update(fd.read())
+
+    return hasher.hexdigest()
+
+  def _analyze(self, lib_files, workdir):
+    cmdline = [self._xpath, '-a', f'--workdir={workdir}', *self._analyze_args,
+               *lib_files]
+
+    alog.debug(f'Analyzing GHDL cached libraries: {cmdline}')
+    try:
+      subprocess.check_output(cmdline, stderr=subprocess.STDOUT)
+    except subprocess.CalledProcessError as ex:
+      pyu.fatal(f'Library analysis exited with {ex.returncode} code: {cmdline}\n' \
+                f'Error output:\n' + ex.output.decode())
+
+  def _copy_sources(self, lib_files, src_path):
+    # GHDL records the absolute path of the analyzed sources within the work
+    # library, and re-reads them at elaboration time, so these need to live as
+    # long as the cache entry does.
+    os.makedirs(src_path, exist_ok=True)
+
+    src_files = []
+    for i, path in enumerate(lib_files):
+      dest = os.path.join(src_path, f'{i}-{os.path.basename(path)}')
+      if not os.path.isfile(dest):
+        tmp_dest = f'{dest}.{os.getpid()}.tmp'
+        shutil.copyfile(path, tmp_dest)
+        os.replace(tmp_dest, dest)
+
+      src_files.append(dest)
+
+    return src_files
+
+  def lib_workdir(self, lib_files):
+    lib_hash = self._lib_hash(lib_files)
+    entry_path = os.path.join(self._cache_path, lib_hash)
+    workdir = os.path.join(entry_path, 'work')
+    if not os.path.isdir(workdir):
+      src_files = self._copy_sources(lib_files, os.path.join(entry_path, 'src'))
+
+      # Analyze within a temporary folder and rename it in place once done, so
+      # that concurrent users never see a partially populated library.
+      tmp_path = tempfile.mkdtemp(dir=entry_path, prefix='.tmp_')
+      try:
+        self._analyze(src_files, tmp_path)
+      except:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+      try:
+        os.rename(tmp_path, workdir)
+        alog.info(f'Cached GHDL libraries {lib_files} in {workdir}')
+      except OSError:
+        # Somebody else won the race, and the cached library is there already.
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    return workdir
+
+  def populate(self, dest_path, lib_files):
+    shutil.copytree(self.lib_workdir(lib_files), dest_path, dirs_exist_ok=True)
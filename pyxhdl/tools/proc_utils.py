@@ -0,0 +1,128 @@
+import collections
+import os
+import platform
+import signal
+import subprocess
+import threading
+import time
+
+
+class ProcCancelled(Exception):
+  pass
+
+
+def _kill(proc):
+  # Using Popen.kill() here would poll the process, possibly reaping it before
+  # run_command() gets to collect its resource usage. The PID cannot be recycled
+  # before run_command() reaps it, so signaling it directly is safe.
+  # Many tools are wrapper scripts, so the whole process group (created by
+  # run_command() with start_new_session=True) needs to be killed.
+  try:
+    os.killpg(proc.pid, signal.SIGKILL)
+  except ProcessLookupError:
+    pass
+
+
+class ProcSet:
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._procs = set()
+    self._cancelled = False
+
+  @property
+  def cancelled(self):
+    return self._cancelled
+
+  def add(self, proc):
+    with self._lock:
+      if self._cancelled:
+        _kill(proc)
+      self._procs.add(proc)
+
+  def remove(self, proc):
+    with self._lock:
+      self._procs.discard(proc)
+
+  def cancel(self):
+    with self._lock:
+      self._cancelled = True
+      for proc in self._procs:
+        _kill(proc)
+
+
+def _rusage_peak_rss(rusage):
+  # The ru_maxrss field is in KB on Linux, while it is in bytes on MacOS.
+  maxrss = rusage.ru_maxrss
+
+  return maxrss * 1024 if platform.system() != 'Darwin' else maxrss
+
+
+def _read_output(proc, line_fn, tail_lines):
+  # Streams the output lines to the line_fn() callback, which can stop the
+  # process by returning True. Only the last tail_lines lines are retained.
+  tail = collections.deque(maxlen=tail_lines)
+  stopped = False
+  for line in proc.stdout:
+    tail.append(line)
+    if line_fn(line):
+      stopped = True
+      _kill(proc)
+      break
+
+  return b''.join(tail), stopped
+
+
+def run_command(cmdline, timeout=None, procs=None, line_fn=None, tail_lines=1000,
+                **kwargs):
+  start = time.perf_counter()
+  proc = subprocess.Popen(cmdline, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          start_new_session=True, **kwargs)
+  if procs is not None:
+    procs.add(proc)
+
+  timed_out = threading.Event()
+
+  def timeout_kill():
+    timed_out.set()
+    _kill(proc)
+
+  timer = threading.Timer(timeout, timeout_kill) if timeout else None
+  try:
+    if timer is not None:
+      timer.start()
+
+    if line_fn is None:
+      output, stopped = proc.stdout.read(), False
+    else:
+      output, stopped = _read_output(proc, line_fn, tail_lines)
+    proc.stdout.close()
+
+    # Wait for the process to exit, without reaping it, so that nobody can be
+    # signaling a recycled PID once the process is dropped from the killers.
+    os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+  except BaseException:
+    _kill(proc)
+    raise
+  finally:
+    if timer is not None:
+      timer.cancel()
+      timer.join()
+    if procs is not None:
+      procs.remove(proc)
+
+  # Reaping the child ourselves lets us collect its own resource usage, instead
+  # of the cumulative one RUSAGE_CHILDREN would return.
+  _, status, rusage = os.wait4(proc.pid, 0)
+  proc.returncode = os.waitstatus_to_exitcode(status)
+
+  elapsed = time.perf_counter() - start
+  if proc.returncode != 0 and not stopped:
+    if procs is not None and procs.cancelled:
+      raise ProcCancelled(f'Process cancelled: {cmdline}')
+    if timed_out.is_set():
+      raise subprocess.TimeoutExpired(cmdline, timeout, output=output)
+
+    raise subprocess.CalledProcessError(proc.returncode, cmdline, output=output)
+
+  return output, elapsed, _rusage_peak_rss(rusage)
@@ -0,0 +1,157 @@
+import collections
+import json
+import time
+import xml.etree.ElementTree as ET
+
+import py_misc_utils.alog as alog
+
+from . import proc_utils as pcu
+
+
+Phase = collections.namedtuple('Phase', 'name, time, peak_rss')
+
+
+def count_lines(path):
+  with open(path, mode='rb') as fd:
+    return sum(1 for _ in fd)
+
+
+class TestResult:
+
+  def __init__(self, name, tool, backend=None, source=None):
+    self.name = name
+    self.tool = tool
+    self.backend = backend
+    self.source = source
+    self.phases = []
+    self.lines = None
+    self.mismatches = 0
+    self.mismatch_lines = []
+    self.errors = []
+
+  def add_phase(self, name, elapsed, peak_rss):
+    self.phases.append(Phase(name=name, time=elapsed, peak_rss=peak_rss))
+
+  def set_mismatches(self, lines, max_lines=100):
+    self.mismatches = len(lines)
+    self.mismatch_lines = list(lines[: max_lines])
+
+  def run(self, phase, cmdline, **kwargs):
+    output, elapsed, peak_rss = pcu.run_command(cmdline, **kwargs)
+    self.add_phase(phase, elapsed, peak_rss)
+
+    return output
+
+  @property
+  def time(self):
+    return sum(p.time for p in self.phases)
+
+  @property
+  def peak_rss(self):
+    return max((p.peak_rss for p in self.phases), default=0)
+
+  @property
+  def failed(self):
+    return self.mismatches > 0 or bool(self.errors)
+
+  def as_dict(self):
+    return dict(name=self.name,
+                tool=self.tool,
+                backend=self.backend,
+                source=self.source,
+                lines=self.lines,
+                mismatches=self.mismatches,
+                errors=self.errors,
+                time=self.time,
+                peak_rss=self.peak_rss,
+                phases={p.name: dict(time=p.time, peak_rss=p.peak_rss)
+                        for p in self.phases})
+
+
+class ResultsWriter:
+
+  def __init__(self, suite):
+    self._suite = suite
+    self._results = []
+    self._timestamp = time.time()
+
+  def add(self, result):
+    self._results.append(result)
+
+    return result
+
+  def _summary(self):
+    return dict(suite=self._suite,
+                timestamp=self._timestamp,
+                tests=len(self._results),
+                failures=sum(1 for r in self._results if r.mismatches > 0),
+                errors=sum(1 for r in self._results if r.errors),
+                time=sum(r.time for r in self._results))
+
+  def write_json(self, path):
+    data = self._summary()
+    data['results'] = [r.as_dict() for r in self._results]
+
+    with open(path, mode='w') as fd:
+      json.dump(data, fd, indent=2)
+
+    alog.info(f'Results written to {path}')
+
+  def write_junit(self, path):
+    summary = self._summary()
+
+    tsuites = ET.Element('testsuites')
+    tsuite = ET.SubElement(tsuites, 'testsuite',
+                           name=self._suite,
+                           tests=str(summary['tests']),
+                           failures=str(summary['failures']),
+                           errors=str(summary['errors']),
+                           time=f'{summary["time"]:.6f}',
+                           timestamp=time.strftime('%Y-%m-%dT%H:%M:%S',
+                                                   time.localtime(self._timestamp)))
+    for result in self._results:
+      classname = f'{self._suite}.{result.backend}' if result.backend else self._suite
+      tcase = ET.SubElement(tsuite, 'testcase',
+                            classname=classname,
+                            name=f'{result.name}[{result.tool}]',
+                            time=f'{result.time:.6f}')
+
+      props = ET.SubElement(tcase, 'properties')
+      pvalues = [('tool', result.tool),
+                 ('lines', result.lines),
+                 ('mismatches', result.mismatches),
+                 ('peak_rss', result.peak_rss)]
+      for phase in result.phases:
+        pvalues.append((f'{phase.name}.time', f'{phase.time:.6f}'))
+        pvalues.append((f'{phase.name}.peak_rss', phase.peak_rss))
+
+      for pname, pvalue in pvalues:
+        if pvalue is not None:
+          ET.SubElement(props, 'property', name=pname, value=str(pvalue))
+
+      if result.errors:
+        error = ET.SubElement(tcase, 'error', message=result.errors[0].split('\n')[0])
+        error.text = '\n'.join(result.errors)
+      elif result.mismatches:
+        failure = ET.SubElement(tcase, 'failure',
+                                message=f'{result.mismatches} mismatches')
+        failure.text = '\n'.join(result.mismatch_lines)
+
+    tree = ET.ElementTree(tsuites)
+    ET.indent(tree)
+    tree.write(path, encoding='utf-8', xml_declaration=True)
+
+    alog.info(f'JUnit results written to {path}')
+
+  def write(self, json_path=None, junit_path=None):
+    if json_path:
+      self.write_json(json_path)
+    if junit_path:
+      self.write_junit(junit_path)
+
+
+def add_arguments(parser):
+  parser.add_argument('--results_json',
+                      help='The path of the JSON file where to store the results')
+  parser.add_argument('--results_junit',
+                      help='The path of the JUnit XML file where to store the results')
@@ -1,5 +1,6 @@
 import argparse
 import collections
+import concurrent.futures
 import os
 import re
 import shlex
@@ -11,10 +12,15 @@ import textwrap
 
 import py_misc_utils.alog as alog
 import py_misc_utils.app_main as app_main
-import py_misc_utils.fs_utils as pyfsu
 import py_misc_utils.template_replace as pytr
 import py_misc_utils.utils as pyu
 
+from .. import testbench as TB
+
+from . import ghdl_cache as ghc
+from . import proc_utils as pcu
+from . import results as rsu
+
 
 class Tester:
 
@@ -40,9 +46,10 @@ class Tester:
     self._args = cmdline_args
     self._binary_args = getattr(cmdline_args, f'{self.NAME}_args', None) or []
 
-  def _prepare_cmdline_ctx(self, source_file, backend, top_entity, **kwargs):
+  def _prepare_cmdline_ctx(self, source_file, backend, top_entity, libs=None, **kwargs):
     sctx = {
       'INPUT': source_file,
+      'LIBS': ' '.join(libs or ()),
       'TOP': top_entity,
       'BACKEND': backend,
       'ARGS': ' '.join(self._binary_args),
@@ -56,11 +63,25 @@ class Tester:
 
     return shlex.split(cmdstr)
 
+  def _run(self, result, phase, cmdline, **kwargs):
+    alog.debug(f'Running {self.NAME} Tester ({phase}): {cmdline}')
+    try:
+      return result.run(phase, cmdline, **kwargs)
+    except subprocess.CalledProcessError as ex:
+      pyu.fatal(f'Test process exited with {ex.returncode} code: {cmdline}\n' \
+                f'Error output:\n' + ex.output.decode())
+
+  def _new_result(self, source_file, backend):
+    test_name, _ = os.path.splitext(os.path.basename(source_file))
+
+    return rsu.TestResult(test_name, self.NAME, backend=backend, source=source_file)
+
   def _get_vcd_path(self, source_file):
     if self._args.vcdpath:
       test_name, ext = os.path.splitext(os.path.basename(source_file))
 
-      return os.path.join(self._args.vcdpath, f'{test_name}_{self.NAME}_{ext[1: ]}.vcd')
+      return os.path.join(os.path.abspath(self._args.vcdpath),
+                          f'{test_name}_{self.NAME}_{ext[1: ]}.vcd')
 
   @classmethod
   def add_args(cls, parser):
@@ -72,7 +93,18 @@ class GhdlTester(Tester):
 
   NAME = 'ghdl'
   BINARY = 'ghdl'
-  CMDLINE = '-c --std=08 --workdir=$WORKDIR -frelaxed -Wno-shared $ARGS $INPUT -r $TOP $VCD'
+  CMDLINE = {
+    'analyze': '-a --std=08 --workdir=$WORKDIR -frelaxed -Wno-shared $ARGS $INPUT',
+    'elaborate': '-e --std=08 --workdir=$WORKDIR -frelaxed $ARGS $TOP',
+    'simulate': '-r --std=08 --workdir=$WORKDIR -frelaxed $ARGS $TOP $VCD',
+  }
+  LIBS_ARGS = ('--std=08', '-frelaxed', '-Wno-shared')
+
+  def __init__(self, cmdline_args):
+    super().__init__(cmdline_args)
+    cache_path = getattr(cmdline_args, 'ghdl_cache', None) or ghc.default_cache_path()
+    self._lib_cache = ghc.GhdlLibCache(self._xpath, cache_path,
+                                       self.LIBS_ARGS + tuple(self._binary_args))
 
   @property
   def backends(self):
@@ -84,30 +116,43 @@ class GhdlTester(Tester):
 
     return sctx
 
-  def test(self, source_file, backend, top_entity):
+  def test(self, source_file, backend, top_entity, libs=None, result=None,
+           errors=None):
+    result = result or self._new_result(source_file, backend)
     with tempfile.TemporaryDirectory() as tmp_path:
+      # The stable libraries are analyzed once (per content) within a cached
+      # work library, which is then used to seed the test work folder.
+      if libs:
+        self._lib_cache.populate(tmp_path, libs)
+
       sctx = self._prepare_cmdline_ctx(source_file, backend, top_entity,
                                        WORKDIR=tmp_path)
 
       sctx = self._parse_vcd_args(sctx)
 
-      cmdline = [self._xpath] + self._expand_cmdline(self.CMDLINE, sctx)
+      # The GCC/LLVM GHDL backends write the executable and object files within
+      # the current folder, so every phase runs within the temporary one.
+      output = []
+      for phase, cmdline in self.CMDLINE.items():
+        cmdline = [self._xpath] + self._expand_cmdline(cmdline, sctx)
 
-      alog.debug(f'Running GHDL Tester: {cmdline}')
-      try:
-        output = subprocess.check_output(cmdline, stderr=subprocess.STDOUT)
-      except subprocess.CalledProcessError as ex:
-        pyu.fatal(f'Test process exited with {ex.returncode} code: {cmdline}\n' \
-                  f'Error output:\n' + ex.output.decode())
+        output.append(self._run(result, phase, cmdline, cwd=tmp_path,
+                                line_fn=errors if phase == 'simulate' else None))
 
-      return output
+      return b''.join(output)
+
+  @classmethod
+  def add_args(cls, parser):
+    super().add_args(parser)
+    parser.add_argument('--ghdl_cache', default=ghc.default_cache_path(),
+                        help='The path of the GHDL cached libraries folder')
 
 
 class VerilatorTester(Tester):
 
   NAME = 'verilator'
   BINARY = 'verilator'
-  CMDLINE = '--binary --timing --trace --assert -sv --Mdir $WORKDIR $ARGS -o VTest --top $TOP $INPUT $VCD'
+  CMDLINE = '--binary --timing --trace --assert -sv --Mdir $WORKDIR $ARGS -o VTest --top $TOP $LIBS $INPUT $VCD'
 
   @property
   def backends(self):
@@ -146,28 +191,20 @@ class VerilatorTester(Tester):
 
     return sctx
 
-  def test(self, source_file, backend, top_entity):
+  def test(self, source_file, backend, top_entity, libs=None, result=None,
+           errors=None):
+    result = result or self._new_result(source_file, backend)
     with tempfile.TemporaryDirectory() as tmp_path:
-      sctx = self._prepare_cmdline_ctx(source_file, backend, top_entity,
+      sctx = self._prepare_cmdline_ctx(source_file, backend, top_entity, libs=libs,
                                        WORKDIR=tmp_path)
 
       sctx = self._parse_vcd_args(sctx)
 
       gen_cmdline = [self._xpath] + self._expand_cmdline(self.CMDLINE, sctx)
-
-      alog.debug(f'Running Verilator Tester: {gen_cmdline}')
-      try:
-        gen_output = subprocess.check_output(gen_cmdline, stderr=subprocess.STDOUT)
-      except subprocess.CalledProcessError as ex:
-        pyu.fatal(f'Test process exited with {ex.returncode} code: {gen_cmdline}\n' \
-                  f'Error output:\n' + ex.output.decode())
+      gen_output = self._run(result, 'compile', gen_cmdline)
 
       run_cmdline = [os.path.join(tmp_path, 'VTest')]
-      try:
-        run_output = subprocess.check_output(run_cmdline, stderr=subprocess.STDOUT)
-      except subprocess.CalledProcessError as ex:
-        pyu.fatal(f'Test process exited with {ex.returncode} code: {run_cmdline}\n' \
-                  f'Error output:\n' + ex.output.decode())
+      run_output = self._run(result, 'simulate', run_cmdline, line_fn=errors)
 
       return gen_output + run_output
 
@@ -176,8 +213,8 @@ class VivadoTester(Tester):
 
   NAME = 'vivado'
   CMDLINE = {
-    'xvlog': '$XVLOG_ARGS -sv $INPUT',
-    'xvhdl': '$XVHDL_ARGS -2008 $INPUT',
+    'xvlog': '$XVLOG_ARGS -sv $LIBS $INPUT',
+    'xvhdl': '$XVHDL_ARGS -2008 $LIBS $INPUT',
     'xelab': '$XELAB_ARGS -debug wave $TOP',
     'xsim': '$XSIM_ARGS -onerror quit -t $TCL_SCRIPT $TOP',
   }
@@ -234,9 +271,14 @@ class VivadoTester(Tester):
 
     return sctx
 
-  def test(self, source_file, backend, top_entity):
-    with (tempfile.TemporaryDirectory() as tmp_path, pyfsu.cwd(tmp_path)):
-      sctx = self._prepare_cmdline_ctx(source_file, backend, top_entity,
+  def test(self, source_file, backend, top_entity, libs=None, result=None,
+           errors=None):
+    result = result or self._new_result(source_file, backend)
+    # Vivado tools drop their work files within the current folder, so they are
+    # run from within the temporary folder (without changing the current folder
+    # of the process, as tests might be running concurrently).
+    with tempfile.TemporaryDirectory() as tmp_path:
+      sctx = self._prepare_cmdline_ctx(source_file, backend, top_entity, libs=libs,
                                        WORKDIR=tmp_path)
 
       sctx = self._parse_args(sctx)
@@ -248,41 +290,22 @@ class VivadoTester(Tester):
 
       proc_cmdline = [self._xpath[proc_tool],
                       *self._expand_cmdline(self.CMDLINE[proc_tool], sctx)]
-
-      alog.debug(f'Running Vivado Tester (Processing): {proc_cmdline}')
-      try:
-        proc_output = subprocess.check_output(proc_cmdline, stderr=subprocess.STDOUT)
-      except subprocess.CalledProcessError as ex:
-        pyu.fatal(f'Test process exited with {ex.returncode} code: {proc_cmdline}\n' \
-                  f'Error output:\n' + ex.output.decode())
+      proc_output = self._run(result, 'compile', proc_cmdline, cwd=tmp_path)
 
       elab_cmdline = [self._xpath['xelab'],
                       *self._expand_cmdline(self.CMDLINE['xelab'], sctx)]
+      elab_output = self._run(result, 'elaborate', elab_cmdline, cwd=tmp_path)
 
-      alog.debug(f'Running Vivado Tester (Elaboration): {elab_cmdline}')
-      try:
-        elab_output = subprocess.check_output(elab_cmdline, stderr=subprocess.STDOUT)
-      except subprocess.CalledProcessError as ex:
-        pyu.fatal(f'Test process exited with {ex.returncode} code: {elab_cmdline}\n' \
-                  f'Error output:\n' + ex.output.decode())
+      # The TCL script gets its arguments from the environment (no way to pass
+      # them to the xsim command line ATM), so we need to create an updated copy
+      # of the current environment.
+      env = os.environ.copy()
+      env.update(sctx)
 
       run_cmdline = [self._xpath['xsim'],
                      *self._expand_cmdline(self.CMDLINE['xsim'], sctx)]
-
-      alog.debug(f'Running Vivado Tester: {run_cmdline}')
-      try:
-        # The TCL script gets its arguments from the environment (no way to pass
-        # them to the xsim command line ATM), so we need to create an updated copy
-        # of the current environment.
-        env = os.environ.copy()
-        env.update(sctx)
-
-        run_output = subprocess.check_output(run_cmdline,
-                                             stderr=subprocess.STDOUT,
-                                             env=env)
-      except subprocess.CalledProcessError as ex:
-        pyu.fatal(f'Test process exited with {ex.returncode} code: {run_cmdline}\n' \
-                  f'Error output:\n' + ex.output.decode())
+      run_output = self._run(result, 'simulate', run_cmdline, env=env, cwd=tmp_path,
+                             line_fn=errors)
 
       return proc_output + elab_output + run_output
 
@@ -313,67 +336,141 @@ def load_testers(args):
   return testers
 
 
-GenCode = collections.namedtuple('GenCode', 'input, output, backend, entity')
+GenCode = collections.namedtuple('GenCode',
+                                 'input, output, backend, entity, libs, shard, gen_phase, lines')
 
-def generate_code(source_file, args, output_path):
+# The backends whose core libraries are emitted within a separated file, so that
+# testers can compile them once and cache the result.
+_SPLIT_LIBS_BACKENDS = {'vhdl'}
+
+def _generator_commands(source_file, args, output_path):
   test_name, _ = os.path.splitext(os.path.basename(source_file))
 
   backends = re.split(r'\s*,\s*', args.backend)
 
   python_path = shutil.which('python') or shutil.which('python3')
 
-  code = []
+  shards = (range(args.tb_shards) if args.tb_input_file and args.tb_shards
+            else (None,))
+
   for backend in backends:
-    output_file = os.path.join(output_path, f'{test_name}.{backend}')
-    cmdline = [
-      python_path,
-      '-m', 'pyxhdl.generator',
-      '--backend', backend,
-      '--input_file', source_file,
-      '--output_file', output_file,
-      '--entity', args.entity,
-      '--log_level', args.log_level,
-    ]
-
-    if args.tb_input_file:
-      cmdline.extend(('--testbench', '--tb_input_file', args.tb_input_file))
-      for arg in args.tb_inputs or []:
-        cmdline.extend(('--inputs', arg))
-
-    for arg in args.gargs or []:
-      cmdline.extend(pyu.resplit(arg, ';', unescape=True))
-
-    test_args = list(args.args) if args.args else []
-    if env_args := os.getenv(f'{test_name.upper()}_UTARGS'):
-      test_args.extend(pyu.comma_split(env_args))
-
-    if test_args:
-      cmdline.append('--kwargs')
-      cmdline.extend(test_args)
-
-    alog.debug(f'Running Code Generator: {cmdline}')
-    try:
-      output = subprocess.check_output(cmdline, stderr=subprocess.STDOUT)
-    except subprocess.CalledProcessError as ex:
-      pyu.fatal(f'Generation process exited with {ex.returncode} code: {cmdline}\n' \
-                f'Error output:\n' + ex.output.decode())
+    for shard in shards:
+      output_file = os.path.join(output_path, f'{test_name}.{backend}')
+      if shard is not None:
+        output_file = TB.shard_path(output_file, shard)
+
+      cmdline = [
+        python_path,
+        '-m', 'pyxhdl.generator',
+        '--backend', backend,
+        '--input_file', source_file,
+        '--output_file', output_file,
+        '--entity', args.entity,
+        '--log_level', args.log_level,
+      ]
+
+      libs = ()
+      if not args.no_lib_cache and backend in _SPLIT_LIBS_BACKENDS:
+        libs_file = os.path.join(output_path, f'{test_name}_libs.{backend}')
+        if shard is not None:
+          libs_file = TB.shard_path(libs_file, shard)
 
-    code.append(GenCode(input=source_file,
-                        output=output_file,
-                        backend=backend,
-                        entity='TestBench' if args.tb_input_file else args.entity))
+        cmdline.extend(('--core_libs_file', libs_file))
+        libs = (libs_file,)
 
-  return code
+      if args.tb_input_file:
+        cmdline.extend(('--testbench', '--tb_input_file', args.tb_input_file))
+        for arg in args.tb_inputs or []:
+          cmdline.extend(('--inputs', arg))
+        if shard is not None:
+          cmdline.extend(('--tb_shards', str(args.tb_shards), '--tb_shard', str(shard)))
 
+      for arg in args.gargs or []:
+        cmdline.extend(pyu.resplit(arg, ';', unescape=True))
 
-def filter_errors(soutput):
-  lines = []
-  for line in soutput.split('\n'):
-    m = re.match(r'ERR:\s+\d+\s+', line)
-    if m:
-      lines.append(line)
+      test_args = list(args.args) if args.args else []
+      if env_args := os.getenv(f'{test_name.upper()}_UTARGS'):
+        test_args.extend(pyu.comma_split(env_args))
 
-  return lines
+      if test_args:
+        cmdline.append('--kwargs')
+        cmdline.extend(test_args)
+
+      gcode = GenCode(input=source_file,
+                      output=output_file,
+                      backend=backend,
+                      entity='TestBench' if args.tb_input_file else args.entity,
+                      libs=libs,
+                      shard=shard,
+                      gen_phase=None,
+                      lines=None)
+
+      yield cmdline, gcode
+
+
+def _run_generator(cmdline, gcode):
+  alog.debug(f'Running Code Generator: {cmdline}')
+  try:
+    output, elapsed, peak_rss = pcu.run_command(cmdline)
+  except subprocess.CalledProcessError as ex:
+    pyu.fatal(f'Generation process exited with {ex.returncode} code: {cmdline}\n' \
+              f'Error output:\n' + ex.output.decode())
+
+  return gcode._replace(gen_phase=rsu.Phase(name='generate', time=elapsed, peak_rss=peak_rss),
+                        lines=rsu.count_lines(gcode.output))
+
+
+def generate_code(source_file, args, output_path, executor=None):
+  gen_cmds = list(_generator_commands(source_file, args, output_path))
+
+  if executor is None:
+    return [_run_generator(cmdline, gcode) for cmdline, gcode in gen_cmds]
+
+  futures = [executor.submit(_run_generator, cmdline, gcode) for cmdline, gcode in gen_cmds]
+
+  return [fut.result() for fut in futures]
+
+
+_ERROR_RX = re.compile(r'ERR:\s+\d+\s+')
+
+
+class ErrorCollector:
+
+  def __init__(self, max_errors=None):
+    self._max_errors = max_errors
+    self.lines = []
+    self.aborted = False
+
+  def __call__(self, line):
+    sline = line.decode(errors='replace').rstrip('\r\n')
+    if _ERROR_RX.match(sline):
+      self.lines.append(sline)
+      if self._max_errors and len(self.lines) >= self._max_errors:
+        alog.info(f'Stopping simulation after {len(self.lines)} errors')
+        self.aborted = True
+
+        return True
+
+    return False
+
+
+def _run_test(tester, gcode, result, max_errors):
+  alog.info(f'Running {tester.NAME} tester on {gcode.backend} file {gcode.output}')
+
+  errors = ErrorCollector(max_errors=max_errors)
+  try:
+    output = tester.test(gcode.output, gcode.backend, gcode.entity,
+                         libs=gcode.libs, result=result, errors=errors)
+  except Exception as ex:
+    result.errors.append(str(ex))
+
+    return [str(ex)]
+
+  alog.debug(output.decode(errors='replace'))
+
+  result.set_mismatches(errors.lines)
+
+  return errors.lines
 
 
 def main(args):
@@ -382,30 +479,47 @@ def main(args):
   if not testers:
     pyu.fatal(f'Unable to find any valid HDL test tools')
 
-  with tempfile.TemporaryDirectory() as tmp_path:
+  with (tempfile.TemporaryDirectory() as tmp_path,
+        concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor):
     code = []
     for source_file in args.inputs:
-      code.extend(generate_code(os.path.abspath(source_file), args, tmp_path))
+      code.extend(generate_code(os.path.abspath(source_file), args, tmp_path,
+                                executor=executor))
 
-    failed = []
+    results = rsu.ResultsWriter('pyxhdl.unit_test')
+
+    tests = []
     for tester in testers:
       for gcode in code:
         if gcode.backend in tester.backends:
-          alog.info(f'Running {tester.NAME} tester on {gcode.backend} file {gcode.output}')
+          test_name, _ = os.path.splitext(os.path.basename(gcode.input))
+          if gcode.shard is not None:
+            test_name = f'{test_name}.shard{gcode.shard}'
+
+          result = results.add(rsu.TestResult(test_name, tester.NAME,
+                                              backend=gcode.backend,
+                                              source=gcode.input))
+          result.add_phase(*gcode.gen_phase)
+          result.lines = gcode.lines
+
+          fut = executor.submit(_run_test, tester, gcode, result, args.max_errors)
+          tests.append((gcode, tester.NAME, fut))
 
-          output = tester.test(gcode.output, gcode.backend, gcode.entity)
+    # Shards results are merged back into their source test.
+    failed = collections.defaultdict(list)
+    for gcode, tname, fut in tests:
+      if mmlines := fut.result():
+        if gcode.shard is not None:
+          mmlines = [f'[shard {gcode.shard}] {x}' for x in mmlines]
 
-          soutput = output.decode()
-          alog.debug(soutput)
+        failed[(gcode.input, gcode.backend, tname)].extend(mmlines)
 
-          mmlines = filter_errors(soutput)
-          if mmlines:
-            failed.append((gcode, tester.NAME, mmlines))
+    results.write(json_path=args.results_json, junit_path=args.results_junit)
 
     if failed:
-      for gcode, tname, lines in failed:
+      for (source, backend, tname), lines in failed.items():
         elines = '    ' + '\n    '.join(lines)
-        alog.error(f'Failed test for {tname} tool: source={gcode.input} backend={gcode.backend}\n{elines}')
+        alog.error(f'Failed test for {tname} tool: source={source} backend={backend}\n{elines}')
 
       sys.exit(1)
 
@@ -429,8 +543,19 @@ if __name__ == '__main__':
                       help='The inputs for the testbench')
   parser.add_argument('--vcdpath',
                       help='The patch of the VCD trace file')
+  parser.add_argument('--tb_shards', type=int,
+                      help='The number of independent testbenches the input vectors ' \
+                      'should be split into (run in parallel)')
+  parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                      help='The maximum number of generations and tests to be run concurrently')
+  parser.add_argument('--max_errors', type=int,
+                      help='The number of mismatches after which a simulation is stopped')
+  parser.add_argument('--no_lib_cache', action='store_true',
+                      help='Emit the core libraries within the generated code, instead ' \
+                      'of having them compiled once and cached by the testers supporting it')
 
   add_tests_args(parser)
+  rsu.add_arguments(parser)
 
   app_main.main(parser, main)
 
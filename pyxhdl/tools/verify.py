@@ -1,9 +1,12 @@
 import argparse
+import collections
+import concurrent.futures
 import os
 import re
 import shlex
 import shutil
 import subprocess
+import sys
 import tempfile
 import textwrap
 
@@ -12,6 +15,10 @@ import py_misc_utils.app_main as app_main
 import py_misc_utils.template_replace as pytr
 import py_misc_utils.utils as pyu
 
+from . import ghdl_cache as ghc
+from . import proc_utils as pcu
+from . import results as rsu
+
 
 class Verifier:
 
@@ -25,6 +32,12 @@ class Verifier:
 
     self._xpath = xpath
     self._args = cmdline_args
+    self._timeout = (getattr(cmdline_args, f'{self.NAME.lower()}_timeout', None) or
+                     getattr(cmdline_args, 'timeout', None))
+    self._procs = pcu.ProcSet()
+
+  def cancel(self):
+    self._procs.cancel()
 
   def _make_subs_ctx(self, files, backend, top_entity, **kwargs):
     args = getattr(self._args, f'{self.NAME.lower()}_args', None) or []
@@ -40,10 +53,35 @@ class Verifier:
 
     return sctx
 
+  def _run(self, result, cmdline, **kwargs):
+    alog.debug(f'Running {self.NAME} verifier: {cmdline}')
+    try:
+      return result.run('verify', cmdline, timeout=self._timeout, procs=self._procs,
+                        **kwargs)
+    except subprocess.TimeoutExpired as ex:
+      pyu.fatal(f'Verification process timed out after {ex.timeout} seconds. ' \
+                f'Output:\n' + ex.output.decode())
+    except subprocess.CalledProcessError as ex:
+      pyu.fatal(f'Verification process exited with {ex.returncode} code. ' \
+                f'Error output:\n' + ex.output.decode())
+
+  def new_result(self, files, backend):
+    return rsu.TestResult(','.join(os.path.basename(x) for x in files), self.NAME,
+                          backend=backend, source=','.join(files))
+
+  def verify_files(self, files, backend, top_entity, libs=None, result=None):
+    # Verifiers which are not able to cache the stable libraries simply get
+    # them ahead of the input files.
+    return self.verify(list(libs or ()) + list(files), backend, top_entity,
+                       result=result)
+
   @classmethod
   def add_args(cls, parser):
     parser.add_argument(f'--{cls.NAME.lower()}_args', nargs='+',
                         help=f'The arguments for the {cls.NAME} tester')
+    parser.add_argument(f'--{cls.NAME.lower()}_timeout', type=float,
+                        help=f'The timeout in seconds for the {cls.NAME} tester ' \
+                        f'(overrides --timeout)')
 
 
 class VivadoVerifier(Verifier):
@@ -70,7 +108,8 @@ class VivadoVerifier(Verifier):
   def backends(self):
     return ('verilog', 'vhdl')
 
-  def verify(self, files, backend, top_entity):
+  def verify(self, files, backend, top_entity, result=None):
+    result = result or self.new_result(files, backend)
     with tempfile.TemporaryDirectory() as tmp_path:
       script = self._create_script(files, backend)
 
@@ -89,12 +128,9 @@ class VivadoVerifier(Verifier):
                  *shlex.split(pytr.template_replace(self.CMDLINE, vals=sctx)),
                  path]
 
-      alog.debug(f'Running {self.NAME} verifier: {cmdline}')
-      try:
-        output = subprocess.check_output(cmdline, stderr=subprocess.STDOUT)
-      except subprocess.CalledProcessError as ex:
-        pyu.fatal(f'Verification process exited with {ex.returncode} code. ' \
-                  f'Error output:\n' + ex.output.decode())
+      # Vivado drops its own work files within the current folder, which would
+      # clash with other concurrently running instances.
+      output = self._run(result, cmdline, cwd=tmp_path)
 
       return output
 
@@ -104,13 +140,28 @@ class GhdlVerifier(Verifier):
   NAME = 'GHDL'
   BINARY = 'ghdl'
   CMDLINE = '-a --std=08 --workdir=$WORKDIR $ARGS -frelaxed -Wno-shared'
+  LIBS_ARGS = ('--std=08', '-frelaxed', '-Wno-shared')
+
+  def __init__(self, cmdline_args):
+    super().__init__(cmdline_args)
+    args = getattr(cmdline_args, 'ghdl_args', None) or []
+    cache_path = getattr(cmdline_args, 'ghdl_cache', None) or ghc.default_cache_path()
+    self._lib_cache = ghc.GhdlLibCache(self._xpath, cache_path,
+                                       self.LIBS_ARGS + tuple(args))
 
   @property
   def backends(self):
     return ('vhdl',)
 
-  def verify(self, files, backend, top_entity):
+  def verify_files(self, files, backend, top_entity, libs=None, result=None):
+    return self.verify(files, backend, top_entity, libs=libs, result=result)
+
+  def verify(self, files, backend, top_entity, libs=None, result=None):
+    result = result or self.new_result(files, backend)
     with tempfile.TemporaryDirectory() as tmp_path:
+      if libs:
+        self._lib_cache.populate(tmp_path, libs)
+
       sctx = self._make_subs_ctx(files, backend, top_entity,
                                  WORKDIR=tmp_path)
 
@@ -118,15 +169,16 @@ class GhdlVerifier(Verifier):
                  *shlex.split(pytr.template_replace(self.CMDLINE, vals=sctx)),
                  *files]
 
-      alog.debug(f'Running {self.NAME} verifier: {cmdline}')
-      try:
-        output = subprocess.check_output(cmdline, stderr=subprocess.STDOUT)
-      except subprocess.CalledProcessError as ex:
-        pyu.fatal(f'Verification process exited with {ex.returncode} code. ' \
-                  f'Error output:\n' + ex.output.decode())
+      output = self._run(result, cmdline)
 
       return output
 
+  @classmethod
+  def add_args(cls, parser):
+    super().add_args(parser)
+    parser.add_argument('--ghdl_cache', default=ghc.default_cache_path(),
+                        help='The path of the GHDL cached libraries folder')
+
 
 class VerilatorVerifier(Verifier):
 
@@ -138,7 +190,8 @@ class VerilatorVerifier(Verifier):
   def backends(self):
     return ('verilog',)
 
-  def verify(self, files, backend, top_entity):
+  def verify(self, files, backend, top_entity, result=None):
+    result = result or self.new_result(files, backend)
     with tempfile.TemporaryDirectory() as tmp_path:
       sctx = self._make_subs_ctx(files, backend, top_entity,
                                  WORKDIR=tmp_path)
@@ -147,12 +200,7 @@ class VerilatorVerifier(Verifier):
                  *shlex.split(pytr.template_replace(self.CMDLINE, vals=sctx)),
                  *files]
 
-      alog.debug(f'Running {self.NAME} verifier: {cmdline}')
-      try:
-        output = subprocess.check_output(cmdline, stderr=subprocess.STDOUT)
-      except subprocess.CalledProcessError as ex:
-        pyu.fatal(f'Verification process exited with {ex.returncode} code. ' \
-                  f'Error output:\n' + ex.output.decode())
+      output = self._run(result, cmdline)
 
       return output
 
@@ -167,7 +215,8 @@ class SlangVerifier(Verifier):
   def backends(self):
     return ('verilog',)
 
-  def verify(self, files, backend, top_entity):
+  def verify(self, files, backend, top_entity, result=None):
+    result = result or self.new_result(files, backend)
     with tempfile.TemporaryDirectory() as tmp_path:
       sctx = self._make_subs_ctx(files, backend, top_entity,
                                  WORKDIR=tmp_path)
@@ -176,12 +225,7 @@ class SlangVerifier(Verifier):
                  *shlex.split(pytr.template_replace(self.CMDLINE, vals=sctx)),
                  *files]
 
-      alog.debug(f'Running {self.NAME} verifier: {cmdline}')
-      try:
-        output = subprocess.check_output(cmdline, stderr=subprocess.STDOUT)
-      except subprocess.CalledProcessError as ex:
-        pyu.fatal(f'Verification process exited with {ex.returncode} code. ' \
-                  f'Error output:\n' + ex.output.decode())
+      output = self._run(result, cmdline)
 
       return output
 
@@ -241,7 +285,8 @@ class YosysVerifier(Verifier):
   def backends(self):
     return tuple(sorted(self._backends))
 
-  def verify(self, files, backend, top_entity):
+  def verify(self, files, backend, top_entity, result=None):
+    result = result or self.new_result(files, backend)
     with tempfile.TemporaryDirectory() as tmp_path:
       script = self._create_script(files, backend)
 
@@ -265,11 +310,7 @@ class YosysVerifier(Verifier):
                  *shlex.split(pytr.template_replace(self.CMDLINE, vals=sctx)),
                  path]
 
-      try:
-        output = subprocess.check_output(cmdline, stderr=subprocess.STDOUT)
-      except subprocess.CalledProcessError as ex:
-        pyu.fatal(f'Verification process exited with {ex.returncode} code. ' \
-                  f'Error output:\n' + ex.output.decode())
+      output = self._run(result, cmdline)
 
       return output
 
@@ -306,24 +347,99 @@ def load_verifiers(args):
   return verifiers
 
 
+InputSet = collections.namedtuple('InputSet', 'files, entity')
+
+def _parse_input_sets(args):
+  input_sets = []
+  if args.inputs:
+    input_sets.append(InputSet(files=[os.path.abspath(x) for x in args.inputs],
+                               entity=args.entity))
+
+  for iset in args.input_sets or []:
+    # Input sets have the "[ENTITY=]FILE,..." format.
+    parts = iset.split('=', 1)
+    entity, files = parts if len(parts) == 2 else (args.entity, parts[0])
+
+    input_sets.append(InputSet(files=[os.path.abspath(x) for x in pyu.comma_split(files)],
+                               entity=entity))
+
+  if not input_sets:
+    pyu.fatal(f'No input files specified (use --inputs or --input_sets)')
+  for iset in input_sets:
+    if not iset.entity:
+      pyu.fatal(f'Missing root entity for input files {iset.files}')
+
+  return input_sets
+
+
+def _verify(verifier, iset, backend, libs, result):
+  alog.info(f'Running {verifier.NAME} verifier on {backend} files {iset.files}')
+
+  verifier.verify_files(iset.files, backend, iset.entity, libs=libs, result=result)
+
+
 def main(args):
   verifiers = load_verifiers(args)
 
   if not verifiers:
     pyu.fatal(f'Unable to find any valid HDL verification tools')
 
-  for verifier in verifiers:
-    alog.info(f'Running {verifier.NAME} verifier on {args.backend} files {args.inputs}')
+  backend = args.backend.lower()
+  input_sets = _parse_input_sets(args)
+  libs = [os.path.abspath(x) for x in args.libs or ()]
+
+  results = rsu.ResultsWriter('pyxhdl.verify')
+
+  failed = []
+  with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+    futures = dict()
+    for iset in input_sets:
+      lines = sum(rsu.count_lines(x) for x in iset.files)
+      for verifier in verifiers:
+        result = results.add(verifier.new_result(iset.files, backend))
+        result.lines = lines
+
+        fut = executor.submit(_verify, verifier, iset, backend, libs, result)
+        futures[fut] = (verifier, result)
+
+    for fut in concurrent.futures.as_completed(futures):
+      verifier, result = futures[fut]
+      if fut.cancelled():
+        continue
+
+      ex = fut.exception()
+      if ex is not None and not isinstance(ex, pcu.ProcCancelled):
+        result.errors.append(str(ex))
+        failed.append((verifier.NAME, result.source, ex))
+
+        if args.fail_fast:
+          alog.info(f'Cancelling pending verifications after {verifier.NAME} failure')
+          for pfut in futures.keys():
+            pfut.cancel()
+          for cverifier in verifiers:
+            cverifier.cancel()
+
+  results.write(json_path=args.results_json, junit_path=args.results_junit)
+
+  if failed:
+    for name, source, ex in failed:
+      alog.error(f'Failed verification for {name} tool on {source}: {ex}')
 
-    verifier.verify(args.inputs, args.backend.lower(), args.entity)
+    sys.exit(1)
 
 
 if __name__ == '__main__':
   parser = argparse.ArgumentParser(description='VHDL/Verilog Code Verifier',
                                    formatter_class=argparse.ArgumentDefaultsHelpFormatter)
-  parser.add_argument('--inputs', nargs='+', action='extend', required=True,
+  parser.add_argument('--inputs', nargs='+', action='extend',
                       help='The input files to be analyzed')
-  parser.add_argument('--entity', type=str, required=True,
+  parser.add_argument('--input_sets', nargs='+', action='extend',
+                      help='The input file sets to be analyzed, in the [ENTITY=]FILE,... ' \
+                      'format (ENTITY defaults to the --entity argument)')
+  parser.add_argument('--libs', nargs='+', action='extend',
+                      help='The stable library files (like the ones emitted with the ' \
+                      'generator --core_libs_file argument) the inputs depend on')
+  parser.add_argument('--entity', type=str,
                       help='The root entity name')
   parser.add_argument('--backend', type=str, default='vhdl',
                       choices={'vhdl', 'verilog'},
@@ -331,8 +447,15 @@ if __name__ == '__main__':
   parser.add_argument('--exclude', nargs='+', action='extend',
                       choices=set(t.lower() for t in VERIFY_TOOLS.keys()),
                       help='The list of verifiers to be excluded')
+  parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                      help='The maximum number of verifications to be run concurrently')
+  parser.add_argument('--timeout', type=float,
+                      help='The timeout in seconds for each verification run')
+  parser.add_argument('--fail_fast', action='store_true',
+                      help='Cancel the remaining verifications on the first failure')
 
   add_verifiers_args(parser)
+  rsu.add_arguments(parser)
 
   app_main.main(parser, main)
 
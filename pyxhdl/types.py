@@ -10,9 +10,47 @@ import py_misc_utils.utils as pyu
 from .utils import *
 
 
-class Type(Hashed):
+# Types are interned (flyweight), so that structurally equal types are the same
+# object, and equality becomes an identity check. Types must be considered
+# immutable, and new ones created only via their constructors or the new_shape()
+# API (never with pycu.new_with()).
+_TYPES = dict()
 
-  __slots__ = ('name', 'full_shape', 'ctype', 'degen')
+def _intern_key(tclass, name, full_shape, ctype, degen):
+  return (tclass, name, full_shape, ctype, degen)
+
+
+def _intern(dtype):
+  key = _intern_key(type(dtype), dtype.name, dtype.full_shape, dtype.ctype, dtype.degen)
+  idtype = _TYPES.get(key)
+  if idtype is None:
+    dtype._hash = hash(key)
+    idtype = _TYPES.setdefault(key, dtype)
+
+  return idtype
+
+
+def _intern_type(tclass, name, full_shape, ctype, degen):
+  idtype = _TYPES.get(_intern_key(tclass, name, full_shape, ctype, degen))
+  if idtype is None:
+    dtype = object.__new__(tclass)
+    Type.__init__(dtype, name, full_shape, ctype, degen=degen)
+    idtype = _intern(dtype)
+
+  return idtype
+
+
+class _TypeMeta(type):
+
+  def __call__(cls, *args, **kwargs):
+    return _intern(super().__call__(*args, **kwargs))
+
+
+class Type(Hashed, metaclass=_TypeMeta):
+
+  __slots__ = ('name', 'full_shape', 'ctype', 'degen', '_hash')
+
+  _HASHED_FIELDS = ('name', 'full_shape', 'ctype', 'degen')
 
   def __init__(self, name, shape, ctype, degen=False):
     self.name = name
@@ -20,6 +58,21 @@ class Type(Hashed):
     self.ctype = ctype
     self.degen = degen
 
+  def __hash__(self):
+    return self._hash
+
+  def __eq__(self, other):
+    return self is other
+
+  def __copy__(self):
+    return self
+
+  def __deepcopy__(self, memo):
+    return self
+
+  def __reduce__(self):
+    return _intern_type, (type(self), self.name, self.full_shape, self.ctype, self.degen)
+
   @property
   def has_bits(self):
     return self.full_shape[-1] is not None
@@ -56,9 +109,8 @@ class Type(Hashed):
     if not self.has_bits and (not shape or shape[-1] is not None):
       shape = shape + (None,)
 
-    return pycu.new_with(self,
-                         full_shape=shape,
-                         degen=degen if degen is not None else self.degen)
+    return _intern_type(type(self), self.name, tuple(shape), self.ctype,
+                        degen if degen is not None else self.degen)
 
   def element_type(self):
     return self.new_shape(*self.full_shape[-1: ])
@@ -67,7 +67,28 @@ _BOUNDS = {
 }
 _NEEDSPAR_RX = re.compile(r'[ +\-*/%!~&|^]')
 
+class Expr(str):
+  # Expression string carrying its own precedence information, as known by the
+  # code building it, so that paren() does not need to rescan it.
+
+  def __new__(cls, text, atomic=False):
+    obj = super().__new__(cls, text)
+    obj.atomic = atomic
+
+    return obj
+
+  def __reduce__(self):
+    return type(self), (str(self), self.atomic)
+
+
 def paren(sx, kind='({})'):
+  if isinstance(sx, Expr):
+    if sx.atomic:
+      return sx
+
+    return Expr(kind.format(sx), atomic=True) if kind == '({})' else \
+      (kind(sx) if callable(kind) else kind.format(sx))
+
   levch, skip = [None], False
   for c in sx:
     if skip:
@@ -145,6 +166,43 @@ class EntityVersions:
     return ent_name if ver == 0 else f'{ent_name}_V{ver}', erec
 
 
+class LRUCache:
+
+  def __init__(self, max_size):
+    self.max_size = max_size
+    self.hits = 0
+    self.misses = 0
+    self._data = collections.OrderedDict()
+
+  def __len__(self):
+    return len(self._data)
+
+  def get(self, key, defval=None):
+    value = self._data.get(key, NONE)
+    if value is NONE:
+      self.misses += 1
+
+      return defval
+
+    self.hits += 1
+    self._data.move_to_end(key)
+
+    return value
+
+  def put(self, key, value):
+    self._data[key] = value
+    self._data.move_to_end(key)
+    if len(self._data) > self.max_size:
+      self._data.popitem(last=False)
+
+  def clear(self):
+    self._data.clear()
+
+  def info(self):
+    return dict(hits=self.hits, misses=self.misses, size=len(self._data),
+                max_size=self.max_size)
+
+
 def subscript_setter(arr, idx):
 
   def setfn(value):
@@ -225,21 +283,65 @@ def validate_slice(start, stop, size, step):
   return nstart, nstop
 
 
-# This class should have no fields and no __init__().
-class Hashed:
+_HashedInfo = collections.namedtuple('HashedInfo', 'fields, slots, cached')
 
-  def _hashed_fields(self):
-    fields = getattr(self, '_HASHED_FIELDS', None)
+_HASHED_INFO = dict()
+
+def _hashed_info(cls):
+  hinfo = _HASHED_INFO.get(cls)
+  if hinfo is None:
+    slots = []
+    for bcls in reversed(cls.__mro__):
+      bslots = bcls.__dict__.get('__slots__', ())
+      slots.extend((bslots,) if isinstance(bslots, str) else bslots)
+
+    fields = getattr(cls, '_HASHED_FIELDS', None)
     if fields is None:
-      fields = getattr(self, '__slots__', None)
-      if fields is None:
+      fields = tuple(f for f in slots if f != '_hash')
+      if not fields:
         fatal(f'Missing declaration of Hashed fields')
 
-    return fields
+    hinfo = _HashedInfo(fields=fields, slots=tuple(slots), cached='_hash' in slots)
+    _HASHED_INFO[cls] = hinfo
+
+  return hinfo
+
+
+# This class should have no fields and no __init__().
+# Subclasses listing a "_hash" slot get their hash value computed only once, so
+# they must be treated as immutable and cloned only with _new_with().
+class Hashed:
+
+  __slots__ = ()
+
+  def _hashed_fields(self):
+    return _hashed_info(type(self)).fields
 
   def __hash__(self):
-    return pycu.genhash(tuple(getattr(self, f) for f in self._hashed_fields()))
+    hinfo = _hashed_info(type(self))
+    if not hinfo.cached:
+      return pycu.genhash(tuple(getattr(self, f) for f in hinfo.fields))
+
+    hvalue = getattr(self, '_hash', None)
+    if hvalue is None:
+      hvalue = pycu.genhash(tuple(getattr(self, f) for f in hinfo.fields))
+      self._hash = hvalue
+
+    return hvalue
 
   def __eq__(self, other):
     return all(getattr(self, f) == getattr(other, f) for f in self._hashed_fields())
 
+  def _new_with(self, **kwargs):
+    # Cheaper than pycu.new_with() (which goes through copy.copy()), and drops
+    # the cached hash value.
+    cls = type(self)
+    nobj = object.__new__(cls)
+    for f in _hashed_info(cls).slots:
+      if f in kwargs:
+        setattr(nobj, f, kwargs[f])
+      elif f != '_hash':
+        setattr(nobj, f, getattr(self, f))
+
+    return nobj
+
@@ -22,6 +22,8 @@ X = pyli.lazy_import('pyxhdl')
 # This class should have no fields and no __init__().
 class ValueBase:
 
+  __slots__ = ()
+
   @staticmethod
   def load(name):
     ctx = X.CodeGen.current()
@@ -12,7 +12,7 @@ from .utils import *
 
 class VSpec(Hashed):
 
-  __slots__ = ('const', 'port', 'attributes')
+  __slots__ = ('const', 'port', 'attributes', '_hash')
 
   def __init__(self, const=False, port=None, attributes=None):
     self.const = const
@@ -25,12 +25,12 @@ class VSpec(Hashed):
     return f'{pyiu.cname(self)}({rfmt})'
 
   def for_new_variable(self):
-    return pycu.new_with(self, port=None)
+    return self._new_with(port=None)
 
 
 class Ref(Hashed):
 
-  __slots__ = ('name', 'mode', 'vspec', 'cname', 'vname')
+  __slots__ = ('name', 'mode', 'vspec', 'cname', 'vname', '_hash')
 
   RO = 'RO'
   WO = 'WO'
@@ -59,15 +59,15 @@ class Ref(Hashed):
     return f'{pyiu.cname(self)}({rfmt})'
 
   def new_name(self, name, vname=None):
-    return pycu.new_with(self, name=name, vname=vname, cname=None)
+    return self._new_with(name=name, vname=vname, cname=None)
 
   def new_mode(self, mode):
-    return pycu.new_with(self, mode=mode)
+    return self._new_with(mode=mode)
 
 
 class Init(Hashed):
 
-  __slots__ = ('value', 'name', 'vspec')
+  __slots__ = ('value', 'name', 'vspec', '_hash')
 
   def __init__(self, value=None, name=None, vspec=None):
     self.value = value
@@ -82,7 +82,7 @@ class Init(Hashed):
 
 class Value(Hashed, ValueBase):
 
-  __slots__ = ('dtype', '_value', 'isreg')
+  __slots__ = ('dtype', '_value', 'isreg', '_hash')
 
   def __init__(self, dtype, value, isreg=None):
     self.dtype = dtype
@@ -133,20 +133,34 @@ class Value(Hashed, ValueBase):
       if ref is not None:
         value = ref.new_name(value)
 
-    return pycu.new_with(self, _value=value, dtype=vdtype)
+    return self._clone(vdtype, value, self.isreg)
 
   def new_isreg(self, isreg):
-    return pycu.new_with(self, isreg=isreg)
+    return self._clone(self.dtype, self._value, isreg)
+
+  def _clone(self, dtype, value, isreg):
+    # Values get cloned at every slice and port binding, so skip the generic
+    # _new_with() path (and the subclass __init__()).
+    nobj = object.__new__(type(self))
+    nobj.dtype = dtype
+    nobj._value = value
+    nobj.isreg = isreg
+
+    return nobj
 
 
 class Wire(Value):
 
+  __slots__ = ()
+
   def __init__(self, dtype, value):
     super().__init__(dtype, value, isreg=False)
 
 
 class Register(Value):
 
+  __slots__ = ()
+
   def __init__(self, dtype, value):
     super().__init__(dtype, value, isreg=True)
 
@@ -49,6 +49,11 @@ _FLOAT_OPFNS = {
   ast.Mod: 'mod',
 }
 
+_FLOAT_PIPE_OPS = {'add', 'sub', 'mul', 'div'}
+
+_NUMBER_RX = re.compile(r"\d*'[sS]?[bBoOdDhH][\da-fA-F_xXzZ]+")
+_IDENT_RX = re.compile(r'[A-Za-z_]\w*')
+
 
 class Verilog_Emitter(Emitter):
 
@@ -416,13 +421,13 @@ class Verilog_Emitter(Emitter):
     if isinstance(value, Value) and value.dtype == dtype:
       return self.svalue(value)
 
-    return self._do_cast(value, dtype)
+    return self._cached_cast(value, dtype)
 
   def cast(self, value, dtype, isreg=None):
     if isinstance(value, Value) and value.dtype == dtype:
       return value
 
-    xvalue = self._do_cast(value, dtype)
+    xvalue = self._cached_cast(value, dtype)
     if isreg is None and isinstance(value, Value):
       isreg = value.isreg
 
@@ -533,26 +538,33 @@ class Verilog_Emitter(Emitter):
 
     ntype = self._type_of(var.dtype).format(name)
 
-    vspec = var.vspec
+    # Attributes are emitted on their own line, which would be left dangling
+    # if the declaration got removed.
+    vspec, dce_name = var.vspec, name
     if vspec is not None and vspec.attributes is not None:
       self._emit_attributes(vspec.attributes)
+      dce_name = None
 
-    self._emit_line(f'{vprefix}{ntype}{vinit};')
+    self._emit_line(f'{vprefix}{ntype}{vinit};', dce_name=dce_name, dce_decl=True)
 
   def emit_assign(self, var, name, value):
     xvalue = self._cast(value, var.dtype)
 
-    delay, xdelay = self.get_context('delay'), ''
+    delay, xdelay, keep = self.get_context('delay'), '', None
     if delay is not None:
       dtime, dtu = self._normalize_time(delay)
       xdelay = f'#{round(dtime)}{dtu} '
+      # Blocking delays move the following statements in time, so the delay stays
+      # (as a bare wait) even if the assignment is dropped.
+      keep = f'#{round(dtime)}{dtu};'
 
     cont_assign = 'assign ' if self._proc.kind == ROOT_PROCESS else ''
     # Sequential designs (processes having posedge/negedge sensitivity) should use non
     # blocking assignments.
     asop = '=' if cont_assign or not self._edge_inputs or not var.isreg else '<='
 
-    self._emit_line(f'{xdelay}{cont_assign}{var.value} {asop} {xvalue};')
+    self._emit_line(f'{xdelay}{cont_assign}{var.value} {asop} {xvalue};',
+                    dce_name=self._dce_target(var), dce_keep=keep)
 
   def make_port_arg(self, port_arg):
     return port_arg
@@ -624,6 +636,7 @@ class Verilog_Emitter(Emitter):
         self._emit_line(f'{inst.name} #(' + ', '.join(params) + f') {iid}(' + ', '.join(args) + ');')
 
     self._emit_line(f'endmodule')
+    self._module_code_end()
     self._module_reset()
 
   def emit_process_decl(self):
@@ -666,6 +679,12 @@ class Verilog_Emitter(Emitter):
 
     self.process_vars_place = self.emit_placement(extra_indent=1)
 
+  def _module_reset(self):
+    super()._module_reset()
+    # Latency (in clock cycles) of the results of the pipelined floating point
+    # operations, which are module signals.
+    self._fp_latencies = dict()
+
   def _process_reset(self):
     super()._process_reset()
     self._edge_inputs = []
@@ -680,17 +699,17 @@ class Verilog_Emitter(Emitter):
 
   def emit_If(self, test):
     xtest = self._cast(test, BOOL)
-    self._emit_line(f'if {paren(xtest)} begin')
+    self._emit_line(f'if ({xtest}) begin', dce_block=1)
 
   def emit_Elif(self, test):
     xtest = self._cast(test, BOOL)
-    self._emit_line(f'end else if {paren(xtest)} begin')
+    self._emit_line(f'end else if ({xtest}) begin', dce_block=0)
 
   def emit_Else(self):
-    self._emit_line(f'end else begin')
+    self._emit_line(f'end else begin', dce_block=0)
 
   def emit_EndIf(self):
-    self._emit_line(f'end')
+    self._emit_line(f'end', dce_block=-1)
 
   def emit_For(self, vname, start, end, step):
     if step > 0:
@@ -701,10 +720,10 @@ class Verilog_Emitter(Emitter):
     vtype = 'genvar' if self._proc.kind == ROOT_PROCESS else 'longint'
 
     self._emit_line(f'for ({vtype} {vname} = {start}; {vname} {loop_cmp} {end}; ' \
-                    f'{vname} {loop_incr} {abs(step)}) begin')
+                    f'{vname} {loop_incr} {abs(step)}) begin', dce_block=1)
 
   def emit_EndFor(self):
-    self._emit_line(f'end')
+    self._emit_line(f'end', dce_block=-1)
 
   def emit_Break(self):
     self._emit_line(f'break;')
@@ -740,15 +759,78 @@ class Verilog_Emitter(Emitter):
   def _build_op(self, op, left, right):
     sop = _OPSYMS[pyiu.classof(op)]
     if sop.isfn:
-      return f'{sop.sym}({paren(left)}, {paren(right)})'
+      return Expr(f'{sop.sym}({paren(left)}, {paren(right)})', atomic=True)
     else:
-      return f'{paren(left)} {sop.sym} {paren(right)}'
+      return Expr(f'{paren(left)} {sop.sym} {paren(right)}')
+
+  def fp_latency(self):
+    return self.get_context('fp_pipeline', self._cfg.get('fp_pipeline', 0))
+
+  def _fp_clock(self):
+    # Lazy import to avoid cycles.
+    from . import xlib
+
+    # The pipeline registers would make the results of non clocked processes
+    # depend on a clock their sensitivity list does not have.
+    if not self.is_clocked_process():
+      fatal(f'Pipelined floating point operations (fp_pipeline={self.fp_latency()}) ' \
+            f'can only be used within clocked processes')
+
+    clock = self.get_context('fp_clock', self._cfg.get('fp_clock', 'CLK'))
+    try:
+      return xlib.load(clock)
+    except NameError:
+      fatal(f'Clock signal "{clock}" for the pipelined floating point operations ' \
+            f'(fp_pipeline={self.fp_latency()}) not found, use the fp_clock ' \
+            f'context (or emitter configuration) to select it', exc=NameError)
+
+  def _fp_operand_latency(self, xvalue):
+    # Returns None for constant operands, which need no alignment.
+    names = _IDENT_RX.findall(_NUMBER_RX.sub('', xvalue))
+    if names:
+      return max(self._fp_latencies.get(name, 0) for name in names)
+
+  def _fp_align(self, operands, dtype):
+    latencies = [self._fp_operand_latency(x) for x in operands]
+    latency = max((x for x in latencies if x is not None), default=0)
+    if latency == 0:
+      return operands, 0
+
+    # Operands with lower latency (like input signals mixed with the results of
+    # pipelined operations) are delayed, so that the operation sees values
+    # computed from the same input sample.
+    aligned = []
+    for xvalue, xlatency in zip(operands, latencies):
+      if xlatency is not None and xlatency < latency:
+        delayed = self._mod_call('delay_pipe', dtype, xvalue,
+                                 N=dtype.nbits,
+                                 STAGES=latency - xlatency,
+                                 CLK=self._fp_clock())
+        xvalue = self.svalue(Value(dtype, delayed))
+
+      aligned.append(xvalue)
+
+    return aligned, latency
 
   def _build_arith_op(self, op, left, right, dtype):
     if isinstance(dtype, Float):
       fspec = self.float_spec(dtype)
       opfn = _FLOAT_OPFNS[pyiu.classof(op)]
 
+      (left, right), latency = self._fp_align((left, right), dtype)
+
+      stages = self.fp_latency()
+      if stages > 0 and opfn in _FLOAT_PIPE_OPS:
+        result = self._mod_call(f'{opfn}_pipe', dtype, left, right,
+                                FPEXP=fspec.exp,
+                                FPMANT=fspec.mant,
+                                STAGES=stages,
+                                CLK=self._fp_clock())
+
+        self._fp_latencies[self.svalue(Value(dtype, result))] = latency + stages
+
+        return result
+
       return self._mod_call(opfn, dtype, left, right,
                             FPEXP=fspec.exp,
                             FPMANT=fspec.mant)
@@ -353,13 +353,13 @@ class VHDL_Emitter(Emitter):
     if isinstance(value, Value) and value.dtype == dtype:
       return self.svalue(value)
 
-    return self._do_cast(value, dtype)
+    return self._cached_cast(value, dtype)
 
   def cast(self, value, dtype, isreg=None):
     if isinstance(value, Value) and value.dtype == dtype:
       return value
 
-    xvalue = self._do_cast(value, dtype)
+    xvalue = self._cached_cast(value, dtype)
     if isreg is None and isinstance(value, Value):
       isreg = value.isreg
 
@@ -472,7 +472,7 @@ class VHDL_Emitter(Emitter):
     else:
       vinit = ''
 
-    self._emit_line(f'{vprefix} {name} : {vtype}{vinit};')
+    self._emit_line(f'{vprefix} {name} : {vtype}{vinit};', dce_name=name, dce_decl=True)
 
     vspec = var.vspec
     if vspec is not None and vspec.attributes is not None:
@@ -506,7 +506,8 @@ class VHDL_Emitter(Emitter):
     else:
       asop = ':=' if var.isreg is False else '<='
 
-    self._emit_line(f'{var.value} {asop} {xtrans}{xvalue}{xdelay};')
+    self._emit_line(f'{var.value} {asop} {xtrans}{xvalue}{xdelay};',
+                    dce_name=self._dce_target(var))
 
   def make_port_arg(self, port_arg):
     return port_arg.new_isreg(False)
@@ -608,6 +609,7 @@ class VHDL_Emitter(Emitter):
     self._emit_line(f'end architecture;')
 
     self._mod_attributes = dict()
+    self._module_code_end()
     self._module_reset()
 
   def emit_process_decl(self):
@@ -658,32 +660,33 @@ class VHDL_Emitter(Emitter):
 
   def emit_If(self, test):
     xtest = self._cast(test, BOOL)
-    self._emit_line(f'if {xtest} then')
+    self._emit_line(f'if {xtest} then', dce_block=1)
 
   def emit_Elif(self, test):
     xtest = self._cast(test, BOOL)
-    self._emit_line(f'elsif {xtest} then')
+    self._emit_line(f'elsif {xtest} then', dce_block=0)
 
   def emit_Else(self):
-    self._emit_line(f'else')
+    self._emit_line(f'else', dce_block=0)
 
   def emit_EndIf(self):
-    self._emit_line(f'end if;')
+    self._emit_line(f'end if;', dce_block=-1)
 
   def emit_For(self, vname, start, end, step):
     loop_dir = 'to' if step > 0 else 'downto'
 
     if self._proc.kind == ROOT_PROCESS:
       gname = self._revgen.newname('genfor')
-      self._emit_line(f'{gname}: for {vname} in {start} {loop_dir} {end} generate')
+      self._emit_line(f'{gname}: for {vname} in {start} {loop_dir} {end} generate',
+                      dce_block=1)
     else:
-      self._emit_line(f'for {vname} in {start} {loop_dir} {end} loop')
+      self._emit_line(f'for {vname} in {start} {loop_dir} {end} loop', dce_block=1)
 
   def emit_EndFor(self):
     if self._proc.kind == ROOT_PROCESS:
-      self._emit_line(f'end generate;')
+      self._emit_line(f'end generate;', dce_block=-1)
     else:
-      self._emit_line(f'end loop;')
+      self._emit_line(f'end loop;', dce_block=-1)
 
   def emit_Break(self):
     self._emit_line(f'exit;')
@@ -727,11 +730,11 @@ class VHDL_Emitter(Emitter):
     if sop.isfn:
       arglist = ', '.join(paren(arg) for arg in args)
 
-      return f'{sop.sym}({arglist})'
+      return Expr(f'{sop.sym}({arglist})', atomic=True)
     else:
       opsep = f' {sop.sym} '
 
-      return opsep.join(paren(arg) for arg in args)
+      return Expr(opsep.join(paren(arg) for arg in args))
 
   def _arith_ctype_cast(self, arg, dtype):
     if isinstance(arg, int):
@@ -754,7 +757,7 @@ class VHDL_Emitter(Emitter):
       # The signed/unsigned multiplication result has a number of bits which is the
       # sum of the ones of the operands, which is not the behaviour we want.
       if isinstance(op, ast.Mult) and isinstance(left.dtype, (Sint, Uint)):
-        result = f'resize({result}, {left.dtype.nbits})'
+        result = Expr(f'resize({result}, {left.dtype.nbits})', atomic=True)
 
       return Value(left.dtype, result)
     elif isinstance(op, (ast.LShift, ast.RShift)):
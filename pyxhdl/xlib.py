@@ -144,6 +144,7 @@ float_equal = create_function(
   {
     'vhdl': 'pyxhdl.float_equal',
     'verilog': Verilog_Emitter.fpmod_resolve('vfpu', 'rcloseto', 0),
+    'pysim': 'pyxhdl.float_equal',
   },
   fnsig='f*, real, real',
   dtype=BOOL)
@@ -154,6 +155,7 @@ real_equal = create_function(
   {
     'vhdl': 'pyxhdl.float_equal',
     'verilog': 'pyxhdl::float_equal',
+    'pysim': 'pyxhdl.float_equal',
   },
   fnsig='real, real, real',
   dtype=BOOL)
@@ -176,3 +178,15 @@ def load_extern_module(path):
 
   return ctx.emitter.load_extern_module(path)
 
+
+def pipeline_stage() -> int:
+  ctx = CodeGen.current()
+
+  return ctx.pipeline_stage()
+
+
+def fp_latency() -> int:
+  ctx = CodeGen.current()
+
+  return ctx.emitter.fp_latency()
+
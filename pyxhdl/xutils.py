@@ -1,3 +1,5 @@
+import operator
+
 from .common_defs import *
 from .decorators import *
 from .emitter import *
@@ -67,6 +69,211 @@ def split(src, *sizes, base=0) -> tuple[Value]:
   return tuple(values)
 
 
+@hdl
+def reduce_tree(op, values, stages=None) -> Value:
+  level = list(values)
+  if not level:
+    fatal(f'Empty reduction', exc=ValueError)
+
+  # The values are combined pairwise, level by level, so that the resulting tree
+  # has log2(N) depth. With stages, a register stage is inserted every stages levels
+  # (see reduce_stages()), which is only meaningful within clocked processes.
+  depth = 0
+  while len(level) > 1:
+    next_level = [op(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2 != 0:
+      next_level.append(level[-1])
+
+    level = next_level
+    depth += 1
+
+    if stages is not None and depth % stages == 0 and len(level) > 1:
+      regs = []
+      for value in level:
+        rvalue = mkreg(value.dtype, name=_xname('reduce'))
+
+        rvalue = value
+        regs.append(rvalue)
+
+        del rvalue
+
+      level = regs
+
+  return level[0]
+
+
+def reduce_stages(count, stages=None):
+  depth = max(count - 1, 0).bit_length()
+
+  return (depth - 1) // stages if stages and depth > 0 else 0
+
+
+@hdl
+def _as_variable(value) -> Value:
+  return value if value.ref is not None else snap(value)
+
+
+@hdl
+def _bit_values(values):
+  if not isinstance(values, Value):
+    return list(values)
+
+  bits = _as_variable(values)
+
+  return [bits[i] for i in range(bits.dtype.nbits)]
+
+
+@hdl
+def reduce_sum(values, dtype=None, stages=None) -> Value:
+  values = list(values)
+  if not values:
+    fatal(f'Empty reduction', exc=ValueError)
+
+  # Integer sums are widened, so that they cannot overflow.
+  if dtype is None:
+    dtype = values[0].dtype
+    if isinstance(dtype, (Uint, Sint)):
+      dtype = type(dtype)(dtype.nbits + (len(values) - 1).bit_length())
+
+  return reduce_tree(operator.add, [XL.cast(value, dtype) for value in values],
+                     stages=stages)
+
+
+@hdl
+def _max(a, b) -> Value:
+  result = mkwire(a.dtype, name=_xname('max'))
+
+  result = a if a >= b else b
+
+  return result
+
+
+@hdl
+def _min(a, b) -> Value:
+  result = mkwire(a.dtype, name=_xname('min'))
+
+  result = a if a <= b else b
+
+  return result
+
+
+@hdl
+def reduce_max(values, stages=None) -> Value:
+  return reduce_tree(_max, values, stages=stages)
+
+
+@hdl
+def reduce_min(values, stages=None) -> Value:
+  return reduce_tree(_min, values, stages=stages)
+
+
+@hdl
+def reduce_and(values, stages=None) -> Value:
+  return reduce_tree(operator.and_, _bit_values(values), stages=stages)
+
+
+@hdl
+def reduce_or(values, stages=None) -> Value:
+  return reduce_tree(operator.or_, _bit_values(values), stages=stages)
+
+
+@hdl
+def reduce_xor(values, stages=None) -> Value:
+  return reduce_tree(operator.xor, _bit_values(values), stages=stages)
+
+
+@hdl
+def popcount(value, stages=None) -> Value:
+  bits = _as_variable(value)
+
+  # Single bit slices (instead of bit indexing) so that the casts work for the
+  # VHDL backend as well.
+  dtype = Uint(bits.dtype.nbits.bit_length())
+
+  return reduce_tree(operator.add,
+                     [XL.cast(bits[i: i + 1], dtype) for i in range(bits.dtype.nbits)],
+                     stages=stages)
+
+
+@hdl
+def lzc(value) -> Value:
+  nbits = value.dtype.nbits
+  width = 1 << max(nbits - 1, 1).bit_length()
+  bits = _as_variable(value)
+
+  # The value is padded to a power of two width with trailing ones, which stop the
+  # count at nbits for zero values.
+  if width > nbits:
+    padded = mkwire(Bits(width), name=_xname('lzc_pad'))
+    padded[: width - nbits] = (1 << (width - nbits)) - 1
+    padded[width - nbits: ] = bits
+  else:
+    padded = bits
+
+  # Every tree node holds a valid bit (some bit set within its span) and the count
+  # of its leading zeros, obtained from the ones of its two children, so that the
+  # tree depth is log2(width).
+  nodes = width // 2
+  valids = [mkwire(Bits(nodes), name=_xname('lzc_valid'))]
+  counts = [mkwire(Bits(nodes), name=_xname('lzc_count'))]
+  for i in range(nodes):
+    valids[0][i] = padded[2 * i + 1] | padded[2 * i]
+    counts[0][i] = ~padded[2 * i + 1]
+
+  csize = 1
+  while nodes > 1:
+    nodes //= 2
+    valid, count = valids[-1], counts[-1]
+
+    valids.append(mkwire(Bits(nodes), name=_xname('lzc_valid')))
+    counts.append(mkwire(Bits(nodes * (csize + 1)), name=_xname('lzc_count')))
+    for i in range(nodes):
+      hcount = count[(2 * i + 1) * csize: (2 * i + 2) * csize]
+      lcount = count[2 * i * csize: (2 * i + 1) * csize]
+
+      valids[-1][i] = valid[2 * i + 1] | valid[2 * i]
+      counts[-1][i * (csize + 1): (i + 1) * (csize + 1)] = \
+        ~valid[2 * i + 1: 2 * i + 2] @ (hcount if valid[2 * i + 1] == 1 else lcount)
+
+      del hcount, lcount
+
+    del valid, count
+
+    csize += 1
+
+  valid, count = valids[-1], counts[-1]
+
+  result = mkwire(Uint(nbits.bit_length()), name=_xname('lzc'))
+  if width > nbits:
+    result = count
+  else:
+    result = XL.cast(count, result.dtype) if valid == 1 else nbits
+
+  return result
+
+
+@hdl
+def tzc(value) -> Value:
+  return lzc(bit_swap(value))
+
+
+@hdl
+def onehot_to_bin(value) -> Value:
+  nbits = value.dtype.nbits
+  bits = _as_variable(value)
+
+  # Every result bit is the OR of the input bits whose index has that bit set.
+  result = mkwire(Bits(max(nbits - 1, 1).bit_length()), name=_xname('onehot'))
+  for k in range(result.dtype.nbits):
+    terms = [bits[i] for i in range(nbits) if (i >> k) & 1 != 0]
+    if len(terms) > 0:
+      result[k] = reduce_or(terms)
+    else:
+      result[k] = 0
+
+  return XL.cast(result, Uint(result.dtype.nbits))
+
+
 def bitfill(bitval, n):
   bitstr = str(bitval) if not isinstance(bitval, str) else bitval
   if bitstr not in VALID_BITS:
@@ -0,0 +1,58 @@
+/* verilator lint_off WIDTH */
+
+`timescale 1 ns / 100 ps
+
+
+package fp;
+  let MAX(A, B) = ((A > B) ? A : B);
+  let MIN(A, B) = ((A > B) ? B : A);
+  let ABS(A) = (($signed(A) >= 0) ? A : -$signed(A));
+  let FABS(A) = ((A >= 0.0) ? A : -A);
+
+  let EXP_OFFSET(NX) = (2**(NX - 1) - 1);
+endpackage
+
+// This in theory should be a typedef within the FPU interface, but then
+// many HDL tools do not support hierarchical type dereferencing.
+`define IEEE754(NX, NM) \
+struct packed { \
+  logic  sign; \
+  logic [NX - 1: 0] exp; \
+  logic [NM - 1: 0] mant; \
+  }
+
+
+// PyXHDL support functions.
+
+package pyxhdl;
+
+  function automatic bit float_equal(real value, real ref_value, real eps);
+    real toll = fp::MAX(fp::FABS(value), fp::FABS(ref_value)) * eps;
+
+    begin
+      float_equal = (fp::FABS(value - ref_value) < toll) ? 1'b1 : 1'b0;
+    end
+  endfunction
+endpackage
+
+
+
+// Entity "ConstFoldEnt" is "ConstFoldEnt" with:
+// 	args={'A': 'uint(8)', 'XOUT': 'uint(8)', 'YOUT': 'uint(16)'}
+// 	kwargs={}
+module ConstFoldEnt(A, XOUT, YOUT);
+  input logic [7: 0] A;
+  output logic [7: 0] XOUT;
+  output logic [15: 0] YOUT;
+  const logic [7: 0] width = 8'd12;
+  const logic [7: 0] scale = 8'd3;
+  const logic debug = 0 != 0;
+  always @(A)
+  tester : begin
+    XOUT = (A + 8'd36) - 8'd3;
+    YOUT = 16'(A + 8'd252);
+    YOUT = 16'd9219;
+    XOUT = XOUT + scale;
+    YOUT = 16'(8'(8'd144 * scale));
+  end
+endmodule
@@ -0,0 +1,71 @@
+/* verilator lint_off WIDTH */
+
+`timescale 1 ns / 100 ps
+
+
+package fp;
+  let MAX(A, B) = ((A > B) ? A : B);
+  let MIN(A, B) = ((A > B) ? B : A);
+  let ABS(A) = (($signed(A) >= 0) ? A : -$signed(A));
+  let FABS(A) = ((A >= 0.0) ? A : -A);
+
+  let EXP_OFFSET(NX) = (2**(NX - 1) - 1);
+endpackage
+
+// This in theory should be a typedef within the FPU interface, but then
+// many HDL tools do not support hierarchical type dereferencing.
+`define IEEE754(NX, NM) \
+struct packed { \
+  logic  sign; \
+  logic [NX - 1: 0] exp; \
+  logic [NM - 1: 0] mant; \
+  }
+
+
+// PyXHDL support functions.
+
+package pyxhdl;
+
+  function automatic bit float_equal(real value, real ref_value, real eps);
+    real toll = fp::MAX(fp::FABS(value), fp::FABS(ref_value)) * eps;
+
+    begin
+      float_equal = (fp::FABS(value - ref_value) < toll) ? 1'b1 : 1'b0;
+    end
+  endfunction
+endpackage
+
+
+
+// Entity "CseEnt" is "CseEnt" with:
+// 	args={'A': 'uint(8)', 'B': 'uint(8)', 'C': 'uint(8)', 'XOUT': 'uint(8)', 'YOUT': 'uint(8)'}
+// 	kwargs={}
+module CseEnt(A, B, C, XOUT, YOUT);
+  input logic [7: 0] A;
+  input logic [7: 0] B;
+  input logic [7: 0] C;
+  output logic [7: 0] XOUT;
+  output logic [7: 0] YOUT;
+  logic [7: 0] x = 8'd0;
+  logic [7: 0] y = 8'd0;
+  always @(A or B or C)
+  tester : begin
+    automatic logic [7: 0] cse0;
+    x = 8'((A + B) * (A - C));
+    cse0 = 8'((A + B) * (A - C));
+    y = cse0;
+    if (A > B) begin
+      x = cse0 + 1;
+      y = 8'((A + C) * (B - C));
+    end else if (A == C) begin
+      y = 8'((A + C) * (B - C));
+    end else begin
+      y = cse0 - 1;
+    end
+    x = x + 8'((A + C) * (B - C));
+    x = x - 8'((x + B) * C);
+    y = y + 8'((x + B) * C);
+    XOUT = x;
+    YOUT = y;
+  end
+endmodule
@@ -0,0 +1,62 @@
+/* verilator lint_off WIDTH */
+
+`timescale 1 ns / 100 ps
+
+
+package fp;
+  let MAX(A, B) = ((A > B) ? A : B);
+  let MIN(A, B) = ((A > B) ? B : A);
+  let ABS(A) = (($signed(A) >= 0) ? A : -$signed(A));
+  let FABS(A) = ((A >= 0.0) ? A : -A);
+
+  let EXP_OFFSET(NX) = (2**(NX - 1) - 1);
+endpackage
+
+// This in theory should be a typedef within the FPU interface, but then
+// many HDL tools do not support hierarchical type dereferencing.
+`define IEEE754(NX, NM) \
+struct packed { \
+  logic  sign; \
+  logic [NX - 1: 0] exp; \
+  logic [NM - 1: 0] mant; \
+  }
+
+
+// PyXHDL support functions.
+
+package pyxhdl;
+
+  function automatic bit float_equal(real value, real ref_value, real eps);
+    real toll = fp::MAX(fp::FABS(value), fp::FABS(ref_value)) * eps;
+
+    begin
+      float_equal = (fp::FABS(value - ref_value) < toll) ? 1'b1 : 1'b0;
+    end
+  endfunction
+endpackage
+
+
+
+// Entity "DceFlowEnt" is "DceFlowEnt" with:
+// 	args={'A': 'uint(8)', 'B': 'uint(8)', 'RA': 'real()', 'RB': 'real()', 'XOUT': 'uint(8)', 'YOUT': 'uint(8)'}
+// 	kwargs={}
+module DceFlowEnt(A, B, RA, RB, XOUT, YOUT);
+  input logic [7: 0] A;
+  input logic [7: 0] B;
+  input real RA;
+  input real RB;
+  output logic [7: 0] XOUT;
+  output logic [7: 0] YOUT;
+  always @(A or B or RA or RB)
+  run : begin
+    automatic logic flag;
+    if (A > B) begin
+    end else if (A == B) begin
+    end else begin
+      XOUT = A - B;
+    end
+    flag = pyxhdl::float_equal(RA, RB, 1e-06);
+    #5ns;
+    YOUT = 8'(A * B);
+  end
+endmodule
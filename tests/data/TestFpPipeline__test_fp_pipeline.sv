@@ -0,0 +1,186 @@
+/* verilator lint_off WIDTH */
+
+`timescale 1 ns / 100 ps
+
+
+package fp;
+  let MAX(A, B) = ((A > B) ? A : B);
+  let MIN(A, B) = ((A > B) ? B : A);
+  let ABS(A) = (($signed(A) >= 0) ? A : -$signed(A));
+  let FABS(A) = ((A >= 0.0) ? A : -A);
+
+  let EXP_OFFSET(NX) = (2**(NX - 1) - 1);
+endpackage
+
+// This in theory should be a typedef within the FPU interface, but then
+// many HDL tools do not support hierarchical type dereferencing.
+`define IEEE754(NX, NM) \
+struct packed { \
+  logic  sign; \
+  logic [NX - 1: 0] exp; \
+  logic [NM - 1: 0] mant; \
+  }
+
+
+// PyXHDL support functions.
+
+package pyxhdl;
+
+  function automatic bit float_equal(real value, real ref_value, real eps);
+    real toll = fp::MAX(fp::FABS(value), fp::FABS(ref_value)) * eps;
+
+    begin
+      float_equal = (fp::FABS(value - ref_value) < toll) ? 1'b1 : 1'b0;
+    end
+  endfunction
+endpackage
+
+
+
+/* verilator lint_off WIDTH */
+
+// Pipelined variants of the FPU operations, with a latency of STAGES clock cycles.
+// The combinational FPU logic result is registered STAGES times, and synthesis
+// register retiming (balancing) moves the registers within the logic, splitting
+// it into STAGES shorter paths. A zero STAGES value makes the operation purely
+// combinational.
+
+// FPU_PIPE
+module fpu_pipe(CLK, DIN, DOUT);
+  parameter integer N = 32;
+  parameter integer STAGES = 1;
+
+  input logic CLK;
+  input logic [N - 1: 0] DIN;
+  output logic [N - 1: 0] DOUT;
+
+  generate
+    if (STAGES == 0) begin : comb
+      assign DOUT = DIN;
+    end else begin : regs
+      logic [N - 1: 0] stage [STAGES];
+
+      always_ff @(posedge CLK) begin
+        stage[0] <= DIN;
+        for (integer i = 1; i < STAGES; i++) begin
+          stage[i] <= stage[i - 1];
+        end
+      end
+
+      assign DOUT = stage[STAGES - 1];
+    end
+  endgenerate
+endmodule
+
+
+// FPU_ADD_PIPE
+module fpu_add_pipe(CLK, A, B, XOUT);
+  parameter integer NX = 11;
+  parameter integer NM = 23;
+  parameter integer STAGES = 1;
+  localparam integer N = NX + NM + 1;
+
+  input logic CLK;
+  input logic [N - 1: 0] A;
+  input logic [N - 1: 0] B;
+  output logic [N - 1: 0] XOUT;
+
+  logic [N - 1: 0] result;
+
+  fpu #(.NX(NX), .NM(NM)) core();
+
+  assign result = core.add(A, B);
+
+  fpu_pipe #(.N(N), .STAGES(STAGES)) pipe(.CLK(CLK), .DIN(result), .DOUT(XOUT));
+endmodule
+
+
+// FPU_SUB_PIPE
+module fpu_sub_pipe(CLK, A, B, XOUT);
+  parameter integer NX = 11;
+  parameter integer NM = 23;
+  parameter integer STAGES = 1;
+  localparam integer N = NX + NM + 1;
+
+  input logic CLK;
+  input logic [N - 1: 0] A;
+  input logic [N - 1: 0] B;
+  output logic [N - 1: 0] XOUT;
+
+  logic [N - 1: 0] result;
+
+  fpu #(.NX(NX), .NM(NM)) core();
+
+  assign result = core.sub(A, B);
+
+  fpu_pipe #(.N(N), .STAGES(STAGES)) pipe(.CLK(CLK), .DIN(result), .DOUT(XOUT));
+endmodule
+
+
+// FPU_MUL_PIPE
+module fpu_mul_pipe(CLK, A, B, XOUT);
+  parameter integer NX = 11;
+  parameter integer NM = 23;
+  parameter integer STAGES = 1;
+  localparam integer N = NX + NM + 1;
+
+  input logic CLK;
+  input logic [N - 1: 0] A;
+  input logic [N - 1: 0] B;
+  output logic [N - 1: 0] XOUT;
+
+  logic [N - 1: 0] result;
+
+  fpu #(.NX(NX), .NM(NM)) core();
+
+  assign result = core.mul(A, B);
+
+  fpu_pipe #(.N(N), .STAGES(STAGES)) pipe(.CLK(CLK), .DIN(result), .DOUT(XOUT));
+endmodule
+
+
+// FPU_DIV_PIPE
+module fpu_div_pipe(CLK, A, B, XOUT);
+  parameter integer NX = 11;
+  parameter integer NM = 23;
+  parameter integer STAGES = 1;
+  localparam integer N = NX + NM + 1;
+
+  input logic CLK;
+  input logic [N - 1: 0] A;
+  input logic [N - 1: 0] B;
+  output logic [N - 1: 0] XOUT;
+
+  logic [N - 1: 0] result;
+
+  fpu #(.NX(NX), .NM(NM)) core();
+
+  assign result = core.div(A, B);
+
+  fpu_pipe #(.N(N), .STAGES(STAGES)) pipe(.CLK(CLK), .DIN(result), .DOUT(XOUT));
+endmodule
+
+// Entity "FpPipelineEnt" is "FpPipelineEnt" with:
+// 	args={'CLK': 'bits(1)', 'A': 'float(32)', 'B': 'float(32)', 'VIN': 'bits(1)', 'XOUT': 'float(32)', 'VOUT': 'bits(1)'}
+// 	kwargs={}
+module FpPipelineEnt(CLK, A, B, VIN, XOUT, VOUT);
+  input logic CLK;
+  input logic [31: 0] A;
+  input logic [31: 0] B;
+  input logic VIN;
+  output logic [31: 0] XOUT;
+  output logic VOUT;
+  logic [31: 0] mul_pipe0;
+  logic [31: 0] delay_pipe0;
+  logic [31: 0] add_pipe0;
+  logic [3: 0] vdelay;
+  fpu_mul_pipe #(.NX(8), .NM(23), .STAGES(2)) fpu_mul_pipe_1(.A(A), .B(B), .CLK(CLK), .XOUT(mul_pipe0));
+  fpu_pipe #(.N(32), .STAGES(2)) fpu_pipe_1(.DIN(A), .CLK(CLK), .DOUT(delay_pipe0));
+  fpu_add_pipe #(.NX(8), .NM(23), .STAGES(2)) fpu_add_pipe_1(.A(mul_pipe0), .B(delay_pipe0), .CLK(CLK), .XOUT(add_pipe0));
+  always_ff @(posedge CLK)
+  run : begin
+    XOUT <= add_pipe0;
+    vdelay <= {vdelay[2: 0], VIN};
+    VOUT <= vdelay[3];
+  end
+endmodule
@@ -0,0 +1,66 @@
+/* verilator lint_off WIDTH */
+
+`timescale 1 ns / 100 ps
+
+
+package fp;
+  let MAX(A, B) = ((A > B) ? A : B);
+  let MIN(A, B) = ((A > B) ? B : A);
+  let ABS(A) = (($signed(A) >= 0) ? A : -$signed(A));
+  let FABS(A) = ((A >= 0.0) ? A : -A);
+
+  let EXP_OFFSET(NX) = (2**(NX - 1) - 1);
+endpackage
+
+// This in theory should be a typedef within the FPU interface, but then
+// many HDL tools do not support hierarchical type dereferencing.
+`define IEEE754(NX, NM) \
+struct packed { \
+  logic  sign; \
+  logic [NX - 1: 0] exp; \
+  logic [NM - 1: 0] mant; \
+  }
+
+
+// PyXHDL support functions.
+
+package pyxhdl;
+
+  function automatic bit float_equal(real value, real ref_value, real eps);
+    real toll = fp::MAX(fp::FABS(value), fp::FABS(ref_value)) * eps;
+
+    begin
+      float_equal = (fp::FABS(value - ref_value) < toll) ? 1'b1 : 1'b0;
+    end
+  endfunction
+endpackage
+
+
+
+// Entity "PipelineEnt" is "PipelineEnt" with:
+// 	args={'CLK': 'bits(1)', 'A': 'uint(8)', 'B': 'uint(8)', 'C': 'uint(8)', 'VIN': 'bits(1)', 'XOUT': 'uint(8)', 'VOUT': 'bits(1)'}
+// 	kwargs={}
+module PipelineEnt(CLK, A, B, C, VIN, XOUT, VOUT);
+  input logic CLK;
+  input logic [7: 0] A;
+  input logic [7: 0] B;
+  input logic [7: 0] C;
+  input logic VIN;
+  output logic [7: 0] XOUT;
+  output logic VOUT;
+  logic [7: 0] prod_s1;
+  logic [7: 0] C_s1;
+  logic [7: 0] acc_s2;
+  logic VIN_s1;
+  logic VIN_s2;
+  always_ff @(posedge CLK)
+  run : begin
+    prod_s1 <= 8'(A * B);
+    C_s1 <= C;
+    VIN_s1 <= VIN;
+    acc_s2 <= prod_s1 + C_s1;
+    VIN_s2 <= VIN_s1;
+    XOUT <= acc_s2 ^ (acc_s2 >> 4);
+    VOUT <= VIN_s2;
+  end
+endmodule
@@ -0,0 +1,183 @@
+/* verilator lint_off WIDTH */
+
+`timescale 1 ns / 100 ps
+
+
+package fp;
+  let MAX(A, B) = ((A > B) ? A : B);
+  let MIN(A, B) = ((A > B) ? B : A);
+  let ABS(A) = (($signed(A) >= 0) ? A : -$signed(A));
+  let FABS(A) = ((A >= 0.0) ? A : -A);
+
+  let EXP_OFFSET(NX) = (2**(NX - 1) - 1);
+endpackage
+
+// This in theory should be a typedef within the FPU interface, but then
+// many HDL tools do not support hierarchical type dereferencing.
+`define IEEE754(NX, NM) \
+struct packed { \
+  logic  sign; \
+  logic [NX - 1: 0] exp; \
+  logic [NM - 1: 0] mant; \
+  }
+
+
+// PyXHDL support functions.
+
+package pyxhdl;
+
+  function automatic bit float_equal(real value, real ref_value, real eps);
+    real toll = fp::MAX(fp::FABS(value), fp::FABS(ref_value)) * eps;
+
+    begin
+      float_equal = (fp::FABS(value - ref_value) < toll) ? 1'b1 : 1'b0;
+    end
+  endfunction
+endpackage
+
+
+
+// Entity "BitScanTest" is "BitScanTest" with:
+// 	args={'A': 'bits(11)', 'B': 'bits(8)', 'C': 'bits(12)', 'XLZC': 'uint(4)', 'XTZC': 'uint(4)', 'XLZC_POW2': 'uint(4)', 'XONEHOT': 'uint(4)'}
+// 	kwargs={}
+module BitScanTest(A, B, C, XLZC, XTZC, XLZC_POW2, XONEHOT);
+  input logic [10: 0] A;
+  input logic [7: 0] B;
+  input logic [11: 0] C;
+  output logic [3: 0] XLZC;
+  output logic [3: 0] XTZC;
+  output logic [3: 0] XLZC_POW2;
+  output logic [3: 0] XONEHOT;
+  always @(A or B or C)
+  run : begin
+    automatic logic [15: 0] XU_lzc_pad0;
+    automatic logic [7: 0] XU_lzc_valid0;
+    automatic logic [7: 0] XU_lzc_count0;
+    automatic logic [3: 0] XU_lzc_valid1;
+    automatic logic [7: 0] XU_lzc_count1;
+    automatic logic [1: 0] XU_lzc_valid2;
+    automatic logic [5: 0] XU_lzc_count2;
+    automatic logic [0: 0] XU_lzc_valid3;
+    automatic logic [3: 0] XU_lzc_count3;
+    automatic logic [3: 0] XU_lzc0;
+    automatic logic [10: 0] XU_bit_swap0;
+    automatic logic [15: 0] XU_lzc_pad1;
+    automatic logic [7: 0] XU_lzc_valid4;
+    automatic logic [7: 0] XU_lzc_count4;
+    automatic logic [3: 0] XU_lzc_valid5;
+    automatic logic [7: 0] XU_lzc_count5;
+    automatic logic [1: 0] XU_lzc_valid6;
+    automatic logic [5: 0] XU_lzc_count6;
+    automatic logic [0: 0] XU_lzc_valid7;
+    automatic logic [3: 0] XU_lzc_count7;
+    automatic logic [3: 0] XU_lzc1;
+    automatic logic [3: 0] XU_lzc_valid8;
+    automatic logic [3: 0] XU_lzc_count8;
+    automatic logic [1: 0] XU_lzc_valid9;
+    automatic logic [3: 0] XU_lzc_count9;
+    automatic logic [0: 0] XU_lzc_valid10;
+    automatic logic [2: 0] XU_lzc_count10;
+    automatic logic [3: 0] XU_lzc2;
+    automatic logic [3: 0] XU_onehot0;
+    XU_lzc_pad0[4: 0] = 5'(31);
+    XU_lzc_pad0[15: 5] = A;
+    XU_lzc_valid0[0] = XU_lzc_pad0[1] | XU_lzc_pad0[0];
+    XU_lzc_count0[0] = ~XU_lzc_pad0[1];
+    XU_lzc_valid0[1] = XU_lzc_pad0[3] | XU_lzc_pad0[2];
+    XU_lzc_count0[1] = ~XU_lzc_pad0[3];
+    XU_lzc_valid0[2] = XU_lzc_pad0[5] | XU_lzc_pad0[4];
+    XU_lzc_count0[2] = ~XU_lzc_pad0[5];
+    XU_lzc_valid0[3] = XU_lzc_pad0[7] | XU_lzc_pad0[6];
+    XU_lzc_count0[3] = ~XU_lzc_pad0[7];
+    XU_lzc_valid0[4] = XU_lzc_pad0[9] | XU_lzc_pad0[8];
+    XU_lzc_count0[4] = ~XU_lzc_pad0[9];
+    XU_lzc_valid0[5] = XU_lzc_pad0[11] | XU_lzc_pad0[10];
+    XU_lzc_count0[5] = ~XU_lzc_pad0[11];
+    XU_lzc_valid0[6] = XU_lzc_pad0[13] | XU_lzc_pad0[12];
+    XU_lzc_count0[6] = ~XU_lzc_pad0[13];
+    XU_lzc_valid0[7] = XU_lzc_pad0[15] | XU_lzc_pad0[14];
+    XU_lzc_count0[7] = ~XU_lzc_pad0[15];
+    XU_lzc_valid1[0] = XU_lzc_valid0[1] | XU_lzc_valid0[0];
+    XU_lzc_count1[1: 0] = {~XU_lzc_valid0[1: 1], (XU_lzc_valid0[1] == 1'(1)) ? XU_lzc_count0[1: 1] : XU_lzc_count0[0: 0]};
+    XU_lzc_valid1[1] = XU_lzc_valid0[3] | XU_lzc_valid0[2];
+    XU_lzc_count1[3: 2] = {~XU_lzc_valid0[3: 3], (XU_lzc_valid0[3] == 1'(1)) ? XU_lzc_count0[3: 3] : XU_lzc_count0[2: 2]};
+    XU_lzc_valid1[2] = XU_lzc_valid0[5] | XU_lzc_valid0[4];
+    XU_lzc_count1[5: 4] = {~XU_lzc_valid0[5: 5], (XU_lzc_valid0[5] == 1'(1)) ? XU_lzc_count0[5: 5] : XU_lzc_count0[4: 4]};
+    XU_lzc_valid1[3] = XU_lzc_valid0[7] | XU_lzc_valid0[6];
+    XU_lzc_count1[7: 6] = {~XU_lzc_valid0[7: 7], (XU_lzc_valid0[7] == 1'(1)) ? XU_lzc_count0[7: 7] : XU_lzc_count0[6: 6]};
+    XU_lzc_valid2[0] = XU_lzc_valid1[1] | XU_lzc_valid1[0];
+    XU_lzc_count2[2: 0] = {~XU_lzc_valid1[1: 1], (XU_lzc_valid1[1] == 1'(1)) ? XU_lzc_count1[3: 2] : XU_lzc_count1[1: 0]};
+    XU_lzc_valid2[1] = XU_lzc_valid1[3] | XU_lzc_valid1[2];
+    XU_lzc_count2[5: 3] = {~XU_lzc_valid1[3: 3], (XU_lzc_valid1[3] == 1'(1)) ? XU_lzc_count1[7: 6] : XU_lzc_count1[5: 4]};
+    XU_lzc_valid3[0] = XU_lzc_valid2[1] | XU_lzc_valid2[0];
+    XU_lzc_count3[3: 0] = {~XU_lzc_valid2[1: 1], (XU_lzc_valid2[1] == 1'(1)) ? XU_lzc_count2[5: 3] : XU_lzc_count2[2: 0]};
+    XU_lzc0 = XU_lzc_count3;
+    XLZC = XU_lzc0;
+    XU_bit_swap0[0] = A[10];
+    XU_bit_swap0[1] = A[9];
+    XU_bit_swap0[2] = A[8];
+    XU_bit_swap0[3] = A[7];
+    XU_bit_swap0[4] = A[6];
+    XU_bit_swap0[5] = A[5];
+    XU_bit_swap0[6] = A[4];
+    XU_bit_swap0[7] = A[3];
+    XU_bit_swap0[8] = A[2];
+    XU_bit_swap0[9] = A[1];
+    XU_bit_swap0[10] = A[0];
+    XU_lzc_pad1[4: 0] = 5'(31);
+    XU_lzc_pad1[15: 5] = XU_bit_swap0;
+    XU_lzc_valid4[0] = XU_lzc_pad1[1] | XU_lzc_pad1[0];
+    XU_lzc_count4[0] = ~XU_lzc_pad1[1];
+    XU_lzc_valid4[1] = XU_lzc_pad1[3] | XU_lzc_pad1[2];
+    XU_lzc_count4[1] = ~XU_lzc_pad1[3];
+    XU_lzc_valid4[2] = XU_lzc_pad1[5] | XU_lzc_pad1[4];
+    XU_lzc_count4[2] = ~XU_lzc_pad1[5];
+    XU_lzc_valid4[3] = XU_lzc_pad1[7] | XU_lzc_pad1[6];
+    XU_lzc_count4[3] = ~XU_lzc_pad1[7];
+    XU_lzc_valid4[4] = XU_lzc_pad1[9] | XU_lzc_pad1[8];
+    XU_lzc_count4[4] = ~XU_lzc_pad1[9];
+    XU_lzc_valid4[5] = XU_lzc_pad1[11] | XU_lzc_pad1[10];
+    XU_lzc_count4[5] = ~XU_lzc_pad1[11];
+    XU_lzc_valid4[6] = XU_lzc_pad1[13] | XU_lzc_pad1[12];
+    XU_lzc_count4[6] = ~XU_lzc_pad1[13];
+    XU_lzc_valid4[7] = XU_lzc_pad1[15] | XU_lzc_pad1[14];
+    XU_lzc_count4[7] = ~XU_lzc_pad1[15];
+    XU_lzc_valid5[0] = XU_lzc_valid4[1] | XU_lzc_valid4[0];
+    XU_lzc_count5[1: 0] = {~XU_lzc_valid4[1: 1], (XU_lzc_valid4[1] == 1'(1)) ? XU_lzc_count4[1: 1] : XU_lzc_count4[0: 0]};
+    XU_lzc_valid5[1] = XU_lzc_valid4[3] | XU_lzc_valid4[2];
+    XU_lzc_count5[3: 2] = {~XU_lzc_valid4[3: 3], (XU_lzc_valid4[3] == 1'(1)) ? XU_lzc_count4[3: 3] : XU_lzc_count4[2: 2]};
+    XU_lzc_valid5[2] = XU_lzc_valid4[5] | XU_lzc_valid4[4];
+    XU_lzc_count5[5: 4] = {~XU_lzc_valid4[5: 5], (XU_lzc_valid4[5] == 1'(1)) ? XU_lzc_count4[5: 5] : XU_lzc_count4[4: 4]};
+    XU_lzc_valid5[3] = XU_lzc_valid4[7] | XU_lzc_valid4[6];
+    XU_lzc_count5[7: 6] = {~XU_lzc_valid4[7: 7], (XU_lzc_valid4[7] == 1'(1)) ? XU_lzc_count4[7: 7] : XU_lzc_count4[6: 6]};
+    XU_lzc_valid6[0] = XU_lzc_valid5[1] | XU_lzc_valid5[0];
+    XU_lzc_count6[2: 0] = {~XU_lzc_valid5[1: 1], (XU_lzc_valid5[1] == 1'(1)) ? XU_lzc_count5[3: 2] : XU_lzc_count5[1: 0]};
+    XU_lzc_valid6[1] = XU_lzc_valid5[3] | XU_lzc_valid5[2];
+    XU_lzc_count6[5: 3] = {~XU_lzc_valid5[3: 3], (XU_lzc_valid5[3] == 1'(1)) ? XU_lzc_count5[7: 6] : XU_lzc_count5[5: 4]};
+    XU_lzc_valid7[0] = XU_lzc_valid6[1] | XU_lzc_valid6[0];
+    XU_lzc_count7[3: 0] = {~XU_lzc_valid6[1: 1], (XU_lzc_valid6[1] == 1'(1)) ? XU_lzc_count6[5: 3] : XU_lzc_count6[2: 0]};
+    XU_lzc1 = XU_lzc_count7;
+    XTZC = XU_lzc1;
+    XU_lzc_valid8[0] = B[1] | B[0];
+    XU_lzc_count8[0] = ~B[1];
+    XU_lzc_valid8[1] = B[3] | B[2];
+    XU_lzc_count8[1] = ~B[3];
+    XU_lzc_valid8[2] = B[5] | B[4];
+    XU_lzc_count8[2] = ~B[5];
+    XU_lzc_valid8[3] = B[7] | B[6];
+    XU_lzc_count8[3] = ~B[7];
+    XU_lzc_valid9[0] = XU_lzc_valid8[1] | XU_lzc_valid8[0];
+    XU_lzc_count9[1: 0] = {~XU_lzc_valid8[1: 1], (XU_lzc_valid8[1] == 1'(1)) ? XU_lzc_count8[1: 1] : XU_lzc_count8[0: 0]};
+    XU_lzc_valid9[1] = XU_lzc_valid8[3] | XU_lzc_valid8[2];
+    XU_lzc_count9[3: 2] = {~XU_lzc_valid8[3: 3], (XU_lzc_valid8[3] == 1'(1)) ? XU_lzc_count8[3: 3] : XU_lzc_count8[2: 2]};
+    XU_lzc_valid10[0] = XU_lzc_valid9[1] | XU_lzc_valid9[0];
+    XU_lzc_count10[2: 0] = {~XU_lzc_valid9[1: 1], (XU_lzc_valid9[1] == 1'(1)) ? XU_lzc_count9[3: 2] : XU_lzc_count9[1: 0]};
+    XU_lzc2 = (XU_lzc_valid10 == 1'(1)) ? 4'(XU_lzc_count10) : 4'd8;
+    XLZC_POW2 = XU_lzc2;
+    XU_onehot0[0] = ((C[1] | C[3]) | (C[5] | C[7])) | (C[9] | C[11]);
+    XU_onehot0[1] = ((C[2] | C[3]) | (C[6] | C[7])) | (C[10] | C[11]);
+    XU_onehot0[2] = (C[4] | C[5]) | (C[6] | C[7]);
+    XU_onehot0[3] = (C[8] | C[9]) | (C[10] | C[11]);
+    XONEHOT = XU_onehot0;
+  end
+endmodule
@@ -0,0 +1,410 @@
+-- PyXHDL support functions.
+
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+use ieee.math_real.all;
+use ieee.float_pkg.all;
+
+package pyxhdl is
+  type uint_array1d is array(natural range <>) of unsigned;
+  type uint_array2d is array(natural range <>) of uint_array1d;
+  type uint_array3d is array(natural range <>) of uint_array2d;
+  type uint_array4d is array(natural range <>) of uint_array3d;
+
+  type sint_array1d is array(natural range <>) of signed;
+  type sint_array2d is array(natural range <>) of sint_array1d;
+  type sint_array3d is array(natural range <>) of sint_array2d;
+  type sint_array4d is array(natural range <>) of sint_array3d;
+
+  type bits_array1d is array(natural range <>) of std_logic_vector;
+  type bits_array2d is array(natural range <>) of bits_array1d;
+  type bits_array3d is array(natural range <>) of bits_array2d;
+  type bits_array4d is array(natural range <>) of bits_array3d;
+
+  type slv_array1d is array(natural range <>) of std_logic;
+  type slv_array2d is array(natural range <>) of slv_array1d;
+  type slv_array3d is array(natural range <>) of slv_array2d;
+  type slv_array4d is array(natural range <>) of slv_array3d;
+
+  type float_array1d is array(natural range <>) of float;
+  type float_array2d is array(natural range <>) of float_array1d;
+  type float_array3d is array(natural range <>) of float_array2d;
+  type float_array4d is array(natural range <>) of float_array3d;
+
+  type bool_array1d is array(natural range <>) of boolean;
+  type bool_array2d is array(natural range <>) of bool_array1d;
+  type bool_array3d is array(natural range <>) of bool_array2d;
+  type bool_array4d is array(natural range <>) of bool_array3d;
+
+  type integer_array1d is array(natural range <>) of integer;
+  type integer_array2d is array(natural range <>) of integer_array1d;
+  type integer_array3d is array(natural range <>) of integer_array2d;
+  type integer_array4d is array(natural range <>) of integer_array3d;
+
+  type real_array1d is array(natural range <>) of real;
+  type real_array2d is array(natural range <>) of real_array1d;
+  type real_array3d is array(natural range <>) of real_array2d;
+  type real_array4d is array(natural range <>) of real_array3d;
+
+  function sint_ifexp(test : in boolean; texp : in signed; fexp : in signed) return signed;
+  function uint_ifexp(test : in boolean; texp : in unsigned; fexp : in unsigned) return unsigned;
+  function bool_ifexp(test : in boolean; texp : in boolean; fexp : in boolean) return boolean;
+  function float_ifexp(test : in boolean; texp : in float; fexp : in float) return float;
+  function bits_ifexp(test : in boolean; texp : in std_logic_vector; fexp : in std_logic_vector) return std_logic_vector;
+  function bits_ifexp(test : in boolean; texp : in std_logic; fexp : in std_logic) return std_logic;
+  function real_ifexp(test : in boolean; texp : in real; fexp : in real) return real;
+  function integer_ifexp(test : in boolean; texp : in integer; fexp : in integer) return integer;
+
+  function bits_resize(value : in std_logic; nbits : in natural) return std_logic_vector;
+  function bits_resize(value : in std_logic_vector; nbits : in natural) return std_logic_vector;
+  function bits_select(value : in std_logic_vector; n : in natural) return std_logic;
+
+  function cvt_unsigned(value : in std_logic; nbits : in natural) return unsigned;
+  function cvt_signed(value : in std_logic; nbits : in natural) return signed;
+
+  function cvt_unsigned(value : in std_logic_vector; nbits : in natural) return unsigned;
+  function cvt_signed(value : in std_logic_vector; nbits : in natural) return signed;
+
+  function cvt_bits(value : in unsigned) return std_logic_vector;
+
+  function bit_shl(value : in unsigned; nbits : in natural) return unsigned;
+  function bit_shr(value : in unsigned; nbits : in natural) return unsigned;
+
+  function bit_shl(value : in std_logic_vector; nbits : in natural) return std_logic_vector;
+  function bit_shr(value : in std_logic_vector; nbits : in natural) return std_logic_vector;
+
+  function float_equal(value : in float; ref_value : in real; eps: in real) return boolean;
+  function float_equal(value : in real; ref_value : in real; eps: in real) return boolean;
+end package;
+
+package body pyxhdl is
+  function sint_ifexp(test : in boolean; texp : in signed; fexp : in signed) return signed is
+  begin
+    if test then
+      return texp;
+    else
+      return fexp;
+    end if;
+  end function;
+
+  function uint_ifexp(test : in boolean; texp : in unsigned; fexp : in unsigned) return unsigned is
+  begin
+    if test then
+      return texp;
+    else
+      return fexp;
+    end if;
+  end function;
+
+  function bool_ifexp(test : in boolean; texp : in boolean; fexp : in boolean) return boolean is
+  begin
+    if test then
+      return texp;
+    else
+      return fexp;
+    end if;
+  end function;
+
+  function float_ifexp(test : in boolean; texp : in float; fexp : in float) return float is
+  begin
+    if test then
+      return texp;
+    else
+      return fexp;
+    end if;
+  end function;
+
+  function bits_ifexp(test : in boolean; texp : in std_logic_vector; fexp : in std_logic_vector) return std_logic_vector is
+  begin
+    if test then
+      return texp;
+    else
+      return fexp;
+    end if;
+  end function;
+
+  function bits_ifexp(test : in boolean; texp : in std_logic; fexp : in std_logic) return std_logic is
+  begin
+    if test then
+      return texp;
+    else
+      return fexp;
+    end if;
+  end function;
+
+  function real_ifexp(test : in boolean; texp : in real; fexp : in real) return real is
+  begin
+    if test then
+      return texp;
+    else
+      return fexp;
+    end if;
+  end function;
+
+  function integer_ifexp(test : in boolean; texp : in integer; fexp : in integer) return integer is
+  begin
+    if test then
+      return texp;
+    else
+      return fexp;
+    end if;
+  end function;
+
+  function bits_resize(value : in std_logic; nbits : in natural) return std_logic_vector is
+    variable res : std_logic_vector(nbits - 1 downto 0) := (others => '0');
+  begin
+    res(0) := value;
+    return res;
+  end function;
+
+  function bits_resize(value : in std_logic_vector; nbits : in natural) return std_logic_vector is
+    variable res : std_logic_vector(nbits - 1 downto 0) := (others => '0');
+  begin
+    if nbits >= value'length then
+      res(value'length - 1 downto 0) := value;
+    else
+      res := value(nbits - 1 downto 0);
+    end if;
+    return res;
+  end function;
+
+  function bits_select(value : in std_logic_vector; n : in natural) return std_logic is
+  begin
+    return value(n);
+  end function;
+
+  function cvt_unsigned(value : in std_logic; nbits : in natural) return unsigned is
+  begin
+    return unsigned(bits_resize(value, nbits));
+  end function;
+
+  function cvt_signed(value : in std_logic; nbits : in natural) return signed is
+  begin
+    return signed(bits_resize(value, nbits));
+  end function;
+
+  function cvt_unsigned(value : in std_logic_vector; nbits : in natural) return unsigned is
+  begin
+    return unsigned(bits_resize(value, nbits));
+  end function;
+
+  function cvt_signed(value : in std_logic_vector; nbits : in natural) return signed is
+  begin
+    return signed(bits_resize(value, nbits));
+  end function;
+
+  function cvt_bits(value : in unsigned) return std_logic_vector is
+  begin
+    -- This API exists because std_logic_vector(value)(0) is illegal, while
+    -- cvt_bits(value)(0) is. Go figure.
+    return std_logic_vector(value);
+  end function;
+
+  function bit_shl(value : in unsigned; nbits : in natural) return unsigned is
+  begin
+    return shift_left(value, nbits);
+  end function;
+
+  function bit_shr(value : in unsigned; nbits : in natural) return unsigned is
+  begin
+    return shift_right(value, nbits);
+  end function;
+
+  function bit_shl(value : in std_logic_vector; nbits : in natural) return std_logic_vector is
+  begin
+    return std_logic_vector(shift_left(unsigned(value), nbits));
+  end function;
+
+  function bit_shr(value : in std_logic_vector; nbits : in natural) return std_logic_vector is
+  begin
+    return std_logic_vector(shift_right(unsigned(value), nbits));
+  end function;
+
+  function float_equal(value : in float; ref_value : in real; eps: in real) return boolean is
+    variable xvalue : real := to_real(value);
+    variable toll : real := realmax(abs(xvalue), abs(ref_value)) * eps;
+  begin
+    return abs(xvalue - ref_value) <= toll;
+  end function;
+
+  function float_equal(value : in real; ref_value : in real; eps: in real) return boolean is
+    variable toll : real := realmax(abs(value), abs(ref_value)) * eps;
+  begin
+    return abs(value - ref_value) <= toll;
+  end function;
+end package body;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+use ieee.math_real.all;
+use ieee.float_pkg.all;
+use std.textio.all;
+
+library work;
+use work.all;
+
+-- Entity "BitScanTest" is "BitScanTest" with:
+-- 	args={'A': 'bits(11)', 'B': 'bits(8)', 'C': 'bits(12)', 'XLZC': 'uint(4)', 'XTZC': 'uint(4)', 'XLZC_POW2': 'uint(4)', 'XONEHOT': 'uint(4)'}
+-- 	kwargs={}
+entity BitScanTest is
+  port (
+    A : in std_logic_vector(10 downto 0);
+    B : in std_logic_vector(7 downto 0);
+    C : in std_logic_vector(11 downto 0);
+    XLZC : out unsigned(3 downto 0);
+    XTZC : out unsigned(3 downto 0);
+    XLZC_POW2 : out unsigned(3 downto 0);
+    XONEHOT : out unsigned(3 downto 0)
+  );
+end entity;
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+use ieee.math_real.all;
+use ieee.float_pkg.all;
+use std.textio.all;
+
+library work;
+use work.all;
+
+-- Entity "BitScanTest" is "BitScanTest" with:
+-- 	args={'A': 'bits(11)', 'B': 'bits(8)', 'C': 'bits(12)', 'XLZC': 'uint(4)', 'XTZC': 'uint(4)', 'XLZC_POW2': 'uint(4)', 'XONEHOT': 'uint(4)'}
+-- 	kwargs={}
+architecture behavior of BitScanTest is
+begin
+  run : process (A, B, C)
+    variable XU_lzc_pad0 : std_logic_vector(15 downto 0);
+    variable XU_lzc_valid0 : std_logic_vector(7 downto 0);
+    variable XU_lzc_count0 : std_logic_vector(7 downto 0);
+    variable XU_lzc_valid1 : std_logic_vector(3 downto 0);
+    variable XU_lzc_count1 : std_logic_vector(7 downto 0);
+    variable XU_lzc_valid2 : std_logic_vector(1 downto 0);
+    variable XU_lzc_count2 : std_logic_vector(5 downto 0);
+    variable XU_lzc_valid3 : std_logic_vector(0 downto 0);
+    variable XU_lzc_count3 : std_logic_vector(3 downto 0);
+    variable XU_lzc0 : unsigned(3 downto 0);
+    variable XU_bit_swap0 : std_logic_vector(10 downto 0);
+    variable XU_lzc_pad1 : std_logic_vector(15 downto 0);
+    variable XU_lzc_valid4 : std_logic_vector(7 downto 0);
+    variable XU_lzc_count4 : std_logic_vector(7 downto 0);
+    variable XU_lzc_valid5 : std_logic_vector(3 downto 0);
+    variable XU_lzc_count5 : std_logic_vector(7 downto 0);
+    variable XU_lzc_valid6 : std_logic_vector(1 downto 0);
+    variable XU_lzc_count6 : std_logic_vector(5 downto 0);
+    variable XU_lzc_valid7 : std_logic_vector(0 downto 0);
+    variable XU_lzc_count7 : std_logic_vector(3 downto 0);
+    variable XU_lzc1 : unsigned(3 downto 0);
+    variable XU_lzc_valid8 : std_logic_vector(3 downto 0);
+    variable XU_lzc_count8 : std_logic_vector(3 downto 0);
+    variable XU_lzc_valid9 : std_logic_vector(1 downto 0);
+    variable XU_lzc_count9 : std_logic_vector(3 downto 0);
+    variable XU_lzc_valid10 : std_logic_vector(0 downto 0);
+    variable XU_lzc_count10 : std_logic_vector(2 downto 0);
+    variable XU_lzc2 : unsigned(3 downto 0);
+    variable XU_onehot0 : std_logic_vector(3 downto 0);
+  begin
+    XU_lzc_pad0(4 downto 0) := pyxhdl.cvt_bits(to_unsigned(31, 5));
+    XU_lzc_pad0(15 downto 5) := A;
+    XU_lzc_valid0(0) := XU_lzc_pad0(1) or XU_lzc_pad0(0);
+    XU_lzc_count0(0) := not XU_lzc_pad0(1);
+    XU_lzc_valid0(1) := XU_lzc_pad0(3) or XU_lzc_pad0(2);
+    XU_lzc_count0(1) := not XU_lzc_pad0(3);
+    XU_lzc_valid0(2) := XU_lzc_pad0(5) or XU_lzc_pad0(4);
+    XU_lzc_count0(2) := not XU_lzc_pad0(5);
+    XU_lzc_valid0(3) := XU_lzc_pad0(7) or XU_lzc_pad0(6);
+    XU_lzc_count0(3) := not XU_lzc_pad0(7);
+    XU_lzc_valid0(4) := XU_lzc_pad0(9) or XU_lzc_pad0(8);
+    XU_lzc_count0(4) := not XU_lzc_pad0(9);
+    XU_lzc_valid0(5) := XU_lzc_pad0(11) or XU_lzc_pad0(10);
+    XU_lzc_count0(5) := not XU_lzc_pad0(11);
+    XU_lzc_valid0(6) := XU_lzc_pad0(13) or XU_lzc_pad0(12);
+    XU_lzc_count0(6) := not XU_lzc_pad0(13);
+    XU_lzc_valid0(7) := XU_lzc_pad0(15) or XU_lzc_pad0(14);
+    XU_lzc_count0(7) := not XU_lzc_pad0(15);
+    XU_lzc_valid1(0) := XU_lzc_valid0(1) or XU_lzc_valid0(0);
+    XU_lzc_count1(1 downto 0) := (not XU_lzc_valid0(1 downto 1)) & pyxhdl.bits_ifexp(XU_lzc_valid0(1) = '1', XU_lzc_count0(1 downto 1), XU_lzc_count0(0 downto 0));
+    XU_lzc_valid1(1) := XU_lzc_valid0(3) or XU_lzc_valid0(2);
+    XU_lzc_count1(3 downto 2) := (not XU_lzc_valid0(3 downto 3)) & pyxhdl.bits_ifexp(XU_lzc_valid0(3) = '1', XU_lzc_count0(3 downto 3), XU_lzc_count0(2 downto 2));
+    XU_lzc_valid1(2) := XU_lzc_valid0(5) or XU_lzc_valid0(4);
+    XU_lzc_count1(5 downto 4) := (not XU_lzc_valid0(5 downto 5)) & pyxhdl.bits_ifexp(XU_lzc_valid0(5) = '1', XU_lzc_count0(5 downto 5), XU_lzc_count0(4 downto 4));
+    XU_lzc_valid1(3) := XU_lzc_valid0(7) or XU_lzc_valid0(6);
+    XU_lzc_count1(7 downto 6) := (not XU_lzc_valid0(7 downto 7)) & pyxhdl.bits_ifexp(XU_lzc_valid0(7) = '1', XU_lzc_count0(7 downto 7), XU_lzc_count0(6 downto 6));
+    XU_lzc_valid2(0) := XU_lzc_valid1(1) or XU_lzc_valid1(0);
+    XU_lzc_count2(2 downto 0) := (not XU_lzc_valid1(1 downto 1)) & pyxhdl.bits_ifexp(XU_lzc_valid1(1) = '1', XU_lzc_count1(3 downto 2), XU_lzc_count1(1 downto 0));
+    XU_lzc_valid2(1) := XU_lzc_valid1(3) or XU_lzc_valid1(2);
+    XU_lzc_count2(5 downto 3) := (not XU_lzc_valid1(3 downto 3)) & pyxhdl.bits_ifexp(XU_lzc_valid1(3) = '1', XU_lzc_count1(7 downto 6), XU_lzc_count1(5 downto 4));
+    XU_lzc_valid3(0) := XU_lzc_valid2(1) or XU_lzc_valid2(0);
+    XU_lzc_count3(3 downto 0) := (not XU_lzc_valid2(1 downto 1)) & pyxhdl.bits_ifexp(XU_lzc_valid2(1) = '1', XU_lzc_count2(5 downto 3), XU_lzc_count2(2 downto 0));
+    XU_lzc0 := pyxhdl.cvt_unsigned(XU_lzc_count3, 4);
+    XLZC <= XU_lzc0;
+    XU_bit_swap0(0) := A(10);
+    XU_bit_swap0(1) := A(9);
+    XU_bit_swap0(2) := A(8);
+    XU_bit_swap0(3) := A(7);
+    XU_bit_swap0(4) := A(6);
+    XU_bit_swap0(5) := A(5);
+    XU_bit_swap0(6) := A(4);
+    XU_bit_swap0(7) := A(3);
+    XU_bit_swap0(8) := A(2);
+    XU_bit_swap0(9) := A(1);
+    XU_bit_swap0(10) := A(0);
+    XU_lzc_pad1(4 downto 0) := pyxhdl.cvt_bits(to_unsigned(31, 5));
+    XU_lzc_pad1(15 downto 5) := XU_bit_swap0;
+    XU_lzc_valid4(0) := XU_lzc_pad1(1) or XU_lzc_pad1(0);
+    XU_lzc_count4(0) := not XU_lzc_pad1(1);
+    XU_lzc_valid4(1) := XU_lzc_pad1(3) or XU_lzc_pad1(2);
+    XU_lzc_count4(1) := not XU_lzc_pad1(3);
+    XU_lzc_valid4(2) := XU_lzc_pad1(5) or XU_lzc_pad1(4);
+    XU_lzc_count4(2) := not XU_lzc_pad1(5);
+    XU_lzc_valid4(3) := XU_lzc_pad1(7) or XU_lzc_pad1(6);
+    XU_lzc_count4(3) := not XU_lzc_pad1(7);
+    XU_lzc_valid4(4) := XU_lzc_pad1(9) or XU_lzc_pad1(8);
+    XU_lzc_count4(4) := not XU_lzc_pad1(9);
+    XU_lzc_valid4(5) := XU_lzc_pad1(11) or XU_lzc_pad1(10);
+    XU_lzc_count4(5) := not XU_lzc_pad1(11);
+    XU_lzc_valid4(6) := XU_lzc_pad1(13) or XU_lzc_pad1(12);
+    XU_lzc_count4(6) := not XU_lzc_pad1(13);
+    XU_lzc_valid4(7) := XU_lzc_pad1(15) or XU_lzc_pad1(14);
+    XU_lzc_count4(7) := not XU_lzc_pad1(15);
+    XU_lzc_valid5(0) := XU_lzc_valid4(1) or XU_lzc_valid4(0);
+    XU_lzc_count5(1 downto 0) := (not XU_lzc_valid4(1 downto 1)) & pyxhdl.bits_ifexp(XU_lzc_valid4(1) = '1', XU_lzc_count4(1 downto 1), XU_lzc_count4(0 downto 0));
+    XU_lzc_valid5(1) := XU_lzc_valid4(3) or XU_lzc_valid4(2);
+    XU_lzc_count5(3 downto 2) := (not XU_lzc_valid4(3 downto 3)) & pyxhdl.bits_ifexp(XU_lzc_valid4(3) = '1', XU_lzc_count4(3 downto 3), XU_lzc_count4(2 downto 2));
+    XU_lzc_valid5(2) := XU_lzc_valid4(5) or XU_lzc_valid4(4);
+    XU_lzc_count5(5 downto 4) := (not XU_lzc_valid4(5 downto 5)) & pyxhdl.bits_ifexp(XU_lzc_valid4(5) = '1', XU_lzc_count4(5 downto 5), XU_lzc_count4(4 downto 4));
+    XU_lzc_valid5(3) := XU_lzc_valid4(7) or XU_lzc_valid4(6);
+    XU_lzc_count5(7 downto 6) := (not XU_lzc_valid4(7 downto 7)) & pyxhdl.bits_ifexp(XU_lzc_valid4(7) = '1', XU_lzc_count4(7 downto 7), XU_lzc_count4(6 downto 6));
+    XU_lzc_valid6(0) := XU_lzc_valid5(1) or XU_lzc_valid5(0);
+    XU_lzc_count6(2 downto 0) := (not XU_lzc_valid5(1 downto 1)) & pyxhdl.bits_ifexp(XU_lzc_valid5(1) = '1', XU_lzc_count5(3 downto 2), XU_lzc_count5(1 downto 0));
+    XU_lzc_valid6(1) := XU_lzc_valid5(3) or XU_lzc_valid5(2);
+    XU_lzc_count6(5 downto 3) := (not XU_lzc_valid5(3 downto 3)) & pyxhdl.bits_ifexp(XU_lzc_valid5(3) = '1', XU_lzc_count5(7 downto 6), XU_lzc_count5(5 downto 4));
+    XU_lzc_valid7(0) := XU_lzc_valid6(1) or XU_lzc_valid6(0);
+    XU_lzc_count7(3 downto 0) := (not XU_lzc_valid6(1 downto 1)) & pyxhdl.bits_ifexp(XU_lzc_valid6(1) = '1', XU_lzc_count6(5 downto 3), XU_lzc_count6(2 downto 0));
+    XU_lzc1 := pyxhdl.cvt_unsigned(XU_lzc_count7, 4);
+    XTZC <= XU_lzc1;
+    XU_lzc_valid8(0) := B(1) or B(0);
+    XU_lzc_count8(0) := not B(1);
+    XU_lzc_valid8(1) := B(3) or B(2);
+    XU_lzc_count8(1) := not B(3);
+    XU_lzc_valid8(2) := B(5) or B(4);
+    XU_lzc_count8(2) := not B(5);
+    XU_lzc_valid8(3) := B(7) or B(6);
+    XU_lzc_count8(3) := not B(7);
+    XU_lzc_valid9(0) := XU_lzc_valid8(1) or XU_lzc_valid8(0);
+    XU_lzc_count9(1 downto 0) := (not XU_lzc_valid8(1 downto 1)) & pyxhdl.bits_ifexp(XU_lzc_valid8(1) = '1', XU_lzc_count8(1 downto 1), XU_lzc_count8(0 downto 0));
+    XU_lzc_valid9(1) := XU_lzc_valid8(3) or XU_lzc_valid8(2);
+    XU_lzc_count9(3 downto 2) := (not XU_lzc_valid8(3 downto 3)) & pyxhdl.bits_ifexp(XU_lzc_valid8(3) = '1', XU_lzc_count8(3 downto 3), XU_lzc_count8(2 downto 2));
+    XU_lzc_valid10(0) := XU_lzc_valid9(1) or XU_lzc_valid9(0);
+    XU_lzc_count10(2 downto 0) := (not XU_lzc_valid9(1 downto 1)) & pyxhdl.bits_ifexp(XU_lzc_valid9(1) = '1', XU_lzc_count9(3 downto 2), XU_lzc_count9(1 downto 0));
+    XU_lzc2 := pyxhdl.uint_ifexp(XU_lzc_valid10 = pyxhdl.cvt_bits(to_unsigned(1, 1)), pyxhdl.cvt_unsigned(XU_lzc_count10, 4), to_unsigned(8, 4));
+    XLZC_POW2 <= XU_lzc2;
+    XU_onehot0(0) := ((C(1) or C(3)) or (C(5) or C(7))) or (C(9) or C(11));
+    XU_onehot0(1) := ((C(2) or C(3)) or (C(6) or C(7))) or (C(10) or C(11));
+    XU_onehot0(2) := (C(4) or C(5)) or (C(6) or C(7));
+    XU_onehot0(3) := (C(8) or C(9)) or (C(10) or C(11));
+    XONEHOT <= pyxhdl.cvt_unsigned(XU_onehot0, 4);
+  end process;
+end architecture;
@@ -0,0 +1,82 @@
+/* verilator lint_off WIDTH */
+
+`timescale 1 ns / 100 ps
+
+
+package fp;
+  let MAX(A, B) = ((A > B) ? A : B);
+  let MIN(A, B) = ((A > B) ? B : A);
+  let ABS(A) = (($signed(A) >= 0) ? A : -$signed(A));
+  let FABS(A) = ((A >= 0.0) ? A : -A);
+
+  let EXP_OFFSET(NX) = (2**(NX - 1) - 1);
+endpackage
+
+// This in theory should be a typedef within the FPU interface, but then
+// many HDL tools do not support hierarchical type dereferencing.
+`define IEEE754(NX, NM) \
+struct packed { \
+  logic  sign; \
+  logic [NX - 1: 0] exp; \
+  logic [NM - 1: 0] mant; \
+  }
+
+
+// PyXHDL support functions.
+
+package pyxhdl;
+
+  function automatic bit float_equal(real value, real ref_value, real eps);
+    real toll = fp::MAX(fp::FABS(value), fp::FABS(ref_value)) * eps;
+
+    begin
+      float_equal = (fp::FABS(value - ref_value) < toll) ? 1'b1 : 1'b0;
+    end
+  endfunction
+endpackage
+
+
+
+// Entity "ReduceTest" is "ReduceTest" with:
+// 	args={'A': 'uint(8)', 'B': 'uint(8)', 'C': 'uint(8)', 'D': 'uint(8)', 'E': 'uint(8)', 'XSUM': 'uint(11)', 'XMAX': 'uint(8)', 'XMIN': 'uint(8)', 'XAND': 'bits(1)', 'XOR': 'bits(1)', 'XXOR': 'bits(1)', 'XPOP': 'uint(4)'}
+// 	kwargs={}
+module ReduceTest(A, B, C, D, E, XSUM, XMAX, XMIN, XAND, XOR, XXOR, XPOP);
+  input logic [7: 0] A;
+  input logic [7: 0] B;
+  input logic [7: 0] C;
+  input logic [7: 0] D;
+  input logic [7: 0] E;
+  output logic [10: 0] XSUM;
+  output logic [7: 0] XMAX;
+  output logic [7: 0] XMIN;
+  output logic XAND;
+  output logic XOR;
+  output logic XXOR;
+  output logic [3: 0] XPOP;
+  always @(A or B or C or D or E)
+  run : begin
+    automatic logic [7: 0] XU_max0;
+    automatic logic [7: 0] XU_max1;
+    automatic logic [7: 0] XU_max2;
+    automatic logic [7: 0] XU_max3;
+    automatic logic [7: 0] XU_min0;
+    automatic logic [7: 0] XU_min1;
+    automatic logic [7: 0] XU_min2;
+    automatic logic [7: 0] XU_min3;
+    XSUM = ((11'(A) + 11'(B)) + (11'(C) + 11'(D))) + 11'(E);
+    XU_max0 = (A >= B) ? A : B;
+    XU_max1 = (C >= D) ? C : D;
+    XU_max2 = (XU_max0 >= XU_max1) ? XU_max0 : XU_max1;
+    XU_max3 = (XU_max2 >= E) ? XU_max2 : E;
+    XMAX = XU_max3;
+    XU_min0 = (A <= B) ? A : B;
+    XU_min1 = (C <= D) ? C : D;
+    XU_min2 = (XU_min0 <= XU_min1) ? XU_min0 : XU_min1;
+    XU_min3 = (XU_min2 <= E) ? XU_min2 : E;
+    XMIN = XU_min3;
+    XAND = ((A[0] & A[1]) & (A[2] & A[3])) & ((A[4] & A[5]) & (A[6] & A[7]));
+    XOR = (A[0] | B[1]) | C[2];
+    XXOR = ((A[0] ^ A[1]) ^ (A[2] ^ A[3])) ^ ((A[4] ^ A[5]) ^ (A[6] ^ A[7]));
+    XPOP = ((4'(A[0: 0]) + 4'(A[1: 1])) + (4'(A[2: 2]) + 4'(A[3: 3]))) + ((4'(A[4: 4]) + 4'(A[5: 5])) + (4'(A[6: 6]) + 4'(A[7: 7])));
+  end
+endmodule
@@ -0,0 +1,91 @@
+/* verilator lint_off WIDTH */
+
+`timescale 1 ns / 100 ps
+
+
+package fp;
+  let MAX(A, B) = ((A > B) ? A : B);
+  let MIN(A, B) = ((A > B) ? B : A);
+  let ABS(A) = (($signed(A) >= 0) ? A : -$signed(A));
+  let FABS(A) = ((A >= 0.0) ? A : -A);
+
+  let EXP_OFFSET(NX) = (2**(NX - 1) - 1);
+endpackage
+
+// This in theory should be a typedef within the FPU interface, but then
+// many HDL tools do not support hierarchical type dereferencing.
+`define IEEE754(NX, NM) \
+struct packed { \
+  logic  sign; \
+  logic [NX - 1: 0] exp; \
+  logic [NM - 1: 0] mant; \
+  }
+
+
+// PyXHDL support functions.
+
+package pyxhdl;
+
+  function automatic bit float_equal(real value, real ref_value, real eps);
+    real toll = fp::MAX(fp::FABS(value), fp::FABS(ref_value)) * eps;
+
+    begin
+      float_equal = (fp::FABS(value - ref_value) < toll) ? 1'b1 : 1'b0;
+    end
+  endfunction
+endpackage
+
+
+
+// Entity "ReduceStagesTest" is "ReduceStagesTest" with:
+// 	args={'CLK': 'bits(1)', 'A': 'uint(8)', 'B': 'uint(8)', 'C': 'uint(8)', 'D': 'uint(8)', 'E': 'uint(8)', 'XSUM': 'uint(11)', 'XPOP': 'uint(5)'}
+// 	kwargs={}
+module ReduceStagesTest(CLK, A, B, C, D, E, XSUM, XPOP);
+  input logic CLK;
+  input logic [7: 0] A;
+  input logic [7: 0] B;
+  input logic [7: 0] C;
+  input logic [7: 0] D;
+  input logic [7: 0] E;
+  output logic [10: 0] XSUM;
+  output logic [4: 0] XPOP;
+  logic [10: 0] XU_reduce0;
+  logic [10: 0] XU_reduce1;
+  logic [4: 0] XU_reduce2;
+  logic [4: 0] XU_reduce3;
+  logic [4: 0] XU_reduce4;
+  logic [4: 0] XU_reduce5;
+  logic [4: 0] XU_reduce6;
+  logic [4: 0] XU_reduce7;
+  logic [4: 0] XU_reduce8;
+  logic [4: 0] XU_reduce9;
+  logic [4: 0] XU_reduce10;
+  logic [4: 0] XU_reduce11;
+  logic [4: 0] XU_reduce12;
+  logic [4: 0] XU_reduce13;
+  logic [4: 0] XU_reduce14;
+  logic [4: 0] XU_reduce15;
+  always_ff @(posedge CLK)
+  run : begin
+    automatic logic [15: 0] XU_snap0;
+    XU_reduce0 <= (11'(A) + 11'(B)) + (11'(C) + 11'(D));
+    XU_reduce1 <= 11'(E);
+    XSUM <= XU_reduce0 + XU_reduce1;
+    XU_snap0 = {A, B};
+    XU_reduce2 <= 5'(XU_snap0[0: 0]) + 5'(XU_snap0[1: 1]);
+    XU_reduce3 <= 5'(XU_snap0[2: 2]) + 5'(XU_snap0[3: 3]);
+    XU_reduce4 <= 5'(XU_snap0[4: 4]) + 5'(XU_snap0[5: 5]);
+    XU_reduce5 <= 5'(XU_snap0[6: 6]) + 5'(XU_snap0[7: 7]);
+    XU_reduce6 <= 5'(XU_snap0[8: 8]) + 5'(XU_snap0[9: 9]);
+    XU_reduce7 <= 5'(XU_snap0[10: 10]) + 5'(XU_snap0[11: 11]);
+    XU_reduce8 <= 5'(XU_snap0[12: 12]) + 5'(XU_snap0[13: 13]);
+    XU_reduce9 <= 5'(XU_snap0[14: 14]) + 5'(XU_snap0[15: 15]);
+    XU_reduce10 <= XU_reduce2 + XU_reduce3;
+    XU_reduce11 <= XU_reduce4 + XU_reduce5;
+    XU_reduce12 <= XU_reduce6 + XU_reduce7;
+    XU_reduce13 <= XU_reduce8 + XU_reduce9;
+    XU_reduce14 <= XU_reduce10 + XU_reduce11;
+    XU_reduce15 <= XU_reduce12 + XU_reduce13;
+    XPOP <= XU_reduce14 + XU_reduce15;
+  end
+endmodule
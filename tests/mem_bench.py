@@ -0,0 +1,96 @@
+import argparse
+import collections
+import gc
+import os
+import tracemalloc
+import unittest
+
+import py_misc_utils.alog as alog
+import py_misc_utils.app_main as app_main
+
+import pyxhdl as X
+
+import test_utils as tu
+
+
+_Sample = collections.namedtuple('Sample', 'lines, blocks, size, peak')
+
+
+class _Tracker:
+
+  def __init__(self):
+    self.samples = collections.defaultdict(list)
+    self.pkg_path = os.path.dirname(os.path.abspath(X.__file__))
+    self._flush = X.CodeGen.flush
+
+  def _flush_hook(self, codegen, *args, **kwargs):
+    # Snapshot the live allocations right before flushing, when the generated
+    # code and all the supporting objects are still alive.
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+
+    code = self._flush(codegen, *args, **kwargs)
+
+    pkg_filter = tracemalloc.Filter(True, os.path.join(self.pkg_path, '*'))
+    blocks, size = 0, 0
+    for stat in snapshot.filter_traces([pkg_filter]).statistics('filename'):
+      blocks += stat.count
+      size += stat.size
+
+    self.samples[codegen.emitter.KIND].append(_Sample(lines=len(code),
+                                                      blocks=blocks,
+                                                      size=size,
+                                                      peak=peak))
+    tracemalloc.reset_peak()
+
+    return code
+
+  def __enter__(self):
+    gc.collect()
+    tracemalloc.start()
+    X.CodeGen.flush = lambda codegen, *args, **kwargs: self._flush_hook(codegen, *args, **kwargs)
+
+    return self
+
+  def __exit__(self, *exc):
+    X.CodeGen.flush = self._flush
+    tracemalloc.stop()
+
+    return False
+
+
+def _main(args):
+  test_folder = (args.test_folder or
+                 os.environ.get('TESTS_FOLDER') or
+                 os.path.dirname(os.path.abspath(__file__)))
+
+  loader = unittest.TestLoader()
+  tests = loader.discover(test_folder, pattern=args.files)
+  runner = unittest.runner.TextTestRunner(verbosity=args.verbosity)
+
+  with _Tracker() as tracker:
+    runner.run(tests)
+
+  for kind, samples in sorted(tracker.samples.items()):
+    lines = sum(s.lines for s in samples)
+    blocks = sum(s.blocks for s in samples)
+    size = sum(s.size for s in samples)
+    peak = max(s.peak for s in samples)
+
+    print(f'{kind}: runs={len(samples)} lines={lines} ' \
+          f'objects/line={blocks / max(lines, 1):.2f} ' \
+          f'bytes/line={size / max(lines, 1):.1f} peak={peak}')
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='PyXHDL Memory Benchmark',
+                                   formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('--verbosity', type=int, default=0,
+                      help='The test verbosity')
+  parser.add_argument('--files', type=str, default='t_*.py',
+                      help='The pattern to match files whose tests need to be run')
+  parser.add_argument('--test_folder',
+                      help='The folder where the test files are stored')
+
+  app_main.main(parser, _main)
+
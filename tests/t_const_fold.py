@@ -0,0 +1,79 @@
+import unittest
+
+import py_misc_utils.utils as pyu
+
+import pyxhdl as X
+from pyxhdl import xlib as XL
+
+import test_utils as tu
+
+
+class ConstFoldEnt(X.Entity):
+
+  PORTS = (
+    X.Port('A', X.Port.IN),
+    X.Port('XOUT', X.Port.OUT),
+    X.Port('YOUT', X.Port.OUT),
+  )
+
+  @X.hdl_process(sens='A')
+  def tester():
+    with XL.context(const_fold=True):
+      width = X.mkvwire(A.dtype, 12, const=True)
+      scale = X.mkvwire(A.dtype, 3, const=True)
+      debug = X.mkvwire(X.BOOL, False, const=True)
+
+      area = width * scale
+      XOUT = A + area - (width / 4)
+
+      if debug:
+        XL.report('Never emitted')
+      elif area > 32:
+        YOUT = A + ~scale
+      else:
+        YOUT = A
+
+      if width == 12 and not debug:
+        YOUT = area @ scale
+      else:
+        YOUT = A - 1
+
+      XOUT = A if (width - 1) != 11 else XOUT + scale
+
+      # Overflowing results are not folded.
+      YOUT = (width * width) * scale
+
+
+class ConstFoldFloatEnt(X.Entity):
+
+  PORTS = 'CLK, A, =XOUT'
+
+  @X.hdl_process(sens='+CLK')
+  def tester():
+    with XL.context(const_fold=True, fp_pipeline=2):
+      scale = X.mkvwire(A.dtype, 3, const=True)
+
+      # Float results are not folded, and the operation must be instantiated once.
+      XOUT = A + scale * scale
+
+
+class TestConstFold(unittest.TestCase):
+
+  def test_const_fold(self):
+    inputs = dict(
+      A=X.mkwire(X.UINT8),
+      XOUT=X.mkwire(X.UINT8),
+      YOUT=X.mkwire(X.UINT16),
+    )
+
+    tu.run(self, tu.test_name(self, pyu.fname()), ConstFoldEnt, inputs)
+
+
+  def test_const_fold_float(self):
+    inputs = dict(
+      CLK=X.mkwire(X.BIT),
+      A=X.mkwire(X.FLOAT32),
+      XOUT=X.mkreg(X.FLOAT32),
+    )
+
+    tu.run(self, tu.test_name(self, pyu.fname()), ConstFoldFloatEnt, inputs)
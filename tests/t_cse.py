@@ -0,0 +1,58 @@
+import unittest
+
+import py_misc_utils.utils as pyu
+
+import pyxhdl as X
+from pyxhdl import xlib as XL
+
+import test_utils as tu
+
+
+class CseEnt(X.Entity):
+
+  PORTS = (
+    X.Port('A', X.Port.IN),
+    X.Port('B', X.Port.IN),
+    X.Port('C', X.Port.IN),
+    X.Port('XOUT', X.Port.OUT),
+    X.Port('YOUT', X.Port.OUT),
+  )
+
+  @X.hdl_process(sens='A, B, C')
+  def tester():
+    with XL.context(cse_threshold=8):
+      x = X.mkvreg(A.dtype, 0)
+      y = X.mkvreg(A.dtype, 0)
+
+      x = (A + B) * (A - C)
+      y = (A + B) * (A - C)
+      if A > B:
+        x = (A + B) * (A - C) + 1
+        y = (A + C) * (B - C)
+      elif A == C:
+        y = (A + C) * (B - C)
+      else:
+        y = (A + B) * (A - C) - 1
+
+      A_plus_C = (A + C) * (B - C)
+      x = x + A_plus_C
+      x = x - (x + B) * C
+      y = y + (x + B) * C
+
+      XOUT = x
+      YOUT = y
+
+
+class TestCse(unittest.TestCase):
+
+  def test_cse(self):
+    inputs = dict(
+      A=X.mkwire(X.UINT8),
+      B=X.mkwire(X.UINT8),
+      C=X.mkwire(X.UINT8),
+      XOUT=X.mkwire(X.UINT8),
+      YOUT=X.mkwire(X.UINT8),
+    )
+
+    tu.run(self, tu.test_name(self, pyu.fname()), CseEnt, inputs)
+
@@ -0,0 +1,100 @@
+import unittest
+
+import py_misc_utils.utils as pyu
+
+import pyxhdl as X
+from pyxhdl import xlib as XL
+from pyxhdl import xutils as XU
+
+import test_utils as tu
+
+
+class DceEnt(X.Entity):
+
+  PORTS = (
+    X.Port('CLK', X.Port.IN),
+    X.Port('A', X.Port.IN),
+    X.Port('B', X.Port.IN),
+    X.Port('XOUT', X.Port.OUT),
+  )
+
+  @X.hdl_process(sens='+CLK')
+  def clocked():
+    count = X.mkreg(A.dtype)
+    unused = X.mkreg(A.dtype)
+
+    count = count + 1
+    unused = count + A
+
+  @X.hdl_process(sens='A, B')
+  def comb():
+    tmp = X.mkwire(A.dtype)
+    chain = X.mkwire(A.dtype)
+    used = X.mkwire(A.dtype)
+
+    tmp = A + B
+    chain = tmp * 2
+    used = A - B
+    snapped = XU.snap(A & B)
+
+    XOUT = used + 1
+
+
+class DceFlowEnt(X.Entity):
+
+  PORTS = 'A, B, RA, RB, =XOUT, =YOUT'
+
+  @X.hdl_process(sens='A, B, RA, RB')
+  def run():
+    dead = X.mkwire(A.dtype)
+    flag = X.mkwire(X.BOOL)
+    late = X.mkreg(A.dtype)
+
+    # The chains whose blocks end up empty are dropped as a whole.
+    if A > B:
+      dead = A + 1
+      if A > 3:
+        dead = dead + 2
+    elif A == B:
+      dead = B
+    else:
+      XOUT = A - B
+
+    if A < B:
+      dead = A
+    else:
+      dead = B
+
+    # Function calls might have side effects, and delays shift the following
+    # statements in time, so they stay.
+    flag = XL.real_equal(RA, RB, 1e-6)
+    with XL.context(delay=5e-9):
+      late = A + B
+
+    YOUT = A * B
+
+
+class TestDce(unittest.TestCase):
+
+  def test_dce(self):
+    inputs = dict(
+      CLK=X.mkwire(X.BIT),
+      A=X.mkwire(X.UINT8),
+      B=X.mkwire(X.UINT8),
+      XOUT=X.mkwire(X.UINT8),
+    )
+
+    tu.run(self, tu.test_name(self, pyu.fname()), DceEnt, inputs, dce=True)
+
+
+  def test_dce_flow(self):
+    inputs = dict(
+      A=X.mkwire(X.UINT8),
+      B=X.mkwire(X.UINT8),
+      RA=X.mkwire(X.REAL),
+      RB=X.mkwire(X.REAL),
+      XOUT=X.mkreg(X.UINT8),
+      YOUT=X.mkreg(X.UINT8),
+    )
+
+    tu.run(self, tu.test_name(self, pyu.fname()), DceFlowEnt, inputs, dce=True)
@@ -27,6 +27,16 @@ class FloatEnt(X.Entity):
     XOUT = add + mul - div + sub * (icplus - ifplus)
 
 
+class FloatSignedZeroEnt(X.Entity):
+
+  PORTS = 'A, =XOUT, =YOUT'
+
+  @X.hdl_process(sens='A')
+  def run():
+    XOUT = XL.cast(0.0, A.dtype)
+    YOUT = XL.cast(-0.0, A.dtype)
+
+
 class TestFloatEnt(unittest.TestCase):
 
   def test_float(self):
@@ -38,3 +48,12 @@ class TestFloatEnt(unittest.TestCase):
 
     tu.run(self, tu.test_name(self, pyu.fname()), FloatEnt, inputs)
 
+
+  def test_signed_zero(self):
+    inputs = dict(
+      A=X.mkwire(X.Float(32)),
+      XOUT=X.mkwire(X.Float(32)),
+      YOUT=X.mkwire(X.Float(32)),
+    )
+
+    tu.run(self, tu.test_name(self, pyu.fname()), FloatSignedZeroEnt, inputs)
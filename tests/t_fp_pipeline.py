@@ -0,0 +1,150 @@
+import re
+import unittest
+
+import numpy as np
+
+import py_misc_utils.utils as pyu
+
+import pyxhdl as X
+from pyxhdl import xlib as XL
+
+import test_utils as tu
+
+
+class FpPipelineEnt(X.Entity):
+
+  PORTS = 'CLK, A, B, VIN, =XOUT, =VOUT'
+
+  @X.hdl_process(sens='+CLK')
+  def run():
+    with XL.context(fp_pipeline=2):
+      XOUT = A * B + A
+      # Two chained pipelined operations.
+      latency = 2 * XL.fp_latency()
+
+    if latency > 0:
+      vdelay = X.mkreg(X.Bits(latency))
+      vdelay = vdelay[0: latency - 1] @ VIN
+      VOUT = vdelay[latency - 1]
+    else:
+      VOUT = VIN
+
+
+class FpPipelineCombEnt(X.Entity):
+
+  PORTS = 'A, B, =XOUT'
+
+  @X.hdl_process(sens='A, B')
+  def run():
+    with XL.context(fp_pipeline=2):
+      XOUT = A * B
+
+
+class FpPipelineClockEnt(X.Entity):
+
+  PORTS = 'CK, A, B, =XOUT'
+
+  @X.hdl_process(sens='+CK')
+  def run():
+    with XL.context(fp_pipeline=2):
+      XOUT = A * B
+
+
+_FP_OPS = {
+  'add': lambda a, b: np.float32(a + b),
+  'sub': lambda a, b: np.float32(a - b),
+  'mul': lambda a, b: np.float32(a * b),
+  'div': lambda a, b: np.float32(a / b),
+}
+
+
+def _run_pipeline(code, module, inputs, output):
+  # Cycle based evaluation of the pipelined FPU instances of the generated Verilog
+  # module, whose process is expected to register the output with a pipeline
+  # result (or input) signal.
+  code = code[code.index(next(ln for ln in code if ln.startswith(f'module {module}('))):]
+
+  insts = []
+  for ln in code:
+    if m := re.match(r'\s*fpu_(?:(\w+)_)?pipe #\((.*)\) \w+\((.*)\);$', ln):
+      params = dict(re.findall(r'\.(\w+)\((\w+)\)', m.group(2)))
+      args = dict(re.findall(r'\.(\w+)\((\w+)\)', m.group(3)))
+      insts.append((m.group(1), int(params['STAGES']), args))
+
+  src = re.search(rf'{output} <= (\w+);', '\n'.join(code)).group(1)
+
+  nets = {args.get('XOUT', args.get('DOUT')): np.float32(0) for _, _, args in insts}
+  regs = [[np.float32(0)] * stages for _, stages, _ in insts]
+
+  results = []
+  for values in inputs:
+    nets.update(values)
+    results.append(nets[src])
+
+    for (opfn, stages, args), stage in zip(insts, regs):
+      if opfn is None:
+        din = nets[args['DIN']]
+      else:
+        din = _FP_OPS[opfn](nets[args['A']], nets[args['B']])
+
+      stage.insert(0, din)
+      stage.pop()
+
+    for (_, _, args), stage in zip(insts, regs):
+      nets[args.get('XOUT', args.get('DOUT'))] = stage[-1]
+
+  return results
+
+
+class TestFpPipeline(unittest.TestCase):
+
+  def test_fp_pipeline(self):
+    inputs = dict(
+      CLK=X.mkwire(X.BIT),
+      A=X.mkwire(X.Float(32)),
+      B=X.mkwire(X.Float(32)),
+      VIN=X.mkwire(X.BIT),
+      XOUT=X.mkreg(X.Float(32)),
+      VOUT=X.mkreg(X.BIT),
+    )
+
+    tu.run(self, tu.test_name(self, pyu.fname()), FpPipelineEnt, inputs)
+
+  def test_fp_pipeline_alignment(self):
+    inputs = dict(
+      CLK=X.mkwire(X.BIT),
+      A=X.mkwire(X.Float(32)),
+      B=X.mkwire(X.Float(32)),
+      VIN=X.mkwire(X.BIT),
+      XOUT=X.mkreg(X.Float(32)),
+      VOUT=X.mkreg(X.BIT),
+    )
+
+    code = tu.generate_code(FpPipelineEnt, inputs, 'verilog')
+
+    rng = np.random.default_rng(5)
+    values = rng.normal(scale=4.0, size=(32, 2)).astype(np.float32)
+
+    results = _run_pipeline(code, 'FpPipelineEnt', [dict(A=a, B=b) for a, b in values],
+                             'XOUT')
+
+    # Two chained operations with two stages each (the results are the values
+    # the output register samples at every clock).
+    latency = 2 * 2
+    for i, (a, b) in enumerate(values[: -latency]):
+      self.assertEqual(results[i + latency], np.float32(np.float32(a * b) + a))
+
+  def test_fp_pipeline_errors(self):
+    inputs = dict(
+      CK=X.mkwire(X.BIT),
+      A=X.mkwire(X.Float(32)),
+      B=X.mkwire(X.Float(32)),
+      XOUT=X.mkreg(X.Float(32)),
+    )
+
+    with self.assertRaisesRegex(RuntimeError, 'only be used within clocked processes'):
+      tu.generate_code(FpPipelineCombEnt, {k: v for k, v in inputs.items() if k != 'CK'},
+                       'verilog')
+
+    with self.assertRaisesRegex(NameError, 'fp_clock'):
+      tu.generate_code(FpPipelineClockEnt, inputs, 'verilog')
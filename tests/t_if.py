@@ -58,6 +58,31 @@ class IfEnt(X.Entity):
     XOUT = temp
 
 
+class IfCseEnt(X.Entity):
+
+  PORTS = 'A, B, =XOUT'
+
+  @X.hdl_process(sens='A, B')
+  def run():
+    with XL.context(cse_threshold=8):
+      temp = X.mkwire(A.dtype)
+      temp = A
+
+      if A > B:
+        temp += A
+      elif B > A:
+        temp -= B
+      else:
+        temp = 0
+
+      if A > B:
+        temp -= 1
+      elif B > A:
+        temp += 1
+
+      XOUT = temp
+
+
 class TestIf(unittest.TestCase):
 
   def test_if_wire_wire(self):
@@ -83,3 +108,12 @@ class TestIf(unittest.TestCase):
 
     tu.run(self, tu.test_name(self, pyu.fname()), IfEnt, inputs)
 
+
+  def test_if_cse(self):
+    inputs = dict(
+      A=X.mkwire(X.UINT8),
+      B=X.mkwire(X.UINT16),
+      XOUT=X.mkwire(X.UINT16),
+    )
+
+    tu.run(self, tu.test_name(self, pyu.fname()), IfCseEnt, inputs)
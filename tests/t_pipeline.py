@@ -0,0 +1,57 @@
+import unittest
+
+import py_misc_utils.utils as pyu
+
+import pyxhdl as X
+from pyxhdl import pysim
+from pyxhdl import xlib as XL
+
+import test_utils as tu
+
+
+class PipelineEnt(X.Entity):
+
+  PORTS = 'CLK, A, B, C, VIN, =XOUT, =VOUT'
+
+  @X.hdl_process(sens='+CLK')
+  def run():
+    prod = A * B
+    XL.pipeline_stage()
+    # The C input is registered as well, to be aligned with the product.
+    acc = prod + C
+    XL.pipeline_stage()
+    XOUT = acc ^ (acc >> 4)
+    VOUT = VIN
+
+
+class TestPipeline(unittest.TestCase):
+
+  def _inputs(self):
+    return dict(
+      CLK=X.mkwire(X.BIT),
+      A=X.mkwire(X.UINT8),
+      B=X.mkwire(X.UINT8),
+      C=X.mkwire(X.UINT8),
+      VIN=X.mkwire(X.BIT),
+      XOUT=X.mkreg(X.UINT8),
+      VOUT=X.mkreg(X.BIT),
+    )
+
+  def test_pipeline(self):
+    tu.run(self, tu.test_name(self, pyu.fname()), PipelineEnt, self._inputs())
+
+  def test_pipeline_latency(self):
+    sim = pysim.simulate(PipelineEnt, self._inputs())
+
+    values = [(i * 7 % 256, i * 13 % 256, i * 29 % 256) for i in range(16)]
+
+    outputs = []
+    for a, b, c in values + [(0, 0, 0)] * 2:
+      sim.set(A=a, B=b, C=c, VIN=1 if a % 3 else 0).clock('CLK')
+      outputs.append((sim['XOUT'], sim['VOUT']))
+
+    for i, (a, b, c) in enumerate(values):
+      acc = (a * b + c) & 0xff
+      # Two stage registers plus the output register.
+      self.assertEqual(outputs[i + 2], (acc ^ (acc >> 4), 1 if a % 3 else 0))
+
@@ -0,0 +1,294 @@
+import random
+import unittest
+
+import numpy as np
+
+import pyxhdl as X
+from pyxhdl import pysim
+from pyxhdl import testbench as TB
+
+
+class PySimOps(X.Entity):
+
+  PORTS = 'A, B, S, =ADD, =MUL, =SHL, =CAT, =SMUL, =CMP'
+
+  @X.hdl_process(sens='A, B, S')
+  def run():
+    ADD = A + B
+    MUL = A * B
+    SHL = (A << 3) | (B >> 2)
+    CAT = A[0: 6] @ B[0: 2]
+    SMUL = S * -3
+    CMP = (A > B) and S < 0
+
+
+class PySimCounter(X.Entity):
+
+  PORTS = 'CLK, RST_N, EN, =COUNT'
+
+  @X.hdl_process(sens='+CLK')
+  def run():
+    if RST_N != 1:
+      COUNT = 0
+    elif EN:
+      COUNT = COUNT + 1
+
+
+class PySimFloat(X.Entity):
+
+  PORTS = 'A, B, =XOUT'
+
+  @X.hdl_process(sens='A, B')
+  def run():
+    XOUT = A * B + A
+
+
+class PySimSintBits(X.Entity):
+
+  PORTS = 'S, =XBIT, =XSLICE'
+
+  @X.hdl_process(sens='S')
+  def run():
+    XBIT = S[7]
+    XSLICE = S[2: 6]
+
+
+class PySimWideMul(X.Entity):
+
+  PORTS = 'A, B, =XOUT'
+
+  @X.hdl_process(sens='A, B')
+  def run():
+    XOUT = A * B
+
+
+class PySimSelect(X.Entity):
+
+  PORTS = 'A, B, =XOUT, =FLAGS'
+
+  @X.hdl_process(sens='A, B')
+  def run():
+    if A > B:
+      XOUT = A - B
+      if A[0] == 1:
+        FLAGS = 1
+      else:
+        FLAGS = 2
+    elif A == B:
+      XOUT = 0xff
+      FLAGS = 3
+    else:
+      XOUT = B - A
+      FLAGS = 0
+
+
+def _sx(value, nbits):
+  value &= (1 << nbits) - 1
+
+  return value - (1 << nbits) if value >> (nbits - 1) else value
+
+
+def tb_iterator(eclass, inputs, args, clocks=None, **kwargs):
+  rng = random.Random(17)
+  for _ in range(32):
+    a, b = rng.randrange(256), rng.randrange(256)
+
+    yield TB.TbData(inputs=dict(A=a, B=b),
+                    outputs=dict(XOUT=(a + b) & 0xff),
+                    wait=10e-9,
+                    wait_expr=None,
+                    env=dict())
+
+
+class PySimAdder(X.Entity):
+
+  PORTS = 'A, B, =XOUT'
+
+  @X.hdl_process(sens='A, B')
+  def run():
+    XOUT = A + B
+
+
+class TestPySim(unittest.TestCase):
+
+  def test_ops(self):
+    inputs = dict(
+      A=X.mkwire(X.UINT8),
+      B=X.mkwire(X.UINT8),
+      S=X.mkwire(X.Sint(6)),
+      ADD=X.mkwire(X.UINT8),
+      MUL=X.mkwire(X.UINT8),
+      SHL=X.mkwire(X.UINT8),
+      CAT=X.mkwire(X.UINT8),
+      SMUL=X.mkwire(X.Sint(6)),
+      CMP=X.mkwire(X.BOOL),
+    )
+
+    sim = pysim.simulate(PySimOps, inputs)
+
+    rng = random.Random(11)
+    for _ in range(200):
+      a, b, s = rng.randrange(256), rng.randrange(256), rng.randrange(-32, 32)
+      sim.set(A=a, B=b, S=s).settle()
+
+      self.assertEqual(sim['ADD'], (a + b) & 0xff)
+      self.assertEqual(sim['MUL'], (a * b) & 0xff)
+      self.assertEqual(sim['SHL'], ((a << 3) | (b >> 2)) & 0xff)
+      self.assertEqual(sim['CAT'], ((a & 0x3f) << 2) | (b & 0x3))
+      # Like numeric_std resize(), truncating signed products keeps the sign bit.
+      prod = s * _sx(-3, 6)
+      self.assertEqual(sim['SMUL'], (-32 if prod < 0 else 0) | (prod & 0x1f))
+      self.assertEqual(sim['CMP'], a > b and s < 0)
+
+  def test_sint_bits(self):
+    inputs = dict(
+      S=X.mkwire(X.Sint(8)),
+      XBIT=X.mkwire(X.BIT),
+      XSLICE=X.mkwire(X.Sint(4)),
+    )
+
+    sim = pysim.simulate(PySimSintBits, inputs)
+
+    for s in range(-128, 128):
+      sim.set(S=s).settle()
+
+      self.assertEqual(sim['XBIT'], (s >> 7) & 1)
+      self.assertEqual(sim['XSLICE'], _sx(s >> 2, 4))
+
+  def test_counter(self):
+    inputs = dict(
+      CLK=X.mkwire(X.BIT),
+      RST_N=X.mkwire(X.BIT),
+      EN=X.mkwire(X.BIT),
+      COUNT=X.mkreg(X.Uint(4)),
+    )
+
+    sim = pysim.simulate(PySimCounter, inputs)
+
+    sim.set(RST_N=0).clock('CLK')
+    self.assertEqual(sim['COUNT'], 0)
+
+    sim.set(RST_N=1, EN=1).clock('CLK', cycles=20)
+    self.assertEqual(sim['COUNT'], 20 % 16)
+
+    sim.set(EN=0).clock('CLK', cycles=3)
+    self.assertEqual(sim['COUNT'], 20 % 16)
+
+  def test_float(self):
+    inputs = dict(
+      A=X.mkwire(X.Float(32)),
+      B=X.mkwire(X.Float(32)),
+      XOUT=X.mkwire(X.Float(16)),
+    )
+
+    sim = pysim.simulate(PySimFloat, inputs)
+
+    rng = np.random.default_rng(3)
+    for a, b in rng.normal(scale=4.0, size=(100, 2)).astype(np.float32):
+      sim.set(A=float(a), B=float(b)).settle()
+
+      xout = np.float16(np.float32(np.float32(a * b) + a))
+      self.assertEqual(sim['XOUT'], float(xout))
+
+  def test_testbench(self):
+    # The testbench drives the entity ports, so they need to be registers.
+    inputs = dict(
+      A=X.mkreg(X.UINT8),
+      B=X.mkreg(X.UINT8),
+      XOUT=X.mkreg(X.UINT8),
+    )
+
+    sim = pysim.run_testbench(PySimAdder, inputs, f'{__name__}:tb_iterator')
+
+    self.assertTrue(sim.kernel.finished)
+    self.assertEqual(sim.errors, 0)
+    self.assertEqual(sim.now, 320)
+
+  def test_lanes_ops(self):
+    inputs = dict(
+      A=X.mkwire(X.UINT8),
+      B=X.mkwire(X.UINT8),
+      S=X.mkwire(X.Sint(6)),
+      ADD=X.mkwire(X.UINT8),
+      MUL=X.mkwire(X.UINT8),
+      SHL=X.mkwire(X.UINT8),
+      CAT=X.mkwire(X.UINT8),
+      SMUL=X.mkwire(X.Sint(6)),
+      CMP=X.mkwire(X.BOOL),
+    )
+
+    vectors = pysim.lanes_grid(A=256, B=256, S=(-32, -1, 0, 31))
+    a, b, s = vectors['A'], vectors['B'], vectors['S']
+
+    sim = pysim.simulate(PySimOps, inputs, lanes=len(a))
+    sim.set(**vectors).settle()
+
+    self.assertEqual(sim['ADD'].dtype, np.uint8)
+    self.assertEqual(sim['SMUL'].dtype, np.int8)
+    np.testing.assert_array_equal(sim['ADD'], (a + b) & 0xff)
+    np.testing.assert_array_equal(sim['MUL'], (a * b) & 0xff)
+    np.testing.assert_array_equal(sim['SHL'], ((a << 3) | (b >> 2)) & 0xff)
+    np.testing.assert_array_equal(sim['CAT'], ((a & 0x3f) << 2) | (b & 0x3))
+    prod = s * _sx(-3, 6)
+    np.testing.assert_array_equal(sim['SMUL'], np.where(prod < 0, -32, 0) | (prod & 0x1f))
+    np.testing.assert_array_equal(sim['CMP'], (a > b) & (s < 0))
+
+  def test_lanes_branches(self):
+    inputs = dict(
+      A=X.mkwire(X.UINT8),
+      B=X.mkwire(X.UINT8),
+      XOUT=X.mkwire(X.UINT8),
+      FLAGS=X.mkwire(X.Uint(2)),
+    )
+
+    vectors = pysim.lanes_grid(A=256, B=256)
+    a, b = vectors['A'], vectors['B']
+
+    sim = pysim.simulate(PySimSelect, inputs, lanes=len(a))
+    sim.set(**vectors).settle()
+
+    np.testing.assert_array_equal(sim['XOUT'],
+                                  np.where(a > b, a - b, np.where(a == b, 0xff, b - a)))
+    np.testing.assert_array_equal(sim['FLAGS'],
+                                  np.where(a > b, 2 - (a & 1), np.where(a == b, 3, 0)))
+
+  def test_lanes_float(self):
+    inputs = dict(
+      A=X.mkwire(X.Float(32)),
+      B=X.mkwire(X.Float(32)),
+      XOUT=X.mkwire(X.Float(16)),
+    )
+
+    a, b = np.random.default_rng(3).normal(scale=4.0, size=(2, 1000)).astype(np.float32)
+
+    sim = pysim.simulate(PySimFloat, inputs, lanes=len(a))
+    sim.set(A=a, B=b).settle()
+
+    self.assertEqual(sim['XOUT'].dtype, np.float16)
+    np.testing.assert_array_equal(sim['XOUT'], (a * b + a).astype(np.float16))
+
+  def test_lanes_wide_mul(self):
+    # Products which do not fit 64 bits, need to keep the sign while resized.
+    for nbits in (33, 40, 63):
+      inputs = dict(
+        A=X.mkwire(X.Sint(nbits)),
+        B=X.mkwire(X.Sint(nbits)),
+        XOUT=X.mkwire(X.Sint(nbits)),
+      )
+
+      rng = random.Random(nbits)
+      lo, hi = -2**(nbits - 1), 2**(nbits - 1)
+      a = [rng.randrange(lo, hi) for _ in range(300)]
+      b = [rng.randrange(lo, hi) for _ in range(300)]
+
+      lsim = pysim.simulate(PySimWideMul, inputs, lanes=len(a))
+      lsim.set(A=np.array(a), B=np.array(b)).settle()
+
+      sim = pysim.simulate(PySimWideMul, inputs)
+      for i, (xa, xb) in enumerate(zip(a, b)):
+        sim.set(A=xa, B=xb).settle()
+
+        prod = xa * xb
+        xout = (lo if prod < 0 else 0) | (prod & (hi - 1))
+        self.assertEqual(sim['XOUT'], xout, msg=f'{nbits} bits: {xa} * {xb}')
+        self.assertEqual(int(lsim['XOUT'][i]), xout, msg=f'{nbits} bits: {xa} * {xb}')
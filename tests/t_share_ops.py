@@ -0,0 +1,137 @@
+import unittest
+
+import py_misc_utils.utils as pyu
+
+import pyxhdl as X
+from pyxhdl import pysim
+from pyxhdl import xlib as XL
+
+import test_utils as tu
+
+
+class ShareOpsEnt(X.Entity):
+
+  PORTS = 'CLK, SEL, A, B, C, FA, FB, =XOUT, =YOUT, =FOUT'
+
+  @X.hdl_process(sens='+CLK')
+  def run():
+    with XL.context(share_ops=True):
+      if SEL == 0:
+        XOUT = A * B
+        YOUT = A / 3
+        FOUT = FA * FB
+      elif SEL == 1:
+        XOUT = A * C + 1
+        YOUT = (B * C) / A
+      elif SEL == 2:
+        XOUT = B
+        YOUT = C * C
+        FOUT = FB * FB - FA
+      else:
+        XOUT = (B - C) * C
+        YOUT = B / C
+
+
+class ShareOpsStoreEnt(X.Entity):
+
+  PORTS = 'CLK, SEL, A, B, =XOUT'
+
+  @X.hdl_process(sens='+CLK')
+  def run():
+    with XL.context(share_ops=True):
+      t = X.mkwire(X.UINT8)
+      t = A
+      if SEL == 0:
+        t = A + 1
+        XOUT = t * B
+      else:
+        XOUT = A * B
+
+
+class ShareOpsCombEnt(X.Entity):
+
+  PORTS = 'SEL, A, B, =XOUT, =YOUT'
+
+  @X.hdl_process(sens='SEL, A, B')
+  def run():
+    with XL.context(share_ops=True):
+      t = X.mkvreg(A.dtype, 0)
+      if SEL == 0:
+        t = A + 1
+        XOUT = t * B
+        YOUT = A / 3
+      else:
+        XOUT = A * B
+        YOUT = B
+
+
+class TestShareOps(unittest.TestCase):
+
+  def _inputs(self):
+    return dict(
+      CLK=X.mkwire(X.BIT),
+      SEL=X.mkwire(X.Uint(2)),
+      A=X.mkwire(X.UINT8),
+      B=X.mkwire(X.UINT8),
+      C=X.mkwire(X.UINT8),
+      FA=X.mkwire(X.FLOAT32),
+      FB=X.mkwire(X.FLOAT32),
+      XOUT=X.mkreg(X.UINT8),
+      YOUT=X.mkreg(X.UINT8),
+      FOUT=X.mkreg(X.FLOAT32),
+    )
+
+  def test_share_ops(self):
+    tu.run(self, tu.test_name(self, pyu.fname()), ShareOpsEnt, self._inputs())
+
+  def test_share_ops_results(self):
+    sim = pysim.simulate(ShareOpsEnt, self._inputs())
+
+    for i in range(64):
+      sel, a, b, c = i % 4, (i * 37 + 1) % 256, (i * 11 + 5) % 256, (i * 53 + 3) % 256
+      sim.set(SEL=sel, A=a, B=b, C=c).clock('CLK')
+
+      if sel == 0:
+        x, y = a * b, a // 3
+      elif sel == 1:
+        x, y = a * c + 1, ((b * c) & 0xff) // a
+      elif sel == 2:
+        x, y = b, c * c
+      else:
+        x, y = (b - c) * c, b // c
+
+      self.assertEqual((sim['XOUT'], sim['YOUT']), (x & 0xff, y & 0xff), msg=f'{i}')
+
+
+  def _store_inputs(self):
+    return dict(
+      CLK=X.mkwire(X.BIT),
+      SEL=X.mkwire(X.Uint(2)),
+      A=X.mkwire(X.UINT8),
+      B=X.mkwire(X.UINT8),
+      XOUT=X.mkreg(X.UINT8),
+    )
+
+  def test_share_ops_stores(self):
+    tu.run(self, tu.test_name(self, pyu.fname()), ShareOpsStoreEnt, self._store_inputs())
+
+  def test_share_ops_stores_results(self):
+    sim = pysim.simulate(ShareOpsStoreEnt, self._store_inputs())
+
+    for sel, a, b in ((0, 3, 5), (1, 3, 5), (0, 255, 7), (2, 9, 9)):
+      sim.set(SEL=sel, A=a, B=b).clock('CLK')
+
+      x = (a + 1) * b if sel == 0 else a * b
+      self.assertEqual(sim['XOUT'], x & 0xff, msg=f'SEL={sel} A={a} B={b}')
+
+  def _comb_inputs(self):
+    return dict(
+      SEL=X.mkwire(X.BIT),
+      A=X.mkwire(X.UINT8),
+      B=X.mkwire(X.UINT8),
+      XOUT=X.mkreg(X.UINT8),
+      YOUT=X.mkreg(X.UINT8),
+    )
+
+  def test_share_ops_comb(self):
+    tu.run(self, tu.test_name(self, pyu.fname()), ShareOpsCombEnt, self._comb_inputs())
@@ -3,6 +3,7 @@ import unittest
 import py_misc_utils.utils as pyu
 
 import pyxhdl as X
+from pyxhdl import pysim
 from pyxhdl import xlib as XL
 from pyxhdl import xutils as XU
 
@@ -43,6 +44,43 @@ class SplitTest(X.Entity):
     XOUT = s3 @ s1 @ s2
 
 
+class ReduceTest(X.Entity):
+
+  PORTS = 'A, B, C, D, E, =XSUM, =XMAX, =XMIN, =XAND, =XOR, =XXOR, =XPOP'
+
+  @X.hdl_process(sens='A, B, C, D, E')
+  def run():
+    XSUM = XU.reduce_sum((A, B, C, D, E))
+    XMAX = XU.reduce_max((A, B, C, D, E))
+    XMIN = XU.reduce_min((A, B, C, D, E))
+    XAND = XU.reduce_and(A)
+    XOR = XU.reduce_or((A[0], B[1], C[2]))
+    XXOR = XU.reduce_xor(A)
+    XPOP = XU.popcount(A)
+
+
+class ReduceStagesTest(X.Entity):
+
+  PORTS = 'CLK, A, B, C, D, E, =XSUM, =XPOP'
+
+  @X.hdl_process(sens='+CLK')
+  def run():
+    XSUM = XU.reduce_sum((A, B, C, D, E), stages=2)
+    XPOP = XU.popcount(A @ B, stages=1)
+
+
+class BitScanTest(X.Entity):
+
+  PORTS = 'A, B, C, =XLZC, =XTZC, =XLZC_POW2, =XONEHOT'
+
+  @X.hdl_process(sens='A, B, C')
+  def run():
+    XLZC = XU.lzc(A)
+    XTZC = XU.tzc(A)
+    XLZC_POW2 = XU.lzc(B)
+    XONEHOT = XU.onehot_to_bin(C)
+
+
 class TestXUtils(unittest.TestCase):
 
   def test_snap(self):
@@ -70,3 +108,113 @@ class TestXUtils(unittest.TestCase):
 
     tu.run(self, tu.test_name(self, pyu.fname()), SplitTest, inputs)
 
+
+  def _reduce_inputs(self):
+    return dict(
+      A=X.mkwire(X.UINT8),
+      B=X.mkwire(X.UINT8),
+      C=X.mkwire(X.UINT8),
+      D=X.mkwire(X.UINT8),
+      E=X.mkwire(X.UINT8),
+      XSUM=X.mkreg(X.Uint(11)),
+      XMAX=X.mkreg(X.UINT8),
+      XMIN=X.mkreg(X.UINT8),
+      XAND=X.mkreg(X.BIT),
+      XOR=X.mkreg(X.BIT),
+      XXOR=X.mkreg(X.BIT),
+      XPOP=X.mkreg(X.UINT4),
+    )
+
+  def test_reduce(self):
+    tu.run(self, tu.test_name(self, pyu.fname()), ReduceTest, self._reduce_inputs())
+
+  def test_reduce_results(self):
+    sim = pysim.simulate(ReduceTest, self._reduce_inputs())
+
+    for i in range(64):
+      values = [(i * k * 37 + k * 11) % 256 for k in range(1, 6)]
+      if i % 8 == 0:
+        values[0] = 0xff
+
+      sim.set(**dict(zip('ABCDE', values))).settle()
+
+      a, b, c = values[: 3]
+      self.assertEqual(sim['XSUM'], sum(values), msg=f'{i}')
+      self.assertEqual(sim['XMAX'], max(values), msg=f'{i}')
+      self.assertEqual(sim['XMIN'], min(values), msg=f'{i}')
+      self.assertEqual(sim['XAND'], int(a == 0xff), msg=f'{i}')
+      self.assertEqual(sim['XOR'], (a & 1) | ((b >> 1) & 1) | ((c >> 2) & 1), msg=f'{i}')
+      self.assertEqual(sim['XXOR'], a.bit_count() % 2, msg=f'{i}')
+      self.assertEqual(sim['XPOP'], a.bit_count(), msg=f'{i}')
+
+  def _reduce_stages_inputs(self):
+    return dict(
+      CLK=X.mkwire(X.BIT),
+      A=X.mkwire(X.UINT8),
+      B=X.mkwire(X.UINT8),
+      C=X.mkwire(X.UINT8),
+      D=X.mkwire(X.UINT8),
+      E=X.mkwire(X.UINT8),
+      XSUM=X.mkreg(X.Uint(11)),
+      XPOP=X.mkreg(X.Uint(5)),
+    )
+
+  def test_reduce_stages(self):
+    tu.run(self, tu.test_name(self, pyu.fname()), ReduceStagesTest,
+           self._reduce_stages_inputs())
+
+  def test_reduce_stages_results(self):
+    sim = pysim.simulate(ReduceStagesTest, self._reduce_stages_inputs())
+
+    # The outputs are registered, on top of the reduction register stages.
+    sum_latency = XU.reduce_stages(5, stages=2) + 1
+    pop_latency = XU.reduce_stages(16, stages=1) + 1
+    self.assertEqual((sum_latency, pop_latency), (2, 4))
+
+    history = []
+    for i in range(32):
+      values = [(i * k * 37 + k * 11) % 256 for k in range(1, 6)]
+      sim.set(**dict(zip('ABCDE', values))).clock('CLK')
+      history.append(values)
+
+      if i >= pop_latency:
+        svalues = history[-sum_latency]
+        pvalues = history[-pop_latency]
+        self.assertEqual(sim['XSUM'], sum(svalues), msg=f'{i}')
+        self.assertEqual(sim['XPOP'], ((pvalues[0] << 8) | pvalues[1]).bit_count(),
+                         msg=f'{i}')
+
+  def _bit_scan_inputs(self):
+    return dict(
+      A=X.mkwire(X.Bits(11)),
+      B=X.mkwire(X.Bits(8)),
+      C=X.mkwire(X.Bits(12)),
+      XLZC=X.mkreg(X.UINT4),
+      XTZC=X.mkreg(X.UINT4),
+      XLZC_POW2=X.mkreg(X.UINT4),
+      XONEHOT=X.mkreg(X.UINT4),
+    )
+
+  def test_bit_scan(self):
+    tu.run(self, tu.test_name(self, pyu.fname()), BitScanTest, self._bit_scan_inputs())
+
+  def test_bit_scan_results(self):
+    sim = pysim.simulate(BitScanTest, self._bit_scan_inputs())
+
+    def lzc(v, n):
+      return n - v.bit_length()
+
+    def tzc(v, n):
+      return (v & -v).bit_length() - 1 if v != 0 else n
+
+    for i in range(128):
+      a = ((i * 0x9e3779b1) >> (i % 13)) & (2**11 - 1)
+      b = (1 << (i % 9)) >> 1
+      c = 1 << (i % 12)
+
+      sim.set(A=a, B=b, C=c).settle()
+
+      self.assertEqual(sim['XLZC'], lzc(a, 11), msg=f'{i} a={a:011b}')
+      self.assertEqual(sim['XTZC'], tzc(a, 11), msg=f'{i} a={a:011b}')
+      self.assertEqual(sim['XLZC_POW2'], lzc(b, 8), msg=f'{i} b={b:08b}')
+      self.assertEqual(sim['XONEHOT'], i % 12, msg=f'{i}')
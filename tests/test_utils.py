@@ -60,9 +60,9 @@ def store_reference(name, backend, code):
       rfd.write(cln + '\n')
 
 
-def generate_code(obj, inputs, backend):
+def generate_code(obj, inputs, backend, **kwargs):
   eargs = _BACKEND_ARGS[backend]
-  emitter = X.Emitter.create(backend, **eargs)
+  emitter = X.Emitter.create(backend, **eargs, **kwargs)
 
   emitter.add_libpath(os.path.join(os.path.dirname(__file__), 'data', 'hdl_libs'))
 
@@ -78,8 +78,8 @@ def generate_code(obj, inputs, backend):
     return codegen.flush()
 
 
-def _run_test(test_obj, name, obj, inputs, backend):
-  code = generate_code(obj, inputs, backend)
+def _run_test(test_obj, name, obj, inputs, backend, **kwargs):
+  code = generate_code(obj, inputs, backend, **kwargs)
 
   ref_code = load_reference(name, backend)
   if ref_code is None:
@@ -102,7 +102,7 @@ def _run_test(test_obj, name, obj, inputs, backend):
         test_obj.fail('\n' + txt_diff)
 
 
-def run(test_obj, name, obj, inputs):
+def run(test_obj, name, obj, inputs, **kwargs):
   for backend, _ in X.Emitter.available():
-    _run_test(test_obj, name, obj, inputs, backend)
+    _run_test(test_obj, name, obj, inputs, backend, **kwargs)
 